@@ -1,4 +1,5 @@
 from .data_analysis import *
 from .facade import *
+from .lote import *
 from .map_tools import *
 from .utils import *
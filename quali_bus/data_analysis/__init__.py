@@ -1,3 +1,6 @@
 from ..visualization.visualizacao_bairros import *
+from .agregacao import *
 from .calcular_indicadores import *
 from .carregar_dados import *
+from .estado_operacional import *
+from .sensibilidade import *
@@ -0,0 +1,221 @@
+from typing import Callable, Iterable
+
+import numpy as np
+import pandas as pd
+
+COLUNAS_HORARIO = ["chegada_planejada", "chegada_real", "partida_planejada", "partida_real"]
+COLUNAS_CHAVE_DIARIA = ["data", "id_linha"]
+FORMATO_DATA = "%d/%m/%Y"
+
+
+def _contribuicoes_viagens(df_viagens: pd.DataFrame) -> pd.DataFrame:
+	"""Calcula, para cada viagem, a sua contribuição para os acumuladores por linha.
+
+	Todos os acumuladores são somas, o que permite reduzi-los num único groupby e
+	combinar resultados parciais (blocos, dias) simplesmente somando-os. Uma nova
+	estatística por linha deve ser adicionada aqui como uma ou mais colunas somáveis
+	e finalizada em `finalizar_viagens`.
+
+	Args:
+		df_viagens (pd.DataFrame): Registro de viagens com as colunas de horário e 'km_executado'.
+
+	Returns:
+		pd.DataFrame: Contribuições por viagem, com o mesmo índice de `df_viagens`.
+	"""
+	horarios = df_viagens[COLUNAS_HORARIO]
+	km = df_viagens["km_executado"]
+	km_numerico = pd.to_numeric(km, errors="coerce")
+
+	return pd.DataFrame(
+		{
+			"viagens": np.ones(len(df_viagens), dtype=np.int64),
+			"viagens_com_horario": (horarios.notna() & horarios.ne("-")).any(axis=1).to_numpy(dtype=np.int64),
+			"km_registros": km.notna().to_numpy(dtype=np.int64),
+			"km_soma": km_numerico.fillna(0.0).to_numpy(dtype=np.float64),
+			"km_contagem": km_numerico.notna().to_numpy(dtype=np.int64),
+		},
+		index=df_viagens.index,
+	)
+
+
+def acumular_viagens(df_viagens: pd.DataFrame, chaves: tuple[str, ...] = ("id_linha",)) -> pd.DataFrame:
+	"""Reduz o registro de viagens a acumuladores por linha numa única passagem.
+
+	Args:
+		df_viagens (pd.DataFrame): Registro de viagens (mesmo formato do arquivo de pontualidade).
+		chaves (tuple[str, ...]): Colunas de agrupamento. Padrão: ('id_linha',).
+
+	Returns:
+		pd.DataFrame: Acumuladores indexados pelas chaves, com as colunas 'viagens',
+			'viagens_com_horario', 'km_registros', 'km_soma' e 'km_contagem'.
+	"""
+	contribuicoes = _contribuicoes_viagens(df_viagens)
+	return contribuicoes.groupby(_chaves_agrupamento(df_viagens, chaves), sort=True, observed=True).sum()
+
+
+def acumular_frequencia(df_frequencia: pd.DataFrame, chaves: tuple[str, ...] = ("id_linha",)) -> pd.DataFrame:
+	"""Reduz o registro de jornadas a acumuladores por linha (soma dos minutos e número de jornadas).
+
+	Args:
+		df_frequencia (pd.DataFrame): Registro de jornadas com 'horario_inicio_jornada' e 'horario_fim_jornada'.
+		chaves (tuple[str, ...]): Colunas de agrupamento. Padrão: ('id_linha',).
+
+	Returns:
+		pd.DataFrame: Acumuladores indexados pelas chaves, com as colunas 'minutos_soma' e 'jornadas'.
+
+	Raises:
+		ValueError: Se alguma jornada não tiver horário de início ou de fim.
+	"""
+	inicio = _converter_horario(df_frequencia["horario_inicio_jornada"])
+	fim = _converter_horario(df_frequencia["horario_fim_jornada"])
+	duracoes = fim - inicio
+	if duracoes.isna().any():
+		linhas = df_frequencia.loc[duracoes.isna().to_numpy(), "id_linha"].astype(str).unique().tolist()
+		raise ValueError(f"Jornadas sem horário de início ou de fim nas linhas: {linhas}")
+	minutos = np.trunc(duracoes.dt.total_seconds().to_numpy() / 60).astype(np.int64)
+
+	contribuicoes = pd.DataFrame({"minutos_soma": minutos, "jornadas": np.ones(len(df_frequencia), dtype=np.int64)}, index=df_frequencia.index)
+	return contribuicoes.groupby(_chaves_agrupamento(df_frequencia, chaves), sort=True, observed=True).sum()
+
+
+def _chaves_agrupamento(df: pd.DataFrame, chaves: tuple[str, ...]) -> list[pd.Series]:
+	"""Retorna as colunas de agrupamento, com 'id_linha' como texto para que blocos lidos com tipos diferentes se combinem."""
+	return [df[chave].astype("string") if chave == "id_linha" else df[chave] for chave in chaves]
+
+
+def _converter_horario(horarios: pd.Series) -> pd.Series:
+	"""Converte horários em texto ('%H:%M:%S') ou `datetime.time` para datetime; datas/horas e durações nativas são mantidas."""
+	if pd.api.types.is_timedelta64_dtype(horarios):
+		return horarios
+	return pd.to_datetime(horarios, format="%H:%M:%S")
+
+
+def combinar_acumuladores(acumuladores: Iterable[pd.DataFrame]) -> pd.DataFrame:
+	"""Combina acumuladores parciais (de blocos, arquivos ou dias) somando-os chave a chave.
+
+	Args:
+		acumuladores (Iterable[pd.DataFrame]): Acumuladores com o mesmo índice de chaves e as mesmas colunas.
+
+	Returns:
+		pd.DataFrame: Acumuladores combinados, ordenados pelas chaves.
+	"""
+	parciais = [parcial for parcial in acumuladores if not parcial.empty]
+	if not parciais:
+		return pd.DataFrame()
+	combinado = pd.concat(parciais)
+	return combinado.groupby(level=list(range(combinado.index.nlevels)), sort=True, observed=True).sum()
+
+
+def acumular_em_blocos(blocos: Iterable[pd.DataFrame], acumular: Callable[[pd.DataFrame], pd.DataFrame]) -> pd.DataFrame:
+	"""Aplica `acumular` a cada bloco e vai somando os resultados, mantendo em memória apenas os acumuladores.
+
+	Args:
+		blocos (Iterable[pd.DataFrame]): Blocos do registro (por exemplo, `pd.read_csv(..., chunksize=n)`).
+		acumular (Callable): Função de acumulação, como `acumular_viagens` ou `acumular_frequencia`.
+
+	Returns:
+		pd.DataFrame: Acumuladores do registro completo.
+	"""
+	total = pd.DataFrame()
+	for bloco in blocos:
+		total = combinar_acumuladores([total, acumular(bloco)])
+	return total
+
+
+def acumular_frequencia_diaria(df_frequencia: pd.DataFrame) -> pd.DataFrame:
+	"""Reduz o registro de jornadas a acumuladores por (data, id_linha), usando a coluna 'data_jornada'."""
+	return _normalizar_chaves_diarias(acumular_frequencia(df_frequencia, chaves=("data_jornada", "id_linha")))
+
+
+def acumular_viagens_diarias(df_viagens: pd.DataFrame) -> pd.DataFrame:
+	"""Reduz o registro de viagens a acumuladores por (data, id_linha), usando a coluna 'data_viagem'."""
+	return _normalizar_chaves_diarias(acumular_viagens(df_viagens, chaves=("data_viagem", "id_linha")))
+
+
+def _normalizar_chaves_diarias(acumuladores: pd.DataFrame) -> pd.DataFrame:
+	"""Converte o índice (data original, id_linha) em (data, id_linha), com datas e identificadores normalizados."""
+	datas = pd.to_datetime(acumuladores.index.get_level_values(0), format=FORMATO_DATA)
+	linhas = acumuladores.index.get_level_values(1).astype(str)
+	acumuladores.index = pd.MultiIndex.from_arrays([datas, linhas], names=COLUNAS_CHAVE_DIARIA)
+	return acumuladores.groupby(level=COLUNAS_CHAVE_DIARIA, sort=True).sum()
+
+
+def unir_acumuladores(acumuladores_frequencia: pd.DataFrame, acumuladores_viagens: pd.DataFrame) -> pd.DataFrame:
+	"""Junta, lado a lado, os acumuladores de jornadas e de viagens com as mesmas chaves.
+
+	Chaves presentes em apenas um dos registros recebem zero nos acumuladores do outro, o que
+	mantém a soma válida.
+
+	Args:
+		acumuladores_frequencia (pd.DataFrame): Resultado de `acumular_frequencia_diaria`.
+		acumuladores_viagens (pd.DataFrame): Resultado de `acumular_viagens_diarias`.
+
+	Returns:
+		pd.DataFrame: Acumuladores operacionais combinados.
+	"""
+	unidos = pd.concat([acumuladores_frequencia, acumuladores_viagens], axis=1).fillna(0)
+	return unidos.astype({coluna: np.int64 for coluna in unidos.columns if coluna != "km_soma"})
+
+
+def agregar_por_periodo(acumuladores_diarios: pd.DataFrame, frequencia: str = "M") -> pd.DataFrame:
+	"""Soma os acumuladores diários por (id_linha, periodo).
+
+	Args:
+		acumuladores_diarios (pd.DataFrame): Acumuladores indexados por (data, id_linha).
+		frequencia (str): Frequência do período no formato do pandas ('D', 'W', 'M', ...).
+
+	Returns:
+		pd.DataFrame: Acumuladores indexados por (id_linha, periodo).
+	"""
+	periodos = acumuladores_diarios.index.get_level_values("data").to_period(frequencia).rename("periodo")
+	linhas = acumuladores_diarios.index.get_level_values("id_linha")
+	return acumuladores_diarios.groupby([linhas, periodos], sort=True).sum()
+
+
+def finalizar_operacional(acumuladores: pd.DataFrame) -> tuple[pd.DataFrame, pd.DataFrame, pd.DataFrame]:
+	"""Converte acumuladores operacionais combinados nos indicadores de frequência, pontualidade e cumprimento.
+
+	Args:
+		acumuladores (pd.DataFrame): Acumuladores de `unir_acumuladores`, somados pelas chaves desejadas.
+
+	Returns:
+		tuple[pd.DataFrame, pd.DataFrame, pd.DataFrame]: DataFrames de frequência, pontualidade e cumprimento.
+	"""
+	if acumuladores.empty:
+		return pd.DataFrame(), pd.DataFrame(), pd.DataFrame()
+
+	frequencia = finalizar_frequencia(acumuladores[acumuladores["jornadas"] > 0])
+	pontualidade, cumprimento = finalizar_viagens(acumuladores[acumuladores["viagens"] > 0])
+	return frequencia, pontualidade, cumprimento
+
+
+def finalizar_frequencia(acumuladores: pd.DataFrame) -> pd.DataFrame:
+	"""Converte os acumuladores de jornadas no tempo médio de operação por linha.
+
+	Args:
+		acumuladores (pd.DataFrame): Resultado de `acumular_frequencia`, indexado por 'id_linha' (e, opcionalmente, outras chaves).
+
+	Returns:
+		pd.DataFrame: DataFrame (id_linha, frequencia_atendimento_pontuacao).
+	"""
+	frequencia = (acumuladores["minutos_soma"] / acumuladores["jornadas"]).rename("frequencia_atendimento_pontuacao").reset_index()
+	return frequencia.astype({"id_linha": "string", "frequencia_atendimento_pontuacao": "float64"})
+
+
+def finalizar_viagens(acumuladores: pd.DataFrame) -> tuple[pd.DataFrame, pd.DataFrame]:
+	"""Converte os acumuladores por linha nos indicadores de pontualidade e de km executado.
+
+	Args:
+		acumuladores (pd.DataFrame): Resultado de `acumular_viagens`, indexado por 'id_linha' (e, opcionalmente, outras chaves).
+
+	Returns:
+		tuple[pd.DataFrame, pd.DataFrame]: DataFrames (id_linha, pontualidade) e (id_linha, km_executado).
+	"""
+	pontualidade = (acumuladores["viagens_com_horario"] / acumuladores["viagens"]).rename("pontualidade").reset_index()
+	pontualidade = pontualidade.astype({"id_linha": "string", "pontualidade": "float64"})
+
+	com_km = acumuladores[acumuladores["km_registros"] > 0]
+	km_executado = (com_km["km_soma"] / com_km["km_contagem"].replace(0, np.nan)).rename("km_executado").reset_index()
+	km_executado = km_executado.astype({"id_linha": "string", "km_executado": "float64"})
+
+	return pontualidade, km_executado
@@ -1,15 +1,25 @@
-from typing import Optional
+from typing import Iterable, Optional
 
 import geopandas as gpd
 import numpy as np
 import pandas as pd
-from shapely.geometry import LineString
-from shapely.wkt import loads
+import shapely
 
 from ..utils import Associador, modelos
 from ..utils.config import config
-from ..utils.cores import cor_iqt
+from ..utils.cores import cores_iqt
+from ..utils.geometrias import RepositorioGeometrias
+from .agregacao import (
+	acumular_em_blocos,
+	acumular_frequencia,
+	acumular_viagens,
+	agregar_por_periodo,
+	finalizar_frequencia,
+	finalizar_operacional,
+	finalizar_viagens,
+)
 from .classificar_indicadores import ClassificarIndicadores
+from .estado_operacional import EstadoOperacional
 
 
 class CalcularIndicadores:
@@ -25,6 +35,7 @@ class CalcularIndicadores:
 		"""
 		Inicializa a classe com os valores predefinidos dos indicadores e suas prioridades.
 		"""
+		self.geometrias: Optional[RepositorioGeometrias] = None
 
 	def carregar_dados(
 		self, df_linhas: pd.DataFrame, df_frequencia: pd.DataFrame, df_pontualidade: pd.DataFrame, init_crs: str | int, target_crs: str | int
@@ -39,12 +50,93 @@ class CalcularIndicadores:
 			init_crs (str): CRS inicial dos dados geoespaciais
 			target_crs (str): CRS projetado dos dados geoespaciais
 		"""
-		self.dados_linhas = self.carregar_dados_linha(df_linhas, init_crs, target_crs)
+		self._carregar_linhas(df_linhas, init_crs, target_crs)
 		self.frequencia = self.carregar_frequencia_atendimento_pontuacao(df_frequencia)
-		self.pontualidade = self.carregar_pontualidade(df_pontualidade)
-		self.cumprimento = self.carregar_cumprimento(df_pontualidade)
+		self.pontualidade, self.cumprimento = self.carregar_viagens(df_pontualidade)
+
+	def carregar_dados_em_blocos(
+		self,
+		df_linhas: pd.DataFrame,
+		blocos_frequencia: Iterable[pd.DataFrame],
+		blocos_viagens: Iterable[pd.DataFrame],
+		init_crs: str | int,
+		target_crs: str | int,
+	):
+		"""Carrega os dados operacionais consumindo os registros de jornadas e de viagens bloco a bloco.
+
+		Cada bloco é reduzido aos acumuladores por linha e descartado, de modo que apenas os acumuladores
+		ficam em memória. O resultado é idêntico ao de `carregar_dados` com os registros completos.
+
+		Args:
+			df_linhas (pd.DataFrame): DataFrame contendo os dados das linhas de transporte.
+			blocos_frequencia (Iterable[pd.DataFrame]): Blocos do registro de frequência de atendimento.
+			blocos_viagens (Iterable[pd.DataFrame]): Blocos do registro de viagens (pontualidade).
+			init_crs (str): CRS inicial dos dados geoespaciais
+			target_crs (str): CRS projetado dos dados geoespaciais
+		"""
+		self._carregar_linhas(df_linhas, init_crs, target_crs)
+		self.frequencia = self._carregar_blocos(blocos_frequencia, self._acumular_frequencia_validada, finalizar_frequencia, "frequência")
+		self.pontualidade, self.cumprimento = self._carregar_blocos(
+			blocos_viagens, self._acumular_viagens_validadas, finalizar_viagens, "viagens", (pd.DataFrame(), pd.DataFrame())
+		)
+
+	def carregar_dados_estado(self, df_linhas: pd.DataFrame, estado: EstadoOperacional, init_crs: str | int, target_crs: str | int):
+		"""Carrega os dados das linhas e os indicadores operacionais a partir de um estado agregado por dia.
+
+		Args:
+			df_linhas (pd.DataFrame): DataFrame contendo os dados das linhas de transporte.
+			estado (EstadoOperacional): Estado com os acumuladores diários da janela.
+			init_crs (str): CRS inicial dos dados geoespaciais
+			target_crs (str): CRS projetado dos dados geoespaciais
+		"""
+		self._carregar_linhas(df_linhas, init_crs, target_crs)
+		self.frequencia, self.pontualidade, self.cumprimento = estado.indicadores()
+
+	def atualizar_iqt(self, estado: EstadoOperacional, prioridades: Optional[np.ndarray] = None) -> pd.DataFrame:
+		"""Recalcula o IQT a partir de um estado atualizado, reaproveitando as linhas e os dados geográficos já carregados.
 
-	def carregar_dados_geometrias(self, df_pontos_onibus: pd.DataFrame, df_residencias: pd.DataFrame, init_crs: str | int, target_crs: str | int):
+		Args:
+			estado (EstadoOperacional): Estado com os acumuladores diários da janela.
+			prioridades (np.ndarray | None): Vetor de pesos dos indicadores. Se None, usa `config.PRIORIDADE`.
+
+		Returns:
+			pd.DataFrame: Matriz de indicadores e IQT atualizada.
+		"""
+		self.frequencia, self.pontualidade, self.cumprimento = estado.indicadores()
+		self.classificar_linha()
+		self.processar_iqt(prioridades)
+		return self.matriz
+
+	def _carregar_linhas(self, df_linhas: pd.DataFrame, init_crs: str | int, target_crs: str | int):
+		"""Carrega os dados das linhas e cria o repositório de geometrias compartilhado com os mapas.
+
+		Raises:
+			ValueError: Se houver mais de uma linha com o mesmo 'id_linha'.
+		"""
+		self.dados_linhas = self.carregar_dados_linha(df_linhas, init_crs, target_crs)
+		self.geometrias = RepositorioGeometrias.de_geodataframe(self.dados_linhas) if not self.dados_linhas.empty else None
+
+	def _carregar_blocos(self, blocos, acumular, finalizar, descricao: str, vazio=None):
+		"""Acumula os blocos e finaliza os indicadores, retornando `vazio` em caso de erro."""
+		try:
+			return finalizar(acumular_em_blocos(blocos, acumular))
+		except Exception as error:
+			print(f"Erro ao carregar dados de {descricao} em blocos: ", error)
+			return pd.DataFrame() if vazio is None else vazio
+
+	def _acumular_frequencia_validada(self, bloco: pd.DataFrame) -> pd.DataFrame:
+		"""Valida um bloco do registro de jornadas e o reduz aos acumuladores por linha."""
+		modelos.validar_df_frequencia(bloco)
+		return acumular_frequencia(bloco)
+
+	def _acumular_viagens_validadas(self, bloco: pd.DataFrame) -> pd.DataFrame:
+		"""Valida um bloco do registro de viagens e o reduz aos acumuladores por linha."""
+		modelos.validar_df_pontualidade(bloco)
+		return acumular_viagens(bloco)
+
+	def carregar_dados_geometrias(
+		self, df_pontos_onibus: pd.DataFrame, df_residencias: pd.DataFrame, init_crs: str | int, target_crs: str | int, limite_distancia: float = 500
+	):
 		"""Carrega os dados geométricos de pontos de ônibus e residências.
 
 		Args:
@@ -52,9 +144,34 @@ class CalcularIndicadores:
 			df_residencias (pd.DataFrame): DataFrame contendo os dados das residências.
 			init_crs (str): CRS inicial dos dados geoespaciais.
 			target_crs (str): CRS projetado dos dados geoespaciais.
+			limite_distancia (float): Distância máxima, em metros, para uma residência ser considerada atendida.
 		"""
 		self.associador = Associador(df_pontos_onibus, self.dados_linhas.copy(), df_residencias, init_crs, target_crs)
-		self.dados_geograficos = self.associador.consolidar_associacoes()
+		self.dados_geograficos = self.associador.consolidar_associacoes(limite_distancia=limite_distancia)
+
+	def carregar_dados_geometrias_em_blocos(
+		self,
+		df_pontos_onibus: pd.DataFrame,
+		caminho_residencias: str,
+		init_crs: str | int,
+		target_crs: str | int,
+		limite_memoria_mb: float = 256,
+		limite_distancia: float = 500,
+	):
+		"""Carrega os pontos de ônibus e associa as residências lendo o arquivo de residências em blocos.
+
+		Args:
+			df_pontos_onibus (pd.DataFrame): DataFrame contendo os dados dos pontos de ônibus.
+			caminho_residencias (str): Caminho para o arquivo CSV ou Parquet de residências.
+			init_crs (str): CRS inicial dos dados geoespaciais.
+			target_crs (str): CRS projetado dos dados geoespaciais.
+			limite_memoria_mb (float): Orçamento aproximado de memória, em MB, para cada bloco de residências.
+			limite_distancia (float): Distância máxima, em metros, para uma residência ser considerada atendida.
+		"""
+		self.associador = Associador(df_pontos_onibus, self.dados_linhas.copy(), None, init_crs, target_crs)
+		self.dados_geograficos = self.associador.consolidar_associacoes_em_blocos(
+			caminho_residencias, limite_distancia=limite_distancia, limite_memoria_mb=limite_memoria_mb
+		)
 
 	def carregar_dados_linha(self, df_line: pd.DataFrame, init_crs: str | int, target_crs: str | int) -> gpd.GeoDataFrame:
 		"""
@@ -75,8 +192,9 @@ class CalcularIndicadores:
 			df_copy = df_line.copy()
 
 			dados_linhas = gpd.GeoDataFrame(df_copy)
-			if not self._validar_geometry_wkt(dados_linhas).all():
-				raise
+			wkt_validos = self._validar_geometry_wkt(dados_linhas)
+			if not wkt_validos.all():
+				raise ValueError(f"Geometrias WKT inválidas nas linhas: {self._identificar_linhas(dados_linhas, ~wkt_validos.to_numpy())}")
 
 			return self._converter_geometry_para_linestring(dados_linhas, init_crs, target_crs)
 		except Exception as error:
@@ -85,22 +203,43 @@ class CalcularIndicadores:
 
 	def _validar_geometry_wkt(self, df, coluna="geometria_linha"):
 		"""
-		Valida se os valores da coluna geometria_linha são strings WKT.
+		Valida se os valores da coluna geometria_linha são strings WKT de LINESTRING, geometrias ou WKB.
+
+		Geometrias e WKB (lidos de arquivos GeoParquet/Arrow) são aceitos aqui e têm o tipo conferido
+		na conversão para LineString.
 
 		Args:
 			df (pd.DataFrame): DataFrame contendo a coluna geometria_linha.
 			coluna (str): Nome da coluna geometria_linha.
 
 		Returns:
-			bool: True se todos os valores forem strings WKT, False caso contrário.
+			pd.Series: Série booleana indicando, para cada linha, se o valor é uma geometria válida para conversão.
 		"""
-		return df[coluna].apply(lambda x: isinstance(x, str) and x.startswith("LINESTRING"))
+		valores = df[coluna].to_numpy(dtype=object)
+		nativos = pd.Series(shapely.is_geometry(valores) | self._mascara_wkb(valores), index=df.index)
+		try:
+			return df[coluna].str.startswith("LINESTRING", na=False).astype(bool) | nativos
+		except (AttributeError, TypeError):
+			return nativos
+
+	def _mascara_wkb(self, valores: np.ndarray) -> np.ndarray:
+		"""Retorna a máscara dos valores binários (WKB)."""
+		return np.fromiter((isinstance(valor, (bytes, bytearray)) for valor in valores), dtype=bool, count=len(valores))
+
+	def _identificar_linhas(self, df: pd.DataFrame, mascara: np.ndarray) -> list:
+		"""Retorna o id_linha (ou o índice, na ausência da coluna) das linhas selecionadas pela máscara."""
+		if "id_linha" in df.columns:
+			return df.loc[mascara, "id_linha"].tolist()
+		return df.index[mascara].tolist()
 
 	def _converter_geometry_para_linestring(
 		self, df: pd.DataFrame, init_crs: str | int, target_crs: str | int, coluna: str = "geometria_linha"
 	) -> gpd.GeoDataFrame:
 		"""
-		Converte strings WKT em objetos LineString 2D e retorna um GeoDataFrame.
+		Converte strings WKT, WKB ou geometrias em objetos LineString 2D e retorna um GeoDataFrame.
+
+		Se a coluna já for uma GeoSeries com CRS (por exemplo, lida de um GeoParquet), esse CRS
+		prevalece sobre `init_crs`.
 
 		Args:
 			df (pd.DataFrame): DataFrame contendo a coluna geometria_linha.
@@ -118,29 +257,28 @@ class CalcularIndicadores:
 			raise ValueError(f"Coluna '{coluna}' não encontrada no DataFrame")
 
 		df_copy = df.copy()
+		crs_origem = getattr(df_copy[coluna], "crs", None) or init_crs
+		valores = df_copy[coluna].to_numpy(dtype=object)
 
-		def converter_para_2d(geom):
-			if geom is None:
-				return LineString()
-
-			# Se for uma string, tenta carregar a geometria
-			if isinstance(geom, str):
-				geom = loads(geom)
-
-			# Garantir que é uma geometria do tipo esperado
-			if not isinstance(geom, LineString):
-				raise ValueError("Geometria inválida ou inesperada")
+		eh_geometria = shapely.is_geometry(valores)
+		ausentes = ~eh_geometria & pd.isna(valores)
+		binarios = self._mascara_wkb(valores)
+		textos = ~eh_geometria & ~ausentes & ~binarios
 
-			# Acessa as coordenadas
-			coords_2d = [(x, y) for x, y, *_ in geom.coords]
+		geometrias = np.where(eh_geometria, valores, None)
+		geometrias[textos] = shapely.from_wkt(valores[textos].astype(str), on_invalid="ignore")
+		geometrias[binarios] = shapely.from_wkb(valores[binarios], on_invalid="ignore")
+		geometrias[ausentes] = shapely.from_wkt("LINESTRING EMPTY")
 
-			return LineString(coords_2d)
+		invalidas = shapely.get_type_id(geometrias) != shapely.GeometryType.LINESTRING
+		if invalidas.any():
+			raise ValueError(f"Geometria inválida ou inesperada nas linhas: {self._identificar_linhas(df_copy, invalidas)}")
 
-		df_copy[coluna] = df_copy[coluna].apply(converter_para_2d)  # type: ignore
+		df_copy[coluna] = shapely.force_2d(geometrias)
 
 		df_copy = df_copy.astype({"id_linha": "string"})
 
-		gdf = gpd.GeoDataFrame(data=df_copy, geometry=coluna, crs=init_crs).to_crs(target_crs)  # type: ignore
+		gdf = gpd.GeoDataFrame(data=df_copy, geometry=coluna, crs=crs_origem).to_crs(target_crs)  # type: ignore
 		return gdf
 
 	def carregar_cumprimento(self, df_cumprimento: pd.DataFrame) -> pd.DataFrame:
@@ -167,6 +305,24 @@ class CalcularIndicadores:
 			print("Erro ao carregar dados de frequência: ", error)
 			return pd.DataFrame()
 
+	def carregar_viagens(self, df_viagens: pd.DataFrame) -> tuple[pd.DataFrame, pd.DataFrame]:
+		"""
+		Carrega pontualidade e km executado por linha a partir do registro de viagens, numa única passagem.
+
+		Args:
+			df_viagens (pd.DataFrame): DataFrame contendo o registro de viagens (arquivo de pontualidade).
+
+		Returns:
+			tuple[pd.DataFrame, pd.DataFrame]: DataFrames de pontualidade e de cumprimento por linha.
+		"""
+		try:
+			if not modelos.validar_df_pontualidade(df_viagens):
+				raise
+			return finalizar_viagens(acumular_viagens(df_viagens))
+		except Exception as error:
+			print("Erro ao carregar dados de viagens: ", error)
+			return pd.DataFrame(), pd.DataFrame()
+
 	def carregar_pontualidade(self, df_pontualidade: pd.DataFrame) -> pd.DataFrame:
 		"""
 		Carrega os dados de pontualidade a partir de um DataFrame.
@@ -202,25 +358,8 @@ class CalcularIndicadores:
 		Calcula a pontuação para o indicador de pontualidade.
 		"""
 		try:
-			df_temp = df_pontualidade.copy()
-			df_temp["sentido"] = df_temp["sentido"].replace({"ida": "IDA", "volta": "VOLTA"})
-			df_temp = df_temp.drop("descricao_trajeto", axis=1)
-			df_temp = df_temp.replace("-", pd.NA)
-			df_temp["com_horario"] = df_temp[["chegada_planejada", "chegada_real", "partida_planejada", "partida_real"]].notna().any(axis=1)
-			df_temp = df_temp.groupby("id_linha")["com_horario"].value_counts(normalize=False).unstack(fill_value=0)
-			if True not in df_temp.columns:
-				df_temp[True] = 0
-			if False not in df_temp.columns:
-				df_temp[False] = 0
-			df_temp.columns = ["com_horario", "sem_horario"]
-			df_temp["pontualidade"] = df_temp["com_horario"] / (df_temp["sem_horario"] + df_temp["com_horario"])
-			df_temp = df_temp.drop(["com_horario", "sem_horario"], axis=1)
-
-			df_temp = df_temp.reset_index()
-
-			df_temp = df_temp.astype({"id_linha": "string", "pontualidade": "float64"})
-
-			return df_temp
+			pontualidade, _ = finalizar_viagens(acumular_viagens(df_pontualidade))
+			return pontualidade
 		except Exception as error:
 			print("Erro ao calcular pontualidade: ", error)
 			return pd.DataFrame()
@@ -234,57 +373,143 @@ class CalcularIndicadores:
 		Returns:
 			pd.DataFrame: DataFrame com o tempo médio de operação por rota.
 		"""
-		df_temp = df_frequencia.copy()
+		return finalizar_frequencia(acumular_frequencia(df_frequencia))
 
-		df_temp["horario_inicio_jornada"] = pd.to_datetime(df_temp["horario_inicio_jornada"], format="%H:%M:%S")
-		df_temp["horario_fim_jornada"] = pd.to_datetime(df_temp["horario_fim_jornada"], format="%H:%M:%S")
+	def merge_dados(self):
+		"""Combina todos os dados carregados em um único GeoDataFrame, com uma linha por linha de ônibus.
 
-		df_temp["frequencia_atendimento_pontuacao"] = df_temp["horario_fim_jornada"] - df_temp["horario_inicio_jornada"]
-		df_temp["frequencia_atendimento_pontuacao"] = df_temp["frequencia_atendimento_pontuacao"].apply(lambda x: int(x.total_seconds() / 60))
+		Cada tabela por linha é associada às linhas carregadas pelo código do seu `id_linha` na chave comum
+		(os identificadores de `dados_linhas`). As linhas presentes em todas as tabelas são selecionadas uma
+		única vez e cada tabela é alinhada por posição, sem junções encadeadas e sem copiar a geometria a
+		cada junção. As linhas descartadas por faltarem em alguma tabela ficam em `linhas_descartadas` e são informadas.
 
-		df_temp["data_jornada"] = pd.to_datetime(df_temp["data_jornada"], format="%d/%m/%Y")
+		Raises:
+			ValueError: Se houver mais de uma linha com o mesmo 'id_linha' em `dados_linhas`.
+		"""
+		self._verificar_linhas_unicas()
+		try:
+			if not isinstance(self.dados_linhas, gpd.GeoDataFrame):
+				raise ValueError("Os dados das linhas não foram carregados")
+			self.dados_linhas["distancia_km"] = self._calcular_distancia_km(self.dados_linhas)
+
+			coluna_geometria = self.dados_linhas.geometry.name
+			chaves = pd.Index(self.dados_linhas["id_linha"].astype(str))
+			tabelas = {
+				"cumprimento": self.cumprimento,
+				"frequencia": self.frequencia,
+				"pontualidade": self.pontualidade,
+				"dados_geograficos": self.dados_geograficos,
+			}
+			posicoes = {nome: self._posicoes_por_linha(tabela, chaves, nome) for nome, tabela in tabelas.items()}
+			self.linhas_descartadas = self._registrar_linhas_descartadas(posicoes, chaves)
+			mantidas = np.flatnonzero(np.logical_and.reduce([posicao >= 0 for posicao in posicoes.values()]))
+
+			partes = [pd.DataFrame(self.dados_linhas.drop(columns=coluna_geometria)).iloc[mantidas].reset_index(drop=True)]
+			for nome, tabela in tabelas.items():
+				partes.append(tabela.drop(columns="id_linha").iloc[posicoes[nome][mantidas]].reset_index(drop=True))
+			unidos = pd.concat(partes, axis=1)
+			unidos["id_linha"] = chaves[mantidas].to_numpy(dtype=object)
+			unidos[coluna_geometria] = self.dados_linhas.geometry.to_numpy()[mantidas]
+
+			colunas = list(self.dados_linhas.columns) + [coluna for coluna in unidos.columns if coluna not in self.dados_linhas.columns]
+			unidos = unidos[colunas]
+			unidos["cumprimento_itinerario"] = unidos["km_executado"].astype(float) / unidos["distancia_km"].astype(float)
+
+			self.dados_completos = gpd.GeoDataFrame(unidos, geometry=coluna_geometria, crs=self.dados_linhas.crs)
 
-		df_temp = df_temp.groupby(["id_linha"])["frequencia_atendimento_pontuacao"].mean().reset_index()
+		except Exception as e:
+			print(f"Erro ao mesclar os dados: {e}")
 
-		df_temp = df_temp.astype({"id_linha": "string", "frequencia_atendimento_pontuacao": "float64"})
+	def _verificar_linhas_unicas(self):
+		"""Garante que cada linha de `dados_linhas` tenha um 'id_linha' próprio, usado como chave da junção.
 
-		return df_temp
+		Raises:
+			ValueError: Se houver mais de uma linha com o mesmo 'id_linha', informando os identificadores repetidos.
+		"""
+		dados_linhas = getattr(self, "dados_linhas", None)
+		if not isinstance(dados_linhas, pd.DataFrame) or "id_linha" not in dados_linhas:
+			return
+		ids = dados_linhas["id_linha"].astype(str)
+		duplicados = ids[ids.duplicated()].unique().tolist()
+		if duplicados:
+			raise ValueError(f"Identificadores de linha duplicados: {duplicados}")
 
-	def merge_dados(self):
-		"""Combina todos os dados carregados em um único DataFrame."""
-		try:
-			if not isinstance(self.dados_linhas, gpd.GeoDataFrame):
-				raise
-			crs_original = self.dados_linhas.crs
+	def _posicoes_por_linha(self, tabela: pd.DataFrame, chaves: pd.Index, nome: str) -> np.ndarray:
+		"""Retorna, para cada linha de `chaves`, a posição do seu registro na tabela (-1 se ausente).
 
-			self.dados_linhas = self.dados_linhas.to_crs(epsg=31983)
+		Raises:
+			ValueError: Se a tabela tiver mais de um registro para a mesma linha.
+		"""
+		codigos = chaves.get_indexer(tabela["id_linha"].astype(str))
+		encontrados = codigos >= 0
+		if np.bincount(codigos[encontrados], minlength=len(chaves)).max(initial=0) > 1:
+			raise ValueError(f"A tabela {nome} possui mais de um registro para a mesma linha")
+
+		posicoes = np.full(len(chaves), -1, dtype=np.int64)
+		posicoes[codigos[encontrados]] = np.flatnonzero(encontrados)
+		return posicoes
+
+	def _registrar_linhas_descartadas(self, posicoes: dict[str, np.ndarray], chaves: pd.Index) -> dict[str, list[str]]:
+		"""Identifica, para cada tabela, as linhas ausentes que serão descartadas e as informa."""
+		descartadas = {}
+		for nome, posicao in posicoes.items():
+			ausentes = chaves[posicao < 0].tolist()
+			if ausentes:
+				descartadas[nome] = ausentes
+				print(f"Aviso: {len(ausentes)} linha(s) descartada(s) por não constarem em {nome}: {ausentes}")
+		return descartadas
+
+	def _calcular_distancia_km(self, dados_linhas: gpd.GeoDataFrame) -> pd.Series:
+		"""Calcula a extensão de cada linha, em km, medida no CRS projetado EPSG:31983.
+
+		A extensão vem do repositório de geometrias, que a calcula uma única vez; sem repositório (linhas
+		atribuídas diretamente), as geometrias de `dados_linhas` são medidas.
 
-			if not isinstance(self.dados_linhas, gpd.GeoDataFrame):
-				raise
+		Args:
+			dados_linhas (gpd.GeoDataFrame): GeoDataFrame das linhas, com CRS definido.
 
-			self.dados_linhas["distancia_km"] = self.dados_linhas.length / 1000
+		Returns:
+			pd.Series: Extensão de cada linha em km, com o mesmo índice de `dados_linhas`.
 
-			if not crs_original:
-				raise
+		Raises:
+			ValueError: Se o GeoDataFrame não tiver CRS definido.
+		"""
+		if not dados_linhas.crs:
+			raise ValueError("As linhas não possuem CRS definido")
+		geometrias = self.geometrias or RepositorioGeometrias.de_geodataframe(dados_linhas)
+		return pd.Series(geometrias.comprimento_km().reindex(dados_linhas["id_linha"].astype(str)).to_numpy(), index=dados_linhas.index)
 
-			self.dados_linhas = self.dados_linhas.to_crs(crs_original)
+	def calcular_painel_iqt(
+		self, acumuladores_diarios: pd.DataFrame, frequencia: str = "M", prioridades: Optional[np.ndarray] = None
+	) -> pd.DataFrame:
+		"""Calcula o IQT de cada linha em cada período (dia, semana, mês...) numa única avaliação do painel.
 
-			if not isinstance(self.dados_linhas, gpd.GeoDataFrame):
-				raise
+		Os indicadores operacionais são agrupados por (id_linha, periodo) a partir dos acumuladores diários,
+		enquanto os indicadores estáticos e geográficos das linhas já carregadas são reaproveitados em
+		todos os períodos.
 
-			self.dados_completos = pd.merge(self.dados_linhas, self.cumprimento, on=["id_linha"])
-			self.dados_completos = pd.merge(self.dados_completos, self.frequencia, on=["id_linha"])
-			self.dados_completos = pd.merge(self.dados_completos, self.pontualidade, on=["id_linha"])
-			self.dados_completos = pd.merge(self.dados_completos, self.dados_geograficos, on=["id_linha"])
+		Args:
+			acumuladores_diarios (pd.DataFrame): Acumuladores indexados por (data, id_linha), como os de
+				`unir_acumuladores` ou `EstadoOperacional.acumuladores`.
+			frequencia (str): Frequência do período no formato do pandas ('D', 'W', 'M', ...). Padrão: 'M'.
+			prioridades (np.ndarray | None): Vetor de pesos dos indicadores. Se None, usa `config.PRIORIDADE`.
+
+		Returns:
+			pd.DataFrame: Tabela longa com uma linha por (id_linha, periodo), as pontuações I1 a I10 e o IQT.
+		"""
+		chaves = ["id_linha", "periodo"]
+		frequencia_periodo, pontualidade, cumprimento = finalizar_operacional(agregar_por_periodo(acumuladores_diarios, frequencia))
+		painel = frequencia_periodo.merge(pontualidade, on=chaves).merge(cumprimento, on=chaves)
 
-			self.dados_completos["cumprimento_itinerario"] = self.dados_completos["km_executado"].astype(float) / self.dados_completos[
-				"distancia_km"
-			].astype(float)
+		linhas = pd.DataFrame(self.dados_linhas.drop(columns=[self.dados_linhas.geometry.name, "distancia_km"], errors="ignore"))
+		linhas["distancia_km"] = self._calcular_distancia_km(self.dados_linhas)
+		painel = painel.merge(linhas.merge(self.dados_geograficos, on="id_linha"), on="id_linha")
+		painel["cumprimento_itinerario"] = painel["km_executado"].astype(float) / painel["distancia_km"].astype(float)
 
-			self.dados_completos = gpd.GeoDataFrame(self.dados_completos)
+		classificacao = ClassificarIndicadores().classificar_linhas(painel)
+		painel["iqt"] = self.calcular_iqt_matriz(classificacao.iloc[:, 1:].to_numpy(dtype=np.float64), prioridades)
 
-		except Exception as e:
-			print(f"Erro ao mesclar os dados: {e}")
+		return self._formatar_matriz(painel, chaves)
 
 	def classificar_linha(self):
 		"""Classifica as linhas de acordo com os indicadores calculados."""
@@ -302,37 +527,51 @@ class CalcularIndicadores:
 			float: Valor do IQT calculado.
 		"""
 		try:
-			prioridades = config.PRIORIDADE
-			soma_ponderada = np.dot(linha, prioridades)
-
-			desvio_padrao_prioridades = np.std(prioridades)
-
-			iqt = soma_ponderada / (desvio_padrao_prioridades * len(prioridades))
+			iqt = self.calcular_iqt_matriz(np.atleast_2d(np.asarray(linha, dtype=np.float64)))[0]
 			return iqt
 		except Exception as e:
 			print(f"Erro ao calcular IQT: {e}")
 			return 0.0
 
-	def processar_iqt(self):
-		"""Processa o cálculo do IQT para todas as linhas classificadas."""
-		valores_iqt, cores = [], []
-		for _, row in self.classificao_linhas.iterrows():
-			valores_indicadores = row.iloc[1:].tolist()
+	def calcular_iqt_matriz(self, pontuacoes: np.ndarray | pd.DataFrame, prioridades: Optional[np.ndarray] = None) -> np.ndarray:
+		"""Calcula o IQT de várias linhas de uma só vez, como um produto matriz de pontuações × vetor de pesos.
+
+		Args:
+			pontuacoes (np.ndarray | pd.DataFrame): Matriz (linhas × indicadores) com as pontuações I1 a I10.
+			prioridades (np.ndarray | None): Pesos dos indicadores. Um vetor (indicadores,) ou uma matriz
+				(indicadores × esquemas) para avaliar vários esquemas de ponderação na mesma chamada.
+				Se None, usa `config.PRIORIDADE`.
+
+		Returns:
+			np.ndarray: IQT de cada linha, com formato (linhas,) ou (linhas × esquemas).
+		"""
+		pesos = np.asarray(config.PRIORIDADE if prioridades is None else prioridades, dtype=np.float64)
+		matriz = np.asarray(pontuacoes, dtype=np.float64)
+
+		normalizacao = np.std(pesos, axis=0) * pesos.shape[0]
+		return (matriz @ pesos) / normalizacao
+
+	def processar_iqt(self, prioridades: Optional[np.ndarray] = None):
+		"""Processa o cálculo do IQT e da cor para todas as linhas classificadas de uma só vez.
+
+		Args:
+			prioridades (np.ndarray | None): Vetor de pesos dos indicadores. Se None, usa `config.PRIORIDADE`.
+		"""
+		pontuacoes = self.classificao_linhas.iloc[:, 1:].to_numpy(dtype=np.float64)
+		valores_iqt = self.calcular_iqt_matriz(pontuacoes, prioridades)
 
-			iqt = self.calcular_iqt(valores_indicadores)
-			cor = cor_iqt(iqt)
-			valores_iqt.append(iqt)
-			cores.append(cor)
 		self.dados_completos["iqt"] = valores_iqt
-		self.dados_completos["cor"] = cores
+		self.dados_completos["cor"] = cores_iqt(valores_iqt)
 		self._gerar_matriz()
 
 	def _gerar_matriz(self):
-		df_matriz = self.dados_completos.drop(columns=["geometria_linha"])
+		self.matriz = self._formatar_matriz(self.dados_completos.drop(columns=["geometria_linha"]), ["id_linha"])
 
+	def _formatar_matriz(self, df: pd.DataFrame, chaves: list[str]) -> pd.DataFrame:
+		"""Renomeia os indicadores para a nomenclatura I1 a I10 e mantém apenas as chaves, os indicadores e o IQT."""
 		mapeamento = dict(zip(config.INDICADOR, config.NOMECLATURA))
 
-		df_matriz = df_matriz.rename(columns=mapeamento)
+		df_matriz = df.rename(columns=mapeamento)
 
-		colunas_para_manter = ["id_linha"] + list(mapeamento.values()) + ["iqt"]
-		self.matriz = df_matriz[colunas_para_manter]
+		colunas_para_manter = chaves + list(mapeamento.values()) + ["iqt"]
+		return df_matriz[colunas_para_manter]
@@ -1,5 +1,57 @@
+import numpy as np
 import pandas as pd
 
+from ..utils.cores import FAIXAS_IQT
+
+# Tabela declarativa de regras dos indicadores I1 a I10.
+#
+# Regras numéricas usam "faixas": tuplas (mínimo, máximo, inclui_mínimo, inclui_máximo, pontuação) avaliadas
+# em ordem, de modo que a primeira faixa que contém o valor define a pontuação. Regras categóricas usam
+# "categorias": um mapeamento de descrição para pontuação. Valores que não se encaixam recebem 0.
+TABELA_REGRAS: dict[str, dict] = {
+	"I1": {
+		"coluna": "indicador_via_pavimentada",
+		"faixas": [(1.0, np.inf, True, True, 3), (0.95, 0.99, True, False, 2), (0.85, 0.95, True, False, 1)],
+	},
+	"I2": {"coluna": "distancia", "faixas": [(-np.inf, 100, True, True, 3), (100, 200, True, False, 2), (200, 400, True, False, 1)]},
+	"I3": {
+		"coluna": "tipo_integracao",
+		"remover_espacos": True,
+		"categorias": {
+			"Sistema de transporte público totalmente integrado com terminais com o uso de bilhete eletrônico para integração intra e intermodal": 3,
+			"Sistema de transporte público totalmente integrado com terminais com o uso de bilhete eletrônico para integração intramodal somente": 2,
+			"Integração tarifária temporal ocorre em determinados pontos, apenas com transferências intramodais": 1,
+		},
+	},
+	"I4": {"coluna": "pontualidade", "faixas": [(0.95, np.inf, True, True, 3), (0.90, 0.95, True, False, 2), (0.80, 0.90, True, False, 1)]},
+	"I5": {
+		"coluna": "frequencia_atendimento_pontuacao",
+		"faixas": [(-np.inf, 10, True, True, 3), (-np.inf, 15, True, True, 2), (15, 30, False, True, 1)],
+	},
+	"I6": {"coluna": "cumprimento_itinerario", "faixas": [(1.0, np.inf, True, True, 3), (0.8, 0.9, True, True, 2), (0.5, 0.7, True, True, 1)]},
+	"I7": {"coluna": "proporcao", "faixas": [(1.0, 1.0, True, True, 3), (0.95, 0.99, False, True, 2), (0.85, 0.95, False, True, 1)]},
+	"I8": {
+		"coluna": "indicador_treinamento_motorista",
+		"faixas": [(1.0, np.inf, True, True, 3), (0.95, 0.98, True, True, 2), (0.90, 0.95, True, True, 1)],
+	},
+	"I9": {
+		"coluna": "disponibilidade_informacao",
+		"remover_espacos": True,
+		"categorias": {
+			"Possuir informações em site e aplicativo atualizados": 3,
+			"Possuir informações em site parcialmente atualizado": 2,
+			"Possuir informação em site desatualizado": 1,
+		},
+	},
+	"I10": {
+		"coluna": "valor_tarifa",
+		"categorias": {"Não houve aumento da tarifa": 3, "Aumento inferior ao índice": 2, "Aumento equivalente ao índice": 1},
+	},
+}
+
+# Nomes das classes do IQT, da pior para a melhor, correspondentes às faixas de `FAIXAS_IQT`.
+CLASSES_IQT = ["Insuficiente", "Suficiente", "Bom", "Excelente"]
+
 
 class ClassificarIndicadores:
 	"""
@@ -167,6 +219,22 @@ class ClassificarIndicadores:
 		else:
 			return "Insuficiente"
 
+	def classificacao_iqt_indices(self, iqts: np.ndarray) -> np.ndarray:
+		"""
+		Classifica, de forma vetorizada, valores de IQT de qualquer formato.
+
+		Equivalente a `classificacao_iqt_pontuacao` elemento a elemento, mas retorna o índice da classe
+		em `CLASSES_IQT` (0 = Insuficiente, ..., 3 = Excelente). Valores ausentes são classificados como Insuficiente.
+
+		Args:
+			iqts (np.ndarray): Valores do IQT.
+
+		Returns:
+			np.ndarray: Índices das classes, com o mesmo formato de `iqts`.
+		"""
+		valores = np.asarray(iqts, dtype=np.float64)
+		return np.where(np.isnan(valores), 0, np.digitize(valores, FAIXAS_IQT))
+
 	def _cumprimento_itinerarios_pontuacao(self, etinerario: float) -> int:
 		"""
 		Calcula a pontuação para o indicador de cumprimento de etinerários.
@@ -228,25 +296,56 @@ class ClassificarIndicadores:
 		"""
 		Classifica as linhas de transporte público com base nos indicadores avaliados.
 
+		As regras de `TABELA_REGRAS` são aplicadas coluna a coluna, de forma vetorizada, o que permite
+		classificar painéis com milhões de linhas (por exemplo, linha × dia ou linha × mês).
+
 		Args:
 			dados_linhas (pd.DataFrame): DataFrame contendo os dados das linhas e seus indicadores.
 
 		Returns:
 			pd.DataFrame: DataFrame contendo as classificações de cada linha.
 		"""
-		classificacao = {"id_linha": [], "I1": [], "I2": [], "I3": [], "I4": [], "I5": [], "I6": [], "I7": [], "I8": [], "I9": [], "I10": []}
-
-		for _, linha in dados_linhas.iterrows():
-			classificacao["id_linha"].append(linha["id_linha"])
-			classificacao["I1"].append(self._porcentagem_vias_pavimentadas_pontuacao(linha["indicador_via_pavimentada"]))
-			classificacao["I2"].append(self._distancia_pontos_pontuacao(linha["distancia"]))
-			classificacao["I3"].append(self._integracao_municipal_pontuacao(linha["tipo_integracao"]))
-			classificacao["I4"].append(self._pontualidade_pontuacao(linha["pontualidade"]))
-			classificacao["I5"].append(self._frequencia_atendimento_pontuacao(linha["frequencia_atendimento_pontuacao"]))
-			classificacao["I6"].append(self._cumprimento_itinerarios_pontuacao(linha["cumprimento_itinerario"]))
-			classificacao["I7"].append(self._abrangencia_rede_pontuacao(linha["proporcao"]))
-			classificacao["I8"].append(self._treinamento_capacitacao_pontuacao(linha["indicador_treinamento_motorista"]))
-			classificacao["I9"].append(self._informacao_internet_pontuacao(linha["disponibilidade_informacao"].strip()))
-			classificacao["I10"].append(self._valor_tarifa_pontuacao(linha["valor_tarifa"]))
+		classificacao = {"id_linha": dados_linhas["id_linha"].to_numpy()}
+
+		for indicador, regra in TABELA_REGRAS.items():
+			classificacao[indicador] = self._aplicar_regra(dados_linhas[regra["coluna"]], regra)
 
 		return pd.DataFrame(classificacao)
+
+	def _aplicar_regra(self, valores: pd.Series, regra: dict) -> np.ndarray:
+		"""
+		Aplica uma regra da tabela `TABELA_REGRAS` a uma coluna inteira de indicadores.
+
+		Args:
+			valores (pd.Series): Valores do indicador para todas as linhas.
+			regra (dict): Regra com "faixas" (indicadores numéricos) ou "categorias" (indicadores descritivos).
+
+		Returns:
+			np.ndarray: Pontuação de cada valor.
+		"""
+		if "categorias" in regra:
+			return self._pontuar_categorias(valores, regra["categorias"], regra.get("remover_espacos", False))
+		return self._pontuar_faixas(valores, regra["faixas"])
+
+	def _pontuar_faixas(self, valores: pd.Series, faixas: list[tuple[float, float, bool, bool, int]]) -> np.ndarray:
+		"""Pontua valores numéricos pela primeira faixa que os contém; valores fora das faixas recebem 0."""
+		numeros = pd.to_numeric(valores, errors="coerce").to_numpy(dtype=np.float64, na_value=np.nan)
+
+		condicoes = []
+		for minimo, maximo, inclui_minimo, inclui_maximo, _ in faixas:
+			acima = numeros >= minimo if inclui_minimo else numeros > minimo
+			abaixo = numeros <= maximo if inclui_maximo else numeros < maximo
+			condicoes.append(acima & abaixo)
+
+		return np.select(condicoes, [faixa[-1] for faixa in faixas], default=0)
+
+	def _pontuar_categorias(self, valores: pd.Series, categorias: dict[str, int], remover_espacos: bool) -> np.ndarray:
+		"""Pontua valores descritivos consultando o mapeamento uma vez por categoria distinta, e não por linha."""
+		categorico = pd.Categorical(valores)
+
+		nomes = categorico.categories.astype(str)
+		if remover_espacos:
+			nomes = nomes.str.strip()
+
+		pontuacoes = np.array([categorias.get(nome, 0) for nome in nomes] + [0], dtype=np.int64)
+		return pontuacoes[categorico.codes]
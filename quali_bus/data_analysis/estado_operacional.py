@@ -0,0 +1,109 @@
+from pathlib import Path
+from typing import Optional
+
+import pandas as pd
+
+from .agregacao import (
+	COLUNAS_CHAVE_DIARIA,
+	acumular_frequencia_diaria,
+	acumular_viagens_diarias,
+	combinar_acumuladores,
+	finalizar_operacional,
+	unir_acumuladores,
+)
+
+
+class EstadoOperacional:
+	"""
+	Estado agregado dos registros operacionais, por dia e por linha, mantido numa janela móvel de dias.
+
+	Em vez de reprocessar todo o histórico, cada novo dia é reduzido aos acumuladores somáveis de
+	`agregacao` e somado ao estado, que é persistido num pequeno arquivo CSV. Os indicadores de
+	frequência, pontualidade e cumprimento da janela são obtidos somando os dias por linha.
+	"""
+
+	def __init__(self, acumuladores: Optional[pd.DataFrame] = None, janela_dias: int = 30):
+		"""
+		Inicializa o estado.
+
+		Args:
+			acumuladores (pd.DataFrame | None): Acumuladores indexados por (data, id_linha). Se None, o estado começa vazio.
+			janela_dias (int): Quantidade de dias mantidos no estado, contados a partir do dia mais recente.
+		"""
+		self.janela_dias = janela_dias
+		self.acumuladores = acumuladores if acumuladores is not None else pd.DataFrame()
+		self.remover_expirados()
+
+	@classmethod
+	def carregar(cls, caminho: str | Path, janela_dias: int = 30) -> "EstadoOperacional":
+		"""
+		Carrega o estado de um arquivo CSV. Se o arquivo não existir, retorna um estado vazio.
+
+		Args:
+			caminho (str | Path): Caminho do arquivo de estado.
+			janela_dias (int): Quantidade de dias mantidos no estado.
+
+		Returns:
+			EstadoOperacional: Estado carregado.
+		"""
+		if not Path(caminho).exists():
+			print(f"Arquivo de estado {caminho} não encontrado. Iniciando estado vazio.")
+			return cls(janela_dias=janela_dias)
+
+		df_estado = pd.read_csv(caminho, dtype={"id_linha": str}, parse_dates=["data"])
+		return cls(df_estado.set_index(COLUNAS_CHAVE_DIARIA), janela_dias)
+
+	def salvar(self, caminho: str | Path):
+		"""
+		Salva o estado num arquivo CSV.
+
+		Args:
+			caminho (str | Path): Caminho do arquivo de estado.
+		"""
+		self.acumuladores.reset_index().to_csv(caminho, index=False, date_format="%Y-%m-%d")
+
+	@property
+	def dias(self) -> list[pd.Timestamp]:
+		"""Dias presentes no estado, em ordem crescente."""
+		if self.acumuladores.empty:
+			return []
+		return sorted(self.acumuladores.index.unique(level="data"))
+
+	def adicionar_dia(self, df_frequencia: pd.DataFrame, df_viagens: pd.DataFrame):
+		"""
+		Acrescenta ao estado os registros de um ou mais dias e remove os dias fora da janela.
+
+		Dias que já existem no estado são substituídos, de modo que reprocessar um dia não o conta duas vezes.
+
+		Args:
+			df_frequencia (pd.DataFrame): Registro de jornadas do(s) novo(s) dia(s).
+			df_viagens (pd.DataFrame): Registro de viagens do(s) novo(s) dia(s).
+		"""
+		novos = unir_acumuladores(acumular_frequencia_diaria(df_frequencia), acumular_viagens_diarias(df_viagens))
+
+		anteriores = self.acumuladores
+		if not anteriores.empty:
+			anteriores = anteriores[~anteriores.index.get_level_values("data").isin(novos.index.unique(level="data"))]
+
+		self.acumuladores = combinar_acumuladores([anteriores, novos])
+		self.remover_expirados()
+
+	def remover_expirados(self):
+		"""Remove do estado os dias anteriores à janela, contada a partir do dia mais recente."""
+		if self.acumuladores.empty:
+			return
+		datas = self.acumuladores.index.get_level_values("data")
+		limite = datas.max() - pd.Timedelta(days=self.janela_dias - 1)
+		self.acumuladores = self.acumuladores[datas >= limite]
+
+	def indicadores(self) -> tuple[pd.DataFrame, pd.DataFrame, pd.DataFrame]:
+		"""
+		Calcula os indicadores operacionais da janela a partir do estado.
+
+		Returns:
+			tuple[pd.DataFrame, pd.DataFrame, pd.DataFrame]: DataFrames de frequência, pontualidade e cumprimento,
+				no mesmo formato de `CalcularIndicadores.carregar_dados`.
+		"""
+		if self.acumuladores.empty:
+			return pd.DataFrame(), pd.DataFrame(), pd.DataFrame()
+		return finalizar_operacional(self.acumuladores.groupby(level="id_linha", sort=True).sum())
@@ -0,0 +1,247 @@
+from typing import Iterator, Optional
+
+import numpy as np
+import pandas as pd
+
+from ..utils.config import config
+from .calcular_indicadores import CalcularIndicadores
+from .classificar_indicadores import CLASSES_IQT, ClassificarIndicadores
+
+DISTRIBUICOES_PESOS = ("dirichlet", "lognormal")
+
+
+class AnaliseSensibilidade:
+	"""
+	Análise de sensibilidade do IQT à incerteza dos pesos dos indicadores (`config.PRIORIDADE`).
+
+	Os pesos são sorteados em torno dos pesos de referência e o IQT de todas as linhas é avaliado
+	para cada amostra como um produto de matrizes (linhas × indicadores) @ (indicadores × amostras),
+	processado em blocos de tamanho fixo. Por amostra são acumuladas a classe e a posição de cada linha,
+	e ao final são calculados os quantis do IQT, a probabilidade de mudança de classe em relação aos
+	pesos de referência e a estabilidade da posição no ranking.
+
+	Attributes:
+		id_linhas (np.ndarray): Identificadores das linhas avaliadas.
+		pontuacoes (np.ndarray): Matriz (linhas × indicadores) com as pontuações I1 a I10.
+		prioridades (np.ndarray): Pesos de referência dos indicadores.
+		distribuicao (str): 'dirichlet' ou 'lognormal'.
+		concentracao (float): Concentração da distribuição de Dirichlet; quanto maior, menor a dispersão dos pesos.
+		sigma (float): Desvio padrão do logaritmo do fator multiplicativo na distribuição lognormal.
+	"""
+
+	def __init__(
+		self,
+		classificacao: pd.DataFrame,
+		prioridades: Optional[np.ndarray] = None,
+		distribuicao: str = "dirichlet",
+		concentracao: float = 200.0,
+		sigma: float = 0.2,
+		semente: Optional[int] = None,
+	):
+		"""
+		Inicializa a análise com as pontuações das linhas.
+
+		Args:
+			classificacao (pd.DataFrame): Pontuações com 'id_linha' e as colunas I1 a I10, no formato de
+				`CalcularIndicadores.classificao_linhas`.
+			prioridades (np.ndarray | None): Pesos de referência. Se None, usa `config.PRIORIDADE`.
+			distribuicao (str): Distribuição de amostragem dos pesos: 'dirichlet' (média igual aos pesos de referência)
+				ou 'lognormal' (cada peso multiplicado por um fator lognormal e renormalizado).
+			concentracao (float): Concentração da distribuição de Dirichlet.
+			sigma (float): Desvio padrão do logaritmo do fator da distribuição lognormal.
+			semente (int | None): Semente do gerador de números aleatórios, para resultados reprodutíveis.
+
+		Raises:
+			ValueError: Se a distribuição for desconhecida ou a quantidade de pesos não corresponder aos indicadores.
+		"""
+		if distribuicao not in DISTRIBUICOES_PESOS:
+			raise ValueError(f"distribuição de pesos desconhecida: {distribuicao}. Use uma de {DISTRIBUICOES_PESOS}.")
+
+		self.id_linhas = classificacao["id_linha"].to_numpy()
+		self.pontuacoes = classificacao[config.NOMECLATURA].to_numpy(dtype=np.float64)
+		self.prioridades = np.asarray(config.PRIORIDADE if prioridades is None else prioridades, dtype=np.float64)
+		if self.prioridades.shape != (len(config.NOMECLATURA),):
+			raise ValueError(f"são esperados {len(config.NOMECLATURA)} pesos, mas foram informados {self.prioridades.size}.")
+
+		self.distribuicao = distribuicao
+		self.concentracao = concentracao
+		self.sigma = sigma
+		self._gerador = np.random.default_rng(semente)
+		self._calculadora = CalcularIndicadores()
+		self._classificador = ClassificarIndicadores()
+
+	def amostrar_pesos(self, n_amostras: int) -> np.ndarray:
+		"""
+		Sorteia esquemas de ponderação em torno dos pesos de referência, mantendo a mesma soma.
+
+		Args:
+			n_amostras (int): Quantidade de esquemas.
+
+		Returns:
+			np.ndarray: Matriz (indicadores × amostras) de pesos.
+		"""
+		total = self.prioridades.sum()
+		if self.distribuicao == "dirichlet":
+			amostras = self._gerador.dirichlet(self.concentracao * self.prioridades / total, size=n_amostras)
+		else:
+			fatores = self._gerador.lognormal(mean=0.0, sigma=self.sigma, size=(n_amostras, self.prioridades.size))
+			amostras = self.prioridades * fatores
+			amostras /= amostras.sum(axis=1, keepdims=True)
+		return (amostras * total).T
+
+	def _blocos_pesos(self, n_amostras: int, tamanho_bloco: int) -> Iterator[np.ndarray]:
+		"""Gera os pesos sorteados em blocos de até `tamanho_bloco` amostras."""
+		for inicio in range(0, n_amostras, tamanho_bloco):
+			yield self.amostrar_pesos(min(tamanho_bloco, n_amostras - inicio))
+
+	def _posicoes(self, iqts: np.ndarray) -> np.ndarray:
+		"""Posição de cada linha no ranking de cada amostra (1 = maior IQT)."""
+		ordem = np.argsort(-iqts, axis=0, kind="stable")
+		posicoes = np.empty_like(ordem)
+		np.put_along_axis(posicoes, ordem, np.arange(1, iqts.shape[0] + 1)[:, None], axis=0)
+		return posicoes
+
+	def executar(
+		self,
+		n_amostras: int = 10_000,
+		tamanho_bloco: int = 2_000,
+		quantis: tuple[float, ...] = (0.05, 0.5, 0.95),
+		n_faixas: int = 1_000,
+		guardar_amostras: bool = False,
+	) -> pd.DataFrame:
+		"""
+		Executa a simulação de Monte Carlo sobre os pesos.
+
+		Cada bloco de IQTs é reduzido, e descartado em seguida, a contagens de classes, somas de IQT e de
+		posições e a um histograma por linha com `n_faixas` faixas, de modo que a memória não cresce com
+		`n_amostras`. As faixas cobrem o dobro da amplitude observada no primeiro bloco, mais uma faixa
+		abaixo e outra acima para os valores que escaparem dela; os quantis são interpolados dentro da
+		faixa em que caem, com erro da ordem da largura da faixa. Com `guardar_amostras=True`, os IQTs
+		são guardados em float32 (linhas × amostras) e os quantis são exatos.
+
+		Args:
+			n_amostras (int): Quantidade de esquemas de ponderação sorteados.
+			tamanho_bloco (int): Quantidade de esquemas avaliados por produto de matrizes.
+			quantis (tuple[float, ...]): Quantis do IQT a calcular, entre 0 e 1.
+			n_faixas (int): Quantidade de faixas do histograma de cada linha usado para estimar os quantis.
+			guardar_amostras (bool): Se True, guarda todos os IQTs sorteados para o cálculo exato dos quantis.
+
+		Returns:
+			pd.DataFrame: Uma linha por linha de ônibus com 'id_linha', 'iqt_base', 'classe_base', 'iqt_media',
+				os quantis ('iqt_q05', 'iqt_q50', ...), 'prob_mudanca_classe', a probabilidade de cada classe
+				('prob_Insuficiente', ...), 'posicao_base', 'posicao_media', 'posicao_melhor' e 'posicao_pior'.
+		"""
+		n_linhas = self.pontuacoes.shape[0]
+		iqt_base = self.calcular_iqt(self.prioridades[:, None])[:, 0]
+		classe_base = self._classificador.classificacao_iqt_indices(iqt_base)
+		posicao_base = self._posicoes(iqt_base[:, None])[:, 0]
+
+		iqts = np.empty((n_linhas, n_amostras), dtype=np.float32) if guardar_amostras else None
+		histograma = None
+		soma_iqts = np.zeros(n_linhas, dtype=np.float64)
+		contagem_classes = np.zeros((n_linhas, len(CLASSES_IQT)), dtype=np.int64)
+		soma_posicoes = np.zeros(n_linhas, dtype=np.int64)
+		melhor_posicao = np.full(n_linhas, n_linhas, dtype=np.int64)
+		pior_posicao = np.ones(n_linhas, dtype=np.int64)
+
+		inicio = 0
+		for pesos in self._blocos_pesos(n_amostras, tamanho_bloco):
+			bloco = self.calcular_iqt(pesos)
+			fim = inicio + bloco.shape[1]
+			soma_iqts += bloco.sum(axis=1)
+			if iqts is not None:
+				iqts[:, inicio:fim] = bloco
+			else:
+				if histograma is None:
+					histograma = _HistogramaLinhas(bloco, n_faixas)
+				histograma.acumular(bloco)
+
+			classes = self._classificador.classificacao_iqt_indices(bloco)
+			for indice in range(len(CLASSES_IQT)):
+				contagem_classes[:, indice] += (classes == indice).sum(axis=1)
+
+			posicoes = self._posicoes(bloco)
+			soma_posicoes += posicoes.sum(axis=1)
+			np.minimum(melhor_posicao, posicoes.min(axis=1), out=melhor_posicao)
+			np.maximum(pior_posicao, posicoes.max(axis=1), out=pior_posicao)
+			inicio = fim
+
+		resultado = {
+			"id_linha": self.id_linhas,
+			"iqt_base": iqt_base,
+			"classe_base": np.asarray(CLASSES_IQT, dtype=object)[classe_base],
+			"iqt_media": soma_iqts / n_amostras,
+		}
+		valores_quantis = np.quantile(iqts, quantis, axis=1) if iqts is not None else histograma.quantis(quantis)
+		for quantil, valores in zip(quantis, valores_quantis, strict=True):
+			resultado[f"iqt_q{round(quantil * 100):02d}"] = valores.astype(np.float64)
+
+		probabilidades = contagem_classes / n_amostras
+		resultado["prob_mudanca_classe"] = 1.0 - probabilidades[np.arange(n_linhas), classe_base]
+		for indice, classe in enumerate(CLASSES_IQT):
+			resultado[f"prob_{classe}"] = probabilidades[:, indice]
+
+		resultado["posicao_base"] = posicao_base
+		resultado["posicao_media"] = soma_posicoes / n_amostras
+		resultado["posicao_melhor"] = melhor_posicao
+		resultado["posicao_pior"] = pior_posicao
+		return pd.DataFrame(resultado)
+
+	def calcular_iqt(self, pesos: np.ndarray) -> np.ndarray:
+		"""
+		Calcula o IQT de todas as linhas para um bloco de esquemas de ponderação.
+
+		Args:
+			pesos (np.ndarray): Matriz (indicadores × esquemas) de pesos.
+
+		Returns:
+			np.ndarray: Matriz (linhas × esquemas) de IQT.
+		"""
+		return self._calculadora.calcular_iqt_matriz(self.pontuacoes, pesos)
+
+
+class _HistogramaLinhas:
+	"""Histograma de faixas fixas por linha, acumulado bloco a bloco, para estimar quantis com memória constante."""
+
+	def __init__(self, primeiro_bloco: np.ndarray, n_faixas: int):
+		"""Define as faixas de cada linha a partir da amplitude do primeiro bloco (linhas × amostras)."""
+		minimo, maximo = primeiro_bloco.min(axis=1), primeiro_bloco.max(axis=1)
+		amplitude = np.maximum(maximo - minimo, np.finfo(np.float64).eps * np.maximum(np.abs(maximo), 1.0))
+		self.n_faixas = n_faixas
+		self.inicio = minimo - amplitude / 2
+		self.largura = 2 * amplitude / n_faixas
+		# Faixa 0: abaixo de `inicio`; faixas 1 a n_faixas: intervalo coberto; faixa n_faixas + 1: acima dele.
+		self.contagens = np.zeros((primeiro_bloco.shape[0], n_faixas + 2), dtype=np.int64)
+		self.minimo = np.full(primeiro_bloco.shape[0], np.inf)
+		self.maximo = np.full(primeiro_bloco.shape[0], -np.inf)
+
+	def acumular(self, bloco: np.ndarray):
+		"""Soma as amostras de um bloco (linhas × amostras) ao histograma de cada linha."""
+		faixas = np.floor((bloco - self.inicio[:, None]) / self.largura[:, None])
+		faixas = np.clip(faixas, -1, self.n_faixas).astype(np.int64) + 1
+		deslocamentos = np.arange(bloco.shape[0])[:, None] * (self.n_faixas + 2)
+		self.contagens += np.bincount((faixas + deslocamentos).ravel(), minlength=self.contagens.size).reshape(self.contagens.shape)
+		np.minimum(self.minimo, bloco.min(axis=1), out=self.minimo)
+		np.maximum(self.maximo, bloco.max(axis=1), out=self.maximo)
+
+	def quantis(self, quantis: tuple[float, ...]) -> np.ndarray:
+		"""Estima os quantis (quantis × linhas), distribuindo uniformemente as amostras de cada faixa."""
+		linhas = np.arange(self.contagens.shape[0])
+		bordas = self.inicio[:, None] + self.largura[:, None] * np.arange(self.n_faixas + 1)
+		esquerdas = np.column_stack([np.minimum(self.minimo, self.inicio), bordas])
+		larguras = np.column_stack([
+			self.inicio - esquerdas[:, 0],
+			np.broadcast_to(self.largura[:, None], bordas[:, 1:].shape),
+			self.maximo - bordas[:, -1],
+		])
+		acumuladas = self.contagens.cumsum(axis=1)
+		total = acumuladas[:, -1]
+
+		resultado = np.empty((len(quantis), len(linhas)))
+		for indice, quantil in enumerate(quantis):
+			posicao = quantil * (total - 1)
+			faixa = (acumuladas > posicao[:, None]).argmax(axis=1)
+			anteriores = acumuladas[linhas, faixa] - self.contagens[linhas, faixa]
+			fracao = (posicao - anteriores + 0.5) / self.contagens[linhas, faixa]
+			resultado[indice] = esquerdas[linhas, faixa] + fracao * np.maximum(larguras[linhas, faixa], 0.0)
+		return np.clip(resultado, self.minimo, self.maximo)
@@ -1,8 +1,24 @@
+from pathlib import Path
+from typing import Callable
+
 import geopandas as gpd
 import pandas as pd
 
-from .data_analysis import CalcularIndicadores
-from .map_tools import MapaIQT
+from .data_analysis import (
+	AnaliseSensibilidade,
+	CalcularIndicadores,
+	EstadoOperacional,
+	acumular_em_blocos,
+	acumular_frequencia_diaria,
+	acumular_viagens_diarias,
+	unir_acumuladores,
+)
+from .data_analysis.classificar_indicadores import TABELA_REGRAS
+from .map_tools import ExportadorTilesVetoriais, MapaIQT
+from .utils import Associador, modelos
+from .utils.cache import CacheEtapas
+from .utils.config import config
+from .utils.tabelas import ler_tabela, ler_tabela_em_blocos
 from .visualization import VisualizacaoBairros
 
 
@@ -11,7 +27,15 @@ class QualiBus:
 	Classe Facade para orquestrar a análise de qualidade do transporte público usando a biblioteca QualiBus.
 	"""
 
-	def __init__(self, shapefile_path, initial_crs=31983, target_crs=4326):
+	def __init__(
+		self,
+		shapefile_path,
+		initial_crs=31983,
+		target_crs=4326,
+		diretorio_cache=None,
+		limite_cache_mb: float = 512,
+		zoom_detalhe_mapas: float | None = None,
+	):
 		"""
 		Inicializa a análise, carregando o shapefile dos limites da cidade.
 
@@ -19,13 +43,21 @@ class QualiBus:
 			shapefile_path (str): Caminho para o shapefile dos limites.
 			initial_crs (int): CRS original do shapefile.
 			target_crs (int): CRS para o qual o shapefile será convertido (geralmente WGS84).
+			diretorio_cache (str | None): Se informado, os resultados das etapas (shapefile, dados operacionais,
+				associações e IQT) são guardados neste diretório e reaproveitados enquanto as entradas e os
+				parâmetros não mudarem.
+			limite_cache_mb (float): Tamanho máximo do cache em disco; os resultados menos usados são removidos primeiro.
+			zoom_detalhe_mapas (float | None): Se informado, os bairros e as rotas dos mapas interativos são simplificados
+				para esse nível de zoom (ver `MapaIQT`).
 		"""
 		print("Inicializando QualiBus...")
+		self._cache = CacheEtapas(diretorio_cache, limite_cache_mb) if diretorio_cache is not None else None
+		self._chaves_etapas: dict[str, str | None] = {}
 		self.gdf_city = self._carregar_shapefile(shapefile_path, initial_crs, target_crs)
 
 		# Instancia os componentes internos
 		self._indicadores = CalcularIndicadores()
-		self._map_routes = MapaIQT(self.gdf_city)
+		self._map_routes = MapaIQT(self.gdf_city, zoom_detalhe=zoom_detalhe_mapas)
 		self._visualizacao_bairros = VisualizacaoBairros()
 
 		# Estado interno
@@ -36,7 +68,16 @@ class QualiBus:
 		print("Componentes internos inicializados.")
 
 	def _carregar_shapefile(self, path: str, initial_crs=31983, target_crs=4326):
-		"""Carrega um shapefile, define o CRS inicial e converte para o alvo."""
+		"""Carrega um shapefile (do cache, se disponível), define o CRS inicial e converte para o alvo."""
+		if self._cache is None:
+			return self._ler_shapefile(path, initial_crs, target_crs)
+
+		arquivos = sorted(Path(path).parent.glob(f"{Path(path).stem}.*"))
+		chave = self._cache.chave("cidade", arquivos, initial_crs, target_crs)
+		return self._cache.obter_ou_calcular("cidade", chave, lambda: self._ler_shapefile(path, initial_crs, target_crs))
+
+	def _ler_shapefile(self, path: str, initial_crs=31983, target_crs=4326):
+		"""Lê um shapefile, define o CRS inicial e converte para o alvo."""
 		try:
 			gdf = gpd.read_file(path)
 			gdf = gdf.set_crs(epsg=initial_crs)
@@ -46,10 +87,10 @@ class QualiBus:
 			print(f"Erro ao carregar shapefile '{path}': {e}")
 			raise
 
-	def _carregar_csv(self, path: str, **kwargs):
-		"""Carrega um arquivo CSV."""
+	def _carregar_tabela(self, path: str, colunas: list[str] | None = None, **kwargs):
+		"""Carrega um arquivo CSV, Parquet/GeoParquet ou Arrow IPC, lendo apenas as colunas informadas."""
 		try:
-			return pd.read_csv(path, **kwargs)
+			return ler_tabela(path, colunas, **kwargs)
 		except FileNotFoundError:
 			print(f"Erro: Arquivo não encontrado em {path}")
 			raise
@@ -57,49 +98,190 @@ class QualiBus:
 			print(f"Erro ao ler {path}: {e}")
 			raise
 
+	def _carregar_tabela_em_blocos(self, path: str, tamanho_bloco: int, colunas: list[str] | None = None, **kwargs):
+		"""Abre um arquivo CSV, Parquet ou Arrow IPC para leitura em blocos de `tamanho_bloco` linhas."""
+		if not Path(path).exists():
+			print(f"Erro: Arquivo não encontrado em {path}")
+			raise FileNotFoundError(path)
+		return ler_tabela_em_blocos(path, tamanho_bloco, colunas, **kwargs)
+
+	def _executar_etapa(self, etapa: str, dependencias: list[str], parametros: list, executar: Callable[[], None], atributos: list[str]):
+		"""
+		Executa uma etapa de `CalcularIndicadores` ou restaura do cache os atributos que ela produz.
+
+		A chave da etapa combina as chaves das etapas das quais ela depende com os seus próprios parâmetros.
+		Se o cache estiver desativado ou alguma dependência não tiver chave, a etapa é apenas executada.
+
+		Args:
+			etapa (str): Nome da etapa.
+			dependencias (list[str]): Etapas anteriores cujos resultados a etapa utiliza.
+			parametros (list): Arquivos de entrada (`Path`) e parâmetros da etapa.
+			executar (Callable[[], None]): Função que executa a etapa em `self._indicadores`.
+			atributos (list[str]): Atributos de `self._indicadores` produzidos pela etapa.
+		"""
+		chaves_dependencias = [self._chaves_etapas.get(dependencia) for dependencia in dependencias]
+		if self._cache is None or None in chaves_dependencias:
+			self._chaves_etapas[etapa] = None
+			executar()
+			return
+
+		chave = self._cache.chave(etapa, chaves_dependencias, parametros)
+		self._chaves_etapas[etapa] = chave
+
+		def calcular():
+			executar()
+			return {atributo: getattr(self._indicadores, atributo, None) for atributo in atributos}
+
+		for atributo, valor in self._cache.obter_ou_calcular(etapa, chave, calcular, self._etapa_valida).items():
+			if valor is not None:
+				setattr(self._indicadores, atributo, valor)
+
+	def _etapa_valida(self, valores: dict) -> bool:
+		"""Considera válida, para fins de cache, a etapa que produziu todos os atributos e nenhum DataFrame vazio."""
+		return not any(valor is None or (isinstance(valor, pd.DataFrame) and valor.empty) for valor in valores.values())
+
 	def carregar_dados_operacionais(
-		self, linhas_path, frequencia_path, pontualidade_path, init_crs: str | int = "EPSG:4326", target_crs: str | int = "EPSG:31983"
+		self,
+		linhas_path,
+		frequencia_path,
+		pontualidade_path,
+		init_crs: str | int = "EPSG:4326",
+		target_crs: str | int = "EPSG:31983",
+		tamanho_bloco: int | None = None,
 	):
 		"""
 		Carrega os dados operacionais das linhas, frequência e pontualidade.
 
 		Args:
-			linhas_path (str): Caminho para o CSV de dados das linhas.
-			frequencia_path (str): Caminho para o CSV de frequência.
-			pontualidade_path (str): Caminho para o CSV de pontualidade.
+			linhas_path (str): Caminho para o arquivo (CSV, Parquet/GeoParquet ou Arrow) de dados das linhas.
+			frequencia_path (str): Caminho para o arquivo (CSV, Parquet ou Arrow) de frequência.
+			pontualidade_path (str): Caminho para o arquivo (CSV, Parquet ou Arrow) de pontualidade.
 			init_crs (str): CRS inicial dos dados geoespaciais
 			target_crs (str): CRS projetado dos dados geoespaciais
+			tamanho_bloco (int | None): Se informado, os arquivos de frequência e pontualidade são lidos em blocos
+				com este número de linhas e reduzidos a acumuladores por linha, sem carregar os arquivos inteiros.
 		"""
 		print("Carregando dados operacionais...")
-		df_linhas = self._carregar_csv(linhas_path)
-		df_frequencia = self._carregar_csv(frequencia_path, delimiter=",")
-		df_pontualidade = self._carregar_csv(pontualidade_path, delimiter=",")
-
-		self._indicadores.carregar_dados(df_linhas, df_frequencia, df_pontualidade, init_crs, target_crs)
+		self._executar_etapa(
+			"operacional",
+			[],
+			[Path(linhas_path), Path(frequencia_path), Path(pontualidade_path), init_crs, target_crs],
+			lambda: self._executar_carga_operacional(linhas_path, frequencia_path, pontualidade_path, init_crs, target_crs, tamanho_bloco),
+			["dados_linhas", "geometrias", "frequencia", "pontualidade", "cumprimento"],
+		)
 		self._operacional_ok = True
 		print("Dados operacionais carregados.")
 
-	def carregar_dados_geoespaciais(self, pontos_path, residencias_path, init_crs: str | int = "EPSG:4326", target_crs: str | int = "EPSG:31983"):
+	def _executar_carga_operacional(self, linhas_path, frequencia_path, pontualidade_path, init_crs, target_crs, tamanho_bloco):
+		"""Lê os arquivos operacionais e os carrega em `CalcularIndicadores`."""
+		df_linhas = self._carregar_tabela(linhas_path)
+
+		if tamanho_bloco is not None:
+			blocos_frequencia = self._carregar_tabela_em_blocos(frequencia_path, tamanho_bloco, modelos.COLUNAS_FREQUENCIA, delimiter=",")
+			blocos_pontualidade = self._carregar_tabela_em_blocos(pontualidade_path, tamanho_bloco, modelos.COLUNAS_PONTUALIDADE, delimiter=",")
+			self._indicadores.carregar_dados_em_blocos(df_linhas, blocos_frequencia, blocos_pontualidade, init_crs, target_crs)
+		else:
+			df_frequencia = self._carregar_tabela(frequencia_path, modelos.COLUNAS_FREQUENCIA, delimiter=",")
+			df_pontualidade = self._carregar_tabela(pontualidade_path, modelos.COLUNAS_PONTUALIDADE, delimiter=",")
+			self._indicadores.carregar_dados(df_linhas, df_frequencia, df_pontualidade, init_crs, target_crs)
+
+	def atualizar_dados_operacionais(
+		self,
+		linhas_path,
+		estado_path,
+		frequencia_path=None,
+		pontualidade_path=None,
+		janela_dias: int = 30,
+		init_crs: str | int = "EPSG:4326",
+		target_crs: str | int = "EPSG:31983",
+	):
+		"""
+		Carrega os dados operacionais a partir do estado agregado por dia, acrescentando um novo dia se informado.
+
+		O estado é lido de `estado_path`, recebe os registros do novo dia, descarta os dias fora da janela
+		e é salvo novamente. Os indicadores operacionais são calculados a partir do estado, sem reprocessar
+		o histórico.
+
+		Args:
+			linhas_path (str): Caminho para o arquivo (CSV, Parquet/GeoParquet ou Arrow) de dados das linhas.
+			estado_path (str): Caminho para o arquivo CSV de estado (criado se não existir).
+			frequencia_path (str | None): Caminho para o arquivo (CSV, Parquet ou Arrow) de frequência do novo dia.
+			pontualidade_path (str | None): Caminho para o arquivo (CSV, Parquet ou Arrow) de pontualidade do novo dia.
+			janela_dias (int): Quantidade de dias mantidos no estado.
+			init_crs (str): CRS inicial dos dados geoespaciais
+			target_crs (str): CRS projetado dos dados geoespaciais
+		"""
+		print("Atualizando dados operacionais a partir do estado...")
+		df_linhas = self._carregar_tabela(linhas_path)
+		estado = EstadoOperacional.carregar(estado_path, janela_dias)
+
+		if frequencia_path is not None and pontualidade_path is not None:
+			df_frequencia = self._carregar_tabela(frequencia_path, modelos.COLUNAS_FREQUENCIA, delimiter=",")
+			df_pontualidade = self._carregar_tabela(pontualidade_path, modelos.COLUNAS_PONTUALIDADE, delimiter=",")
+			estado.adicionar_dia(df_frequencia, df_pontualidade)
+			estado.salvar(estado_path)
+
+		self._indicadores.carregar_dados_estado(df_linhas, estado, init_crs, target_crs)
+		self._chaves_etapas["operacional"] = None
+		self._operacional_ok = True
+		print(f"Dados operacionais carregados ({len(estado.dias)} dias no estado).")
+
+	def carregar_dados_geoespaciais(
+		self,
+		pontos_path,
+		residencias_path,
+		init_crs: str | int = "EPSG:4326",
+		target_crs: str | int = "EPSG:31983",
+		limite_memoria_mb: float | None = None,
+		limite_distancia: float = 500,
+	):
 		"""
 		Carrega os dados geoespaciais de pontos de ônibus e residências.
 
 		Args:
-			pontos_path (str): Caminho para o CSV de pontos de ônibus.
-			residencias_path (str): Caminho para o CSV de residências.
+			pontos_path (str): Caminho para o arquivo (CSV, Parquet ou Arrow) de pontos de ônibus.
+			residencias_path (str): Caminho para o arquivo (CSV, Parquet ou Arrow) de residências.
 			init_crs (str): CRS inicial dos dados geoespaciais
 			target_crs (str): CRS projetado dos dados geoespaciais
+			limite_memoria_mb (float | None): Se informado, as residências são lidas e associadas em blocos
+				respeitando este orçamento de memória. Nesse modo as residências não ficam em memória, portanto
+				o mapa de calor e `get_associacoes` não ficam disponíveis.
+			limite_distancia (float): Distância máxima, em metros, para uma residência ser considerada atendida.
 		"""
 		if not self._operacional_ok:
 			raise RuntimeError("Carregue os dados operacionais primeiro.")
 
 		print("Carregando dados geoespaciais...")
-		df_pontos = self._carregar_csv(pontos_path)
-		df_residencias = self._carregar_csv(residencias_path)
-
-		self._indicadores.carregar_dados_geometrias(df_pontos, df_residencias, init_crs, target_crs)
+		self._executar_etapa(
+			"geoespacial",
+			["operacional"],
+			[
+				Path(pontos_path),
+				Path(residencias_path),
+				init_crs,
+				target_crs,
+				limite_memoria_mb is None,
+				limite_distancia,
+				Associador.TOLERANCIA_LINHA,
+			],
+			lambda: self._executar_carga_geoespacial(pontos_path, residencias_path, init_crs, target_crs, limite_memoria_mb, limite_distancia),
+			["associador", "dados_geograficos"],
+		)
 		self._geo_ok = True
 		print("Dados geoespaciais carregados.")
 
+	def _executar_carga_geoespacial(self, pontos_path, residencias_path, init_crs, target_crs, limite_memoria_mb, limite_distancia):
+		"""Lê os pontos de ônibus e as residências e os associa às linhas em `CalcularIndicadores`."""
+		df_pontos = self._carregar_tabela(pontos_path, modelos.COLUNAS_PONTOS_ONIBUS)
+
+		if limite_memoria_mb is not None:
+			self._indicadores.carregar_dados_geometrias_em_blocos(
+				df_pontos, residencias_path, init_crs, target_crs, limite_memoria_mb, limite_distancia
+			)
+		else:
+			df_residencias = self._carregar_tabela(residencias_path, modelos.COLUNAS_RESIDENCIAS)
+			self._indicadores.carregar_dados_geometrias(df_pontos, df_residencias, init_crs, target_crs, limite_distancia)
+
 	def calcular_indicadores_iqt(self):
 		"""
 		Executa o cálculo dos indicadores e do IQT.
@@ -110,12 +292,78 @@ class QualiBus:
 			raise RuntimeError("Carregue todos os dados (operacionais e geo) primeiro.")
 
 		print("Calculando IQT...")
-		self._indicadores.classificar_linha()
-		self._indicadores.processar_iqt()
+		self._executar_etapa(
+			"iqt",
+			["operacional", "geoespacial"],
+			[config.PRIORIDADE, config.INDICADOR, config.NOMECLATURA, TABELA_REGRAS],
+			self._executar_iqt,
+			["dados_linhas", "geometrias", "dados_completos", "classificao_linhas", "matriz"],
+		)
 		self._iqt_ok = True
 		print("Cálculo de IQT concluído.")
 		return self._indicadores.matriz
 
+	def _executar_iqt(self):
+		"""Classifica as linhas e calcula o IQT em `CalcularIndicadores`."""
+		self._indicadores.classificar_linha()
+		self._indicadores.processar_iqt()
+
+	def calcular_painel_iqt(self, frequencia_path, pontualidade_path, frequencia: str = "M", tamanho_bloco: int | None = None, prioridades=None):
+		"""
+		Calcula o IQT por linha e por período (dia, semana, mês...) numa única passagem pelos registros operacionais.
+
+		Requer que os dados operacionais (linhas) e geoespaciais tenham sido carregados; os indicadores
+		estáticos e geográficos são reaproveitados em todos os períodos.
+
+		Args:
+			frequencia_path (str): Caminho para o arquivo (CSV, Parquet ou Arrow) de frequência.
+			pontualidade_path (str): Caminho para o arquivo (CSV, Parquet ou Arrow) de pontualidade.
+			frequencia (str): Frequência do período no formato do pandas ('D', 'W', 'M', ...). Padrão: 'M'.
+			tamanho_bloco (int | None): Se informado, os arquivos são lidos em blocos com este número de linhas.
+			prioridades (np.ndarray | None): Vetor de pesos dos indicadores. Se None, usa `config.PRIORIDADE`.
+
+		Returns:
+			pd.DataFrame: Tabela longa com uma linha por (id_linha, periodo), as pontuações I1 a I10 e o IQT.
+		"""
+		if not self._operacional_ok or not self._geo_ok:
+			raise RuntimeError("Carregue todos os dados (operacionais e geo) primeiro.")
+
+		print("Calculando painel de IQT...")
+		if tamanho_bloco is not None:
+			acumuladores_frequencia = acumular_em_blocos(
+				self._carregar_tabela_em_blocos(frequencia_path, tamanho_bloco, modelos.COLUNAS_FREQUENCIA), acumular_frequencia_diaria
+			)
+			acumuladores_viagens = acumular_em_blocos(
+				self._carregar_tabela_em_blocos(pontualidade_path, tamanho_bloco, modelos.COLUNAS_PONTUALIDADE), acumular_viagens_diarias
+			)
+		else:
+			acumuladores_frequencia = acumular_frequencia_diaria(self._carregar_tabela(frequencia_path, modelos.COLUNAS_FREQUENCIA))
+			acumuladores_viagens = acumular_viagens_diarias(self._carregar_tabela(pontualidade_path, modelos.COLUNAS_PONTUALIDADE))
+
+		painel = self._indicadores.calcular_painel_iqt(unir_acumuladores(acumuladores_frequencia, acumuladores_viagens), frequencia, prioridades)
+		print("Painel de IQT concluído.")
+		return painel
+
+	def analisar_sensibilidade_pesos(self, n_amostras: int = 10_000, tamanho_bloco: int = 2_000, guardar_amostras: bool = False, **kwargs):
+		"""
+		Avalia a estabilidade do IQT e da classe de cada linha sob pesos dos indicadores perturbados.
+
+		Args:
+			n_amostras (int): Quantidade de esquemas de ponderação sorteados.
+			tamanho_bloco (int): Quantidade de esquemas avaliados por bloco.
+			guardar_amostras (bool): Se True, guarda todos os IQTs sorteados para o cálculo exato dos quantis,
+				com memória proporcional a `n_amostras`; caso contrário, os quantis são estimados por histograma.
+			**kwargs: Argumentos adicionais para `AnaliseSensibilidade` (distribuicao, concentracao, sigma, semente...).
+
+		Returns:
+			pd.DataFrame: Quantis do IQT, probabilidades de classe e posições no ranking de cada linha.
+		"""
+		if not self._iqt_ok:
+			raise RuntimeError("Calcule o IQT primeiro.")
+		print("Executando análise de sensibilidade dos pesos...")
+		analise = AnaliseSensibilidade(self._indicadores.classificao_linhas, **kwargs)
+		return analise.executar(n_amostras, tamanho_bloco, guardar_amostras=guardar_amostras)
+
 	def gerar_mapa_rotas_por_iqt(self, **kwargs):
 		"""
 		Gera e retorna um mapa das rotas classificadas por IQT.
@@ -132,9 +380,28 @@ class QualiBus:
 		# Nota: O original chama map_routes.classificar_rota_grupo.
 		# Aqui, estamos assumindo que este método GERA e retorna o mapa.
 		# Se ele apenas classifica e outro método gera, ajuste aqui.
-		mapa = self._map_routes.classificar_rota_grupo(self._indicadores.dados_completos, **kwargs)
+		mapa = self._map_routes.classificar_rota_grupo(self._indicadores.dados_completos, geometrias=self._indicadores.geometrias, **kwargs)
 		return mapa
 
+	def exportar_tiles_vetoriais(self, destino, **kwargs):
+		"""
+		Exporta as rotas classificadas por IQT e os bairros como tiles vetoriais (MVT).
+
+		Args:
+			destino (str | Path): Arquivo '.mbtiles' ou diretório, que recebe os tiles em '{z}/{x}/{y}.pbf' e o visualizador 'index.html'.
+			**kwargs: Argumentos adicionais para o `ExportadorTilesVetoriais` (por exemplo, 'zoom_min' e 'zoom_max').
+
+		Returns:
+			Path: Caminho do arquivo ou diretório gravado.
+		"""
+		if not self._iqt_ok:
+			raise RuntimeError("Calcule o IQT primeiro.")
+		print("Exportando tiles vetoriais...")
+		exportador = ExportadorTilesVetoriais(self._indicadores.dados_completos, self.gdf_city, geometrias=self._indicadores.geometrias, **kwargs)
+		if Path(destino).suffix.lower() == ".mbtiles":
+			return exportador.exportar_mbtiles(destino)
+		return exportador.exportar_diretorio(destino)
+
 	def gerar_mapa_calor_acessibilidade(self, **kwargs):
 		"""
 		Gera e retorna um mapa de calor da acessibilidade.
@@ -179,7 +446,10 @@ class QualiBus:
 			raise RuntimeError("Carregue os dados operacionais primeiro.")
 		print("Gerando visualização de distribuição por bairro...")
 		# Usa os dados_linhas já processados internamente
-		vis = self._visualizacao_bairros.distribuicao_linhas_por_bairro(self.gdf_city, self._indicadores.dados_linhas, **kwargs)
+		linhas = self._indicadores.dados_linhas
+		if self._indicadores.geometrias is not None:
+			linhas = self._indicadores.geometrias.anexar(linhas, self.gdf_city.crs)
+		vis = self._visualizacao_bairros.distribuicao_linhas_por_bairro(self.gdf_city, linhas, **kwargs)
 		return vis
 
 	def get_dados_completos(self):
@@ -191,9 +461,18 @@ class QualiBus:
 		return self._indicadores.matriz if self._iqt_ok else None
 
 	def get_associacoes(self):
-		"""Retorna o DataFrame com as associações entre residências e pontos."""
+		"""Retorna o DataFrame com as associações entre residências e pontos, reaproveitando o cache do Associador."""
 		return self._indicadores.associador.associar_residencias_a_pontos() if self._geo_ok else None
 
+	def get_curva_cobertura(self, limites=None):
+		"""Retorna a proporção de residências atendidas por linha para cada limite de distância informado."""
+		return self._indicadores.associador.curva_cobertura(limites) if self._geo_ok else None
+
+	@property
+	def cache(self):
+		"""Permite acesso ao cache de etapas (None se o cache estiver desativado)."""
+		return self._cache
+
 	@property
 	def associador(self):
 		"""Permite acesso ao objeto Associador para análises mais detalhadas."""
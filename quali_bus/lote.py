@@ -0,0 +1,199 @@
+import os
+import time
+import traceback
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+from typing import Optional
+
+import pandas as pd
+
+from .facade import QualiBus
+
+COLUNAS_MANIFESTO = ["cidade", "shapefile_path", "linhas_path", "frequencia_path", "pontualidade_path", "pontos_path", "residencias_path"]
+PARAMETROS_OPCIONAIS = {
+	"shapefile_crs": 31983,
+	"init_crs": "EPSG:4326",
+	"target_crs": "EPSG:31983",
+	"tamanho_bloco": None,
+	"limite_memoria_mb": None,
+	"diretorio_cache": None,
+}
+
+
+def _valor_opcional(entrada: dict, nome: str):
+	"""Retorna o parâmetro opcional da cidade, usando o valor padrão quando ausente ou vazio no manifesto."""
+	valor = entrada.get(nome)
+	return PARAMETROS_OPCIONAIS[nome] if valor is None or pd.isna(valor) else valor
+
+
+def processar_cidade(entrada: dict) -> dict:
+	"""
+	Executa o pipeline completo do QualiBus para uma cidade do manifesto.
+
+	Erros são capturados e devolvidos no resultado, de modo que a falha de uma cidade não
+	interrompe o lote.
+
+	Args:
+		entrada (dict): Linha do manifesto com os caminhos e parâmetros da cidade.
+
+	Returns:
+		dict: Resultado com 'cidade', 'status' ('ok' ou 'erro'), 'erro', os tempos de cada etapa
+			em segundos e a 'matriz' de indicadores (None em caso de erro).
+	"""
+	resultado = {"cidade": entrada["cidade"], "status": "ok", "erro": None, "matriz": None}
+	inicio = time.perf_counter()
+	etapa = "inicializacao"
+	try:
+		init_crs = _valor_opcional(entrada, "init_crs")
+		target_crs = _valor_opcional(entrada, "target_crs")
+		tamanho_bloco = _valor_opcional(entrada, "tamanho_bloco")
+		limite_memoria_mb = _valor_opcional(entrada, "limite_memoria_mb")
+
+		qualibus = QualiBus(
+			entrada["shapefile_path"],
+			initial_crs=int(_valor_opcional(entrada, "shapefile_crs")),
+			diretorio_cache=_valor_opcional(entrada, "diretorio_cache"),
+		)
+		resultado["tempo_inicializacao"] = time.perf_counter() - inicio
+
+		etapa = "operacional"
+		marca = time.perf_counter()
+		qualibus.carregar_dados_operacionais(
+			entrada["linhas_path"],
+			entrada["frequencia_path"],
+			entrada["pontualidade_path"],
+			init_crs,
+			target_crs,
+			tamanho_bloco=None if tamanho_bloco is None else int(tamanho_bloco),
+		)
+		resultado["tempo_operacional"] = time.perf_counter() - marca
+
+		etapa = "geoespacial"
+		marca = time.perf_counter()
+		qualibus.carregar_dados_geoespaciais(
+			entrada["pontos_path"],
+			entrada["residencias_path"],
+			init_crs,
+			target_crs,
+			limite_memoria_mb=None if limite_memoria_mb is None else float(limite_memoria_mb),
+		)
+		resultado["tempo_geoespacial"] = time.perf_counter() - marca
+
+		etapa = "iqt"
+		marca = time.perf_counter()
+		matriz = qualibus.calcular_indicadores_iqt()
+		if matriz is None or matriz.empty:
+			raise ValueError("a matriz de indicadores ficou vazia; verifique as mensagens de erro da cidade")
+		resultado["matriz"] = matriz
+		resultado["tempo_iqt"] = time.perf_counter() - marca
+	except Exception as error:
+		resultado["status"] = "erro"
+		resultado["erro"] = f"{etapa}: {type(error).__name__}: {error}"
+		resultado["detalhes_erro"] = traceback.format_exc()
+	resultado["tempo_total"] = time.perf_counter() - inicio
+	return resultado
+
+
+class ProcessadorLote:
+	"""
+	Executa o cálculo do IQT para várias cidades em paralelo, a partir de um manifesto.
+
+	Cada cidade roda num processo separado de um `ProcessPoolExecutor`, de forma que as etapas
+	pesadas (associação de residências, por exemplo) de cidades diferentes ocupam núcleos
+	diferentes. Falhas ficam restritas à cidade em que ocorreram.
+
+	Attributes:
+		manifesto (pd.DataFrame): Uma linha por cidade, com as colunas de `COLUNAS_MANIFESTO` e,
+			opcionalmente, as de `PARAMETROS_OPCIONAIS`.
+		max_processos (int): Quantidade máxima de processos simultâneos.
+	"""
+
+	def __init__(self, manifesto: pd.DataFrame | str | Path, max_processos: Optional[int] = None):
+		"""
+		Inicializa o processador com o manifesto das cidades.
+
+		Args:
+			manifesto (pd.DataFrame | str | Path): DataFrame ou caminho para um manifesto em CSV ou JSON.
+			max_processos (int | None): Quantidade máxima de processos. Se None, usa o número de CPUs (limitado
+				ao número de cidades). Com 1, as cidades são processadas em sequência no próprio processo.
+
+		Raises:
+			ValueError: Se o manifesto estiver vazio, faltar alguma coluna obrigatória ou houver cidades repetidas.
+		"""
+		self.manifesto = self._carregar_manifesto(manifesto)
+		self.max_processos = max(1, min(max_processos or os.cpu_count() or 1, len(self.manifesto)))
+
+	def _carregar_manifesto(self, manifesto: pd.DataFrame | str | Path) -> pd.DataFrame:
+		"""Lê e valida o manifesto."""
+		if not isinstance(manifesto, pd.DataFrame):
+			manifesto = pd.read_json(manifesto) if Path(manifesto).suffix.lower() == ".json" else pd.read_csv(manifesto)
+
+		colunas_faltando = [coluna for coluna in COLUNAS_MANIFESTO if coluna not in manifesto.columns]
+		if colunas_faltando:
+			raise ValueError(f"manifesto está faltando colunas: {colunas_faltando}")
+		if manifesto.empty:
+			raise ValueError("manifesto não possui nenhuma cidade")
+		if manifesto["cidade"].duplicated().any():
+			raise ValueError(f"manifesto possui cidades repetidas: {manifesto.loc[manifesto['cidade'].duplicated(), 'cidade'].tolist()}")
+		return manifesto.reset_index(drop=True)
+
+	def executar(
+		self, caminho_matriz: Optional[str | Path] = None, caminho_relatorio: Optional[str | Path] = None
+	) -> tuple[pd.DataFrame, pd.DataFrame]:
+		"""
+		Processa todas as cidades do manifesto e consolida os resultados.
+
+		Args:
+			caminho_matriz (str | Path | None): Se informado, grava a matriz consolidada (CSV, ou Parquet pela extensão).
+			caminho_relatorio (str | Path | None): Se informado, grava o relatório por cidade em CSV.
+
+		Returns:
+			tuple[pd.DataFrame, pd.DataFrame]: Matriz consolidada, com a coluna 'cidade', e relatório com o status,
+				o erro e os tempos de cada cidade, na ordem do manifesto.
+		"""
+		entradas = self.manifesto.to_dict("records")
+		resultados = self._executar_em_sequencia(entradas) if self.max_processos == 1 else self._executar_em_paralelo(entradas)
+
+		ordem = {entrada["cidade"]: indice for indice, entrada in enumerate(entradas)}
+		resultados.sort(key=lambda resultado: ordem[resultado["cidade"]])
+
+		matrizes = [resultado["matriz"].assign(cidade=resultado["cidade"]) for resultado in resultados if resultado["matriz"] is not None]
+		matriz = pd.concat(matrizes, ignore_index=True) if matrizes else pd.DataFrame(columns=["cidade"])
+		matriz = matriz[["cidade"] + [coluna for coluna in matriz.columns if coluna != "cidade"]]
+
+		relatorio = pd.DataFrame([{chave: valor for chave, valor in resultado.items() if chave != "matriz"} for resultado in resultados])
+
+		if caminho_matriz is not None:
+			if Path(caminho_matriz).suffix.lower() in {".parquet", ".pq"}:
+				matriz.to_parquet(caminho_matriz, index=False)
+			else:
+				matriz.to_csv(caminho_matriz, index=False)
+		if caminho_relatorio is not None:
+			relatorio.drop(columns=["detalhes_erro"], errors="ignore").to_csv(caminho_relatorio, index=False)
+
+		falhas = relatorio.loc[relatorio["status"] != "ok", "cidade"].tolist()
+		print(f"Lote concluído: {len(resultados) - len(falhas)} cidade(s) processada(s) com sucesso, {len(falhas)} com erro.")
+		for cidade in falhas:
+			print(f"Erro na cidade {cidade}: {relatorio.loc[relatorio['cidade'] == cidade, 'erro'].iloc[0]}")
+		return matriz, relatorio
+
+	def _executar_em_sequencia(self, entradas: list[dict]) -> list[dict]:
+		"""Processa as cidades uma a uma no processo atual."""
+		return [processar_cidade(entrada) for entrada in entradas]
+
+	def _executar_em_paralelo(self, entradas: list[dict]) -> list[dict]:
+		"""Processa as cidades num pool de processos, registrando como erro as cidades cujo processo falhou."""
+		resultados = []
+		with ProcessPoolExecutor(max_workers=self.max_processos) as executor:
+			futuros = {executor.submit(processar_cidade, entrada): entrada["cidade"] for entrada in entradas}
+			for futuro in as_completed(futuros):
+				try:
+					resultados.append(futuro.result())
+				except Exception as error:
+					resultados.append({
+						"cidade": futuros[futuro],
+						"status": "erro",
+						"erro": f"processo: {type(error).__name__}: {error}",
+						"matriz": None,
+					})
+		return resultados
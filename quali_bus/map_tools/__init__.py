@@ -1,2 +1,3 @@
 from .camadas import *
 from .criacao_mapa import *
+from .tiles_vetoriais import *
@@ -1,7 +1,12 @@
+from typing import Callable
+
 import fiona
 import folium
 import geopandas as gpd
+import numpy as np
 import pandas as pd
+import shapely
+from branca.colormap import LinearColormap
 
 # from shapely import wkt
 # from shapely.geometry import LineString
@@ -118,6 +123,114 @@ def adicionar_linha_ao_mapa(line: pd.Series, group: folium.FeatureGroup, color:
 	).add_to(group)
 
 
+def estilo_rota(cor: str, peso: float = 2.5) -> Callable[[dict], dict]:
+	"""Cria a função de estilo compartilhada por todas as rotas de uma camada GeoJSON.
+
+	Como todas as rotas recebem o mesmo estilo, o Folium o grava uma única vez no HTML,
+	em vez de repeti-lo para cada rota.
+
+	Args:
+		cor (str): Cor das rotas em formato hexadecimal.
+		peso (float, optional): Espessura das rotas.
+
+	Returns:
+		Callable[[dict], dict]: Função de estilo para o `folium.GeoJson`.
+	"""
+	estilo = {"color": cor, "weight": peso, "opacity": 1}
+	return lambda feature: estilo
+
+
+def preparar_rotas_geojson(gdf_lines: gpd.GeoDataFrame, casas_decimais: int = 2, precisao_coordenadas: int = 5) -> gpd.GeoDataFrame:
+	"""Prepara as rotas (ou outras geometrias, como as células de `adicionar_camada_grade`) para uma camada GeoJSON compacta.
+
+	Os atributos se tornam propriedades das rotas, exibidas pelo popup do próprio GeoJSON: números
+	reais são arredondados (como em `criar_popup`) e tipos não serializáveis em JSON viram texto. As
+	coordenadas são apenas arredondadas para `precisao_coordenadas` casas decimais (5 casas em graus ≈ 1 m);
+	a simplificação das geometrias fica a cargo de `RepositorioGeometrias.simplificada` (ver `zoom_detalhe`).
+
+	Args:
+		gdf_lines (gpd.GeoDataFrame): Rotas em EPSG:4326.
+		casas_decimais (int, optional): Casas decimais dos atributos numéricos reais.
+		precisao_coordenadas (int, optional): Casas decimais das coordenadas.
+
+	Returns:
+		gpd.GeoDataFrame: Cópia das rotas pronta para o `folium.GeoJson`.
+	"""
+	rotas = gdf_lines.copy()
+	coluna_geometria = rotas.geometry.name
+	for coluna in rotas.columns:
+		if coluna == coluna_geometria:
+			continue
+		if pd.api.types.is_float_dtype(rotas[coluna]):
+			rotas[coluna] = rotas[coluna].round(casas_decimais)
+		elif not (pd.api.types.is_integer_dtype(rotas[coluna]) or pd.api.types.is_bool_dtype(rotas[coluna])):
+			rotas[coluna] = rotas[coluna].astype(str)
+
+	rotas[coluna_geometria] = shapely.transform(rotas.geometry.to_numpy(), lambda coordenadas: np.round(coordenadas, precisao_coordenadas))
+	return rotas
+
+
+def adicionar_camada_geojson(gdf_lines: gpd.GeoDataFrame, group: folium.FeatureGroup, color: str) -> None:
+	"""Adiciona um conjunto de rotas ao mapa como uma única camada GeoJSON.
+
+	O popup e o tooltip são montados no navegador a partir das propriedades de cada rota,
+	em vez de uma tabela HTML gerada por rota como em `adicionar_linha_ao_mapa`.
+
+	Args:
+		gdf_lines (gpd.GeoDataFrame): Rotas em EPSG:4326, com a coluna 'id_linha'.
+		group (folium.FeatureGroup): Grupo de features do Folium onde a camada será adicionada.
+		color (str): Cor das rotas da camada.
+	"""
+	rotas = preparar_rotas_geojson(gdf_lines)
+	campos = [coluna for coluna in rotas.columns if coluna != rotas.geometry.name]
+
+	folium.GeoJson(
+		rotas.to_geo_dict(),
+		style_function=estilo_rota(color),
+		highlight_function=estilo_rota(color, peso=5),
+		tooltip=folium.GeoJsonTooltip(fields=["id_linha"], labels=False),
+		popup=folium.GeoJsonPopup(fields=campos, max_width=300),
+		embed=True,
+	).add_to(group)
+
+
+def adicionar_camada_grade(grade: gpd.GeoDataFrame, mapa: folium.Map, estatistica: str = "distancia_media", classes: int = 8) -> None:
+	"""Adiciona ao mapa as células de uma grade de distâncias, coloridas por uma estatística, com a legenda das cores.
+
+	As cores são agrupadas em `classes` faixas; como o Folium grava uma única vez cada estilo
+	distinto, o HTML cresce apenas com a quantidade de células, não com a de residências.
+
+	Args:
+		grade (gpd.GeoDataFrame): Células em EPSG:4326, no formato de `Associador.agregar_distancias_em_grade`.
+		mapa (folium.Map): Mapa onde a camada será adicionada.
+		estatistica (str): Coluna que define a cor das células: 'distancia_media', 'distancia_maxima' ou 'num_residencias'.
+		classes (int, optional): Quantidade de faixas de cor.
+	"""
+	valores = grade[estatistica].to_numpy(dtype=np.float64)
+	minimo, maximo = (float(valores.min()), float(valores.max())) if len(valores) else (0.0, 1.0)
+	escala = LinearColormap(["#2ca02c", "#ffdd57", "#d62728"], vmin=minimo, vmax=max(maximo, minimo + 1e-9)).to_step(classes)
+	escala.caption = {"distancia_media": "Distância média (m)", "distancia_maxima": "Distância máxima (m)"}.get(estatistica, "Residências")
+
+	celulas = preparar_rotas_geojson(grade, casas_decimais=1)
+	celulas["cor"] = [escala.rgb_hex_str(valor) for valor in valores]
+
+	folium.GeoJson(
+		celulas.to_geo_dict(),
+		name="Distância até o ponto de ônibus",
+		style_function=lambda feature: {
+			"fillColor": feature["properties"]["cor"],
+			"color": feature["properties"]["cor"],
+			"weight": 0.5,
+			"fillOpacity": 0.6,
+		},
+		tooltip=folium.GeoJsonTooltip(
+			fields=["num_residencias", "distancia_media", "distancia_maxima"], aliases=["Residências", "Distância média (m)", "Distância máxima (m)"]
+		),
+		embed=True,
+	).add_to(mapa)
+	escala.add_to(mapa)
+
+
 # def _coordenadas_pontos_linhas(line: gpd.GeoSeries) -> list[tuple[float, float]]:
 # 	"""Extrai as coordenadas de uma linha do tipo LineString.
 
@@ -1,12 +1,21 @@
+import json
+
 import folium
 import geopandas as gpd
 import matplotlib.pyplot as plt
+import numpy as np
+import pandas as pd
 from folium.plugins import GroupedLayerControl, HeatMap
 from matplotlib.patches import Patch
 
-from ..data_analysis.classificar_indicadores import ClassificarIndicadores
-from ..utils.associador import Associador
-from .camadas import adicionar_linha_ao_mapa
+from ..data_analysis.classificar_indicadores import CLASSES_IQT, ClassificarIndicadores
+from ..utils.associador import ESTATISTICAS_GRADE, FORMAS_GRADE, Associador
+from ..utils.cores import cores_iqt
+from ..utils.geometrias import CRS_METRICO, RepositorioGeometrias, tolerancia_para_zoom
+from .camadas import adicionar_camada_geojson, adicionar_camada_grade, adicionar_linha_ao_mapa
+
+MODOS_ROTAS = ("polilinhas", "geojson")
+MODOS_MAPA_CALOR = ("pontos", *FORMAS_GRADE)
 
 
 class MapaIQT:
@@ -16,28 +25,66 @@ class MapaIQT:
 	adicionar camadas de rotas e classificá-las de acordo com o IQT (Índice de Qualidade
 	do Transporte).
 
+	Nenhum mapa é construído na inicialização. A camada base de bairros é convertida para GeoJSON
+	no primeiro uso e reaproveitada, e cada método gerador (`classificar_rota_grupo`,
+	`gerar_mapa_de_calor`) retorna um mapa novo, sem acumular camadas de chamadas anteriores.
+
 	Attributes:
 		gdf_city (gpd.GeoDataFrame): GeoDataFrame contendo as geometrias dos bairros da cidade.
-		mapa (folium.Map): Objeto de mapa Folium inicializado.
 		legenda (str): String contendo informações sobre a legenda do mapa.
+		zoom_detalhe (float | None): Zoom para o qual as geometrias exportadas nos mapas são simplificadas.
 	"""
 
-	def __init__(self, gdf_city: gpd.GeoDataFrame):
+	def __init__(self, gdf_city: gpd.GeoDataFrame, zoom_detalhe: float | None = None):
 		"""Inicializa um mapa centrado na cidade com uma camada base de bairros.
 
 		Args:
 			gdf_city (gpd.GeoDataFrame): GeoDataFrame contendo as geometrias dos bairros da cidade. Deve conter uma coluna 'geometry' com os polígonos dos bairros.
+			zoom_detalhe (float | None): Se informado, os bairros e as rotas são simplificados com a tolerância de meio pixel
+				nesse zoom (ver `tolerancia_para_zoom`), reduzindo os vértices exportados sem diferença visível. Os bairros
+				são simplificados como cobertura, mantendo as divisas compartilhadas. Se None, as geometrias são usadas sem
+				simplificação.
 		"""
 		self.gdf_city = gdf_city.copy()
-		self.mapa = self._inicializar_mapa(self.gdf_city)
-		self.mapa_de_calor = self._inicializar_mapa(self.gdf_city)
-		# self.base_map = self._criar_mapa_base()
+		self.zoom_detalhe = zoom_detalhe
+		self._bairros: RepositorioGeometrias | None = None
+		self._camada_bairros: tuple[dict, np.ndarray] | None = None
+		self._mapa: folium.Map | None = None
+		self._mapa_de_calor: folium.Map | None = None
 		self.linhas = gpd.GeoDataFrame()
+		self.geometrias: RepositorioGeometrias | None = None
 		self.legenda = ""
 
-	def _inicializar_mapa(self, gdf_city: gpd.GeoDataFrame) -> folium.Map:
-		"""Inicializa um mapa Folium centrado na cidade com uma camada base de bairros."""
-		bounds = gdf_city.total_bounds
+	@property
+	def mapa(self) -> folium.Map:
+		"""Último mapa de rotas gerado; antes da primeira geração, um mapa apenas com os bairros, criado no primeiro acesso."""
+		if self._mapa is None:
+			self._mapa = self._inicializar_mapa()
+		return self._mapa
+
+	@property
+	def mapa_de_calor(self) -> folium.Map:
+		"""Último mapa de calor gerado; antes da primeira geração, um mapa apenas com os bairros, criado no primeiro acesso."""
+		if self._mapa_de_calor is None:
+			self._mapa_de_calor = self._inicializar_mapa()
+		return self._mapa_de_calor
+
+	def _dados_camada_bairros(self) -> tuple[dict, np.ndarray]:
+		"""
+		Retorna o GeoJSON dos bairros em EPSG:4326 e os seus limites, calculados no primeiro uso.
+
+		O GeoJSON é compartilhado pelas camadas de bairros de todos os mapas gerados.
+		"""
+		if self._camada_bairros is None:
+			bairros = self._bairros_simplificados(self.zoom_detalhe)
+			if bairros.crs is not None:
+				bairros = bairros.to_crs(4326)
+			self._camada_bairros = (json.loads(bairros.to_json(show_bbox=True)), bairros.total_bounds)
+		return self._camada_bairros
+
+	def _inicializar_mapa(self) -> folium.Map:
+		"""Cria um mapa Folium centrado na cidade com a camada base de bairros."""
+		dados_bairros, bounds = self._dados_camada_bairros()
 
 		center_lat = (bounds[1] + bounds[3]) / 2
 		center_lon = (bounds[0] + bounds[2]) / 2
@@ -45,31 +92,61 @@ class MapaIQT:
 		map_routes = folium.Map(location=[center_lat, center_lon], zoom_start=12, tiles="CartoDB Voyager")
 
 		folium.GeoJson(
-			gdf_city, style_function=lambda feature: {"fillColor": "white", "color": "black", "weight": 0.7, "fillOpacity": 0.5}, name="Bairros"
+			dados_bairros, style_function=lambda feature: {"fillColor": "white", "color": "black", "weight": 0.7, "fillOpacity": 0.5}, name="Bairros"
 		).add_to(map_routes)
 
 		map_routes.fit_bounds([[bounds[1], bounds[0]], [bounds[3], bounds[2]]])
 
 		return map_routes
 
-	def classificar_rota_grupo(self, gdf_routes: gpd.GeoDataFrame) -> folium.Map | None:
-		"""Adiciona rotas ao mapa base, classificadas por cor e organizadas em grupos de camadas.
+	def _bairros_simplificados(self, zoom: float | None) -> gpd.GeoDataFrame:
+		"""Retorna os bairros com a geometria simplificada para o zoom, ou sem alteração se o zoom for None."""
+		if zoom is None:
+			return self.gdf_city
+		if self._bairros is None:
+			self._bairros = RepositorioGeometrias(self.gdf_city.geometry)
+		bairros = self.gdf_city.copy()
+		bairros[bairros.geometry.name] = self._bairros.simplificada(tolerancia_para_zoom(zoom), cobertura=True)
+		return bairros
+
+	def classificar_rota_grupo(
+		self,
+		gdf_routes: gpd.GeoDataFrame,
+		geometrias: RepositorioGeometrias | None = None,
+		modo: str = "polilinhas",
+		zoom_detalhe: float | None = None,
+	) -> folium.Map | None:
+		"""Gera um novo mapa com as rotas, classificadas por cor e organizadas em grupos de camadas.
 
 		Esta função agrupa as rotas com base em sua classificação IQT, cria grupos de
 		camadas no mapa e adiciona controles para ativar/desativar grupos de camadas.
 
+		No modo 'polilinhas' (padrão), cada rota vira uma `folium.PolyLine` com cor aleatória e tabela
+		HTML própria. No modo 'geojson', cada classe de IQT vira uma única camada GeoJSON, na cor da
+		classe, com estilo compartilhado e popup/tooltip montados a partir dos atributos das rotas; o
+		HTML gerado é uma fração do tamanho do modo 'polilinhas'.
+
 		Args:
 			gdf_routes (gpd.GeoDataFrame): GeoDataFrame contendo as rotas a serem adicionadas.
 				Deve conter as seguintes colunas:
 				- geometria_linha: geometria do tipo LineString
 				- id_linha: nome da rota para o tooltip
 				- iqt: índice de qualidade para determinação da cor
+			geometrias (RepositorioGeometrias | None): Repositório de geometrias das linhas. Se informado, a
+				geometria em EPSG:4326 vem da visão guardada no repositório, sem reprojetar `gdf_routes`.
+			modo (str): 'polilinhas' (padrão) ou 'geojson'.
+			zoom_detalhe (float | None): Zoom para o qual as rotas são simplificadas. Se None, usa o `zoom_detalhe` do mapa.
+				As versões simplificadas ficam guardadas no repositório de geometrias, e gerar o mapa novamente
+				com o mesmo zoom as reaproveita.
 
 		Returns:
 			folium.Map: Mapa Folium com as rotas adicionadas, classificadas por cor
 				e organizadas em grupos de camadas de acordo com o IQT.
 			None: Se ocorrer algum erro no processo.
 
+		Raises:
+			ValueError: Se o modo for desconhecido.
+
 		Example:
 			>>> gdf_city = gpd.read_file("caminho/para/bairros.geojson")
 			>>> gdf_routes = gpd.read_file("caminho/para/rotas.geojson")
@@ -77,8 +154,44 @@ class MapaIQT:
 			>>> mapa_final = mapa_iqt.classificar_rota_grupo(gdf_routes)
 			>>> mapa_final.save("mapa_rotas_grupos.html")
 		"""
+		if modo not in MODOS_ROTAS:
+			raise ValueError(f"modo de renderização desconhecido: {modo}. Use um de {MODOS_ROTAS}.")
+
+		zoom = self.zoom_detalhe if zoom_detalhe is None else zoom_detalhe
+		if zoom is not None and geometrias is None:
+			geometrias = RepositorioGeometrias.de_geodataframe(gdf_routes)
+
+		self.geometrias = geometrias
+		if geometrias is None:
+			self.linhas = gdf_routes.copy().to_crs(4326)
+		else:
+			self.linhas = geometrias.anexar(gdf_routes, 4326, tolerancia=None if zoom is None else tolerancia_para_zoom(zoom))
+
+		mapa = self._inicializar_mapa()
+		listas_grupo = self._adicionar_camadas_geojson(mapa) if modo == "geojson" else self._adicionar_polilinhas(mapa)
+		GroupedLayerControl(groups={"classificacao": listas_grupo}, collapsed=False).add_to(mapa)
+
+		self._mapa = mapa
+		return mapa
+
+	def _adicionar_camadas_geojson(self, mapa: folium.Map) -> list[folium.FeatureGroup]:
+		"""Adiciona uma camada GeoJSON por classe de IQT, na ordem em que as classes aparecem nas rotas."""
+		iqts = self.linhas["iqt"].to_numpy(dtype=float)
+		classes = ClassificarIndicadores().classificacao_iqt_indices(iqts)
+		cores = cores_iqt(iqts)
+
+		listas_grupo = []
+		for indice in pd.unique(classes):
+			mascara = classes == indice
+			grupo = folium.FeatureGroup(name=CLASSES_IQT[indice])
+			adicionar_camada_geojson(self.linhas[mascara], grupo, cores[mascara][0])
+			mapa.add_child(grupo)
+			listas_grupo.append(grupo)
+		return listas_grupo
+
+	def _adicionar_polilinhas(self, mapa: folium.Map) -> list[folium.FeatureGroup]:
+		"""Adiciona uma `folium.PolyLine` por rota, agrupadas por classe de IQT."""
 		grupos = {}
-		self.linhas = gdf_routes.copy().to_crs(4326)
 		classificador = ClassificarIndicadores()
 		listas_grupo = []
 
@@ -89,22 +202,50 @@ class MapaIQT:
 			if grupo is None:
 				grupo = folium.FeatureGroup(name=classificao_iqt)
 				listas_grupo.append(grupo)
-				self.mapa.add_child(grupo)
+				mapa.add_child(grupo)
 				grupos[classificao_iqt] = grupo
 			adicionar_linha_ao_mapa(line, grupo)
+		return listas_grupo
 
-		GroupedLayerControl(groups={"classificacao": listas_grupo}, collapsed=False).add_to(self.mapa)
+	def gerar_mapa_de_calor(
+		self, associador: Associador, modo: str = "pontos", resolucao: float = 250, estatistica: str = "distancia_media"
+	) -> folium.Map:
+		"""Gera um novo mapa de calor da distância das residências ao ponto de ônibus mais próximo.
 
-		return self.mapa
+		No modo 'pontos', cada residência vira um ponto do `HeatMap`, ponderado pela distância, e o HTML
+		cresce com a quantidade de residências. Nos modos 'quadrada' e 'hexagonal', as distâncias são
+		agregadas numa grade (ver `Associador.agregar_distancias_em_grade`) e apenas as células são
+		desenhadas, coloridas pela estatística escolhida, com a quantidade de residências e as
+		distâncias média e máxima no tooltip.
 
-	def gerar_mapa_de_calor(self, associador: Associador):
-		"""Função para gerar o mapa de calor."""
-		dados = associador.get_geodataframe_com_distancia()
-		pontos = [[row["latitude"], row["longitude"], row["distancia"]] for _, row in dados.iterrows()]
+		Args:
+			associador (Associador): Associador com as residências e os pontos de ônibus.
+			modo (str): 'pontos', 'quadrada' ou 'hexagonal'.
+			resolucao (float): Largura das células da grade, em metros.
+			estatistica (str): Estatística que colore as células: 'distancia_media', 'distancia_maxima' ou 'num_residencias'.
 
-		HeatMap(pontos, radius=25, blur=15, max_zoom=1).add_to(self.mapa_de_calor)
+		Returns:
+			folium.Map: Mapa de calor.
 
-		return self.mapa_de_calor
+		Raises:
+			ValueError: Se o modo ou a estatística forem desconhecidos.
+		"""
+		if modo not in MODOS_MAPA_CALOR:
+			raise ValueError(f"modo de mapa de calor desconhecido: {modo}. Use um de {MODOS_MAPA_CALOR}.")
+		if estatistica not in ESTATISTICAS_GRADE:
+			raise ValueError(f"estatística desconhecida: {estatistica}. Use uma de {ESTATISTICAS_GRADE}.")
+
+		mapa = self._inicializar_mapa()
+		if modo == "pontos":
+			dados = associador.get_geodataframe_com_distancia()
+			pontos = dados[["latitude", "longitude", "distancia"]].to_numpy(dtype=np.float64).tolist()
+			HeatMap(pontos, radius=25, blur=15, max_zoom=1).add_to(mapa)
+		else:
+			grade = associador.agregar_distancias_em_grade(resolucao, forma=modo).to_crs(4326)
+			adicionar_camada_grade(grade, mapa, estatistica)
+
+		self._mapa_de_calor = mapa
+		return mapa
 
 	def _get_informacoes_mapa(self):
 		"""Função para obter as informações do mapa."""
@@ -122,11 +263,14 @@ class MapaIQT:
 			print(f"Não foi encontrada nenhuma linha com o ID {id_linha}.")
 			return
 
-		linha_utm = linha.to_crs(epsg=31983)
+		if self.geometrias is not None:
+			linha_utm = self.geometrias.visao(CRS_METRICO).loc[[str(id_linha)]]
+		else:
+			linha_utm = linha.to_crs(CRS_METRICO).geometry
 
 		buffer_500m = linha_utm.buffer(500)
 
-		gdf_buffer = gpd.GeoDataFrame(geometry=buffer_500m, crs="EPSG:31983").to_crs(epsg=4326)
+		gdf_buffer = gpd.GeoDataFrame(geometry=buffer_500m, crs=CRS_METRICO).to_crs(epsg=4326)
 
 		fig, ax = plt.subplots(figsize=(10, 10))
 
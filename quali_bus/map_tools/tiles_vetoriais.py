@@ -0,0 +1,526 @@
+import gzip
+import json
+import math
+import sqlite3
+import struct
+from pathlib import Path
+from string import Template
+from typing import Iterator, Optional
+
+import geopandas as gpd
+import numpy as np
+import pandas as pd
+import shapely
+
+from ..data_analysis.classificar_indicadores import CLASSES_IQT, ClassificarIndicadores
+from ..utils.cores import cores_iqt
+from ..utils.geometrias import CRS_WEB_MERCATOR, RepositorioGeometrias, tolerancia_para_zoom
+
+ORIGEM_WEB_MERCATOR = 20037508.342789244
+TIPO_LINHA = 2
+TIPO_POLIGONO = 3
+COMANDO_MOVER = 1
+COMANDO_LINHA = 2
+COMANDO_FECHAR = 7
+
+MODELO_VISUALIZADOR = Template("""<!DOCTYPE html>
+<html lang="pt-BR">
+<head>
+	<meta charset="utf-8">
+	<title>$titulo</title>
+	<meta name="viewport" content="width=device-width, initial-scale=1">
+	<link rel="stylesheet" href="https://unpkg.com/maplibre-gl@4.7.1/dist/maplibre-gl.css">
+	<script src="https://unpkg.com/maplibre-gl@4.7.1/dist/maplibre-gl.js"></script>
+	<style>
+		html, body, #mapa { margin: 0; height: 100%; }
+		.legenda { position: absolute; bottom: 24px; left: 8px; background: white; padding: 6px 10px; font: 12px sans-serif; border-radius: 4px; }
+		.legenda span { display: inline-block; width: 12px; height: 3px; margin-right: 6px; vertical-align: middle; }
+	</style>
+</head>
+<body>
+<div id="mapa"></div>
+<div class="legenda">$legenda</div>
+<script>
+	const tiles = window.location.href.replace(/[^/]*$$/, "") + "$url_tiles";
+	const mapa = new maplibregl.Map({
+		container: "mapa",
+		bounds: $limites,
+		style: {
+			version: 8,
+			sources: {
+				base: {
+					type: "raster",
+					tiles: ["https://tile.openstreetmap.org/{z}/{x}/{y}.png"],
+					tileSize: 256,
+					attribution: "&copy; OpenStreetMap contributors"
+				},
+				qualibus: { type: "vector", tiles: [tiles], minzoom: $zoom_min, maxzoom: $zoom_max }
+			},
+			layers: [
+				{ id: "base", type: "raster", source: "base" },
+				{ id: "bairros", type: "fill", source: "qualibus", "source-layer": "bairros",
+					paint: { "fill-color": "white", "fill-opacity": 0.5 } },
+				{ id: "bairros-contorno", type: "line", source: "qualibus", "source-layer": "bairros",
+					paint: { "line-color": "black", "line-width": 0.7 } },
+				{ id: "rotas", type: "line", source: "qualibus", "source-layer": "rotas",
+					paint: { "line-color": ["get", "cor"], "line-width": 2.5 } }
+			]
+		}
+	});
+	mapa.on("click", "rotas", (evento) => {
+		const linhas = Object.entries(evento.features[0].properties)
+			.map(([chave, valor]) => "<tr><td><strong>" + chave + "</strong></td><td>" + valor + "</td></tr>").join("");
+		new maplibregl.Popup().setLngLat(evento.lngLat).setHTML("<table>" + linhas + "</table>").addTo(mapa);
+	});
+	mapa.on("mouseenter", "rotas", () => { mapa.getCanvas().style.cursor = "pointer"; });
+	mapa.on("mouseleave", "rotas", () => { mapa.getCanvas().style.cursor = ""; });
+</script>
+</body>
+</html>
+""")
+
+
+def _varints(valores: np.ndarray) -> bytes:
+	"""Codifica inteiros não negativos (até 2**35) como varints do protobuf, de forma vetorizada."""
+	valores = np.asarray(valores, dtype=np.uint64)
+	deslocamentos = np.arange(0, 35, 7, dtype=np.uint64)
+	grupos = ((valores[:, None] >> deslocamentos) & np.uint64(0x7F)).astype(np.uint8)
+	tamanhos = 1 + (valores[:, None] >= (np.uint64(1) << deslocamentos[1:])).sum(axis=1)
+	posicoes = np.arange(deslocamentos.size)
+	grupos[posicoes < (tamanhos[:, None] - 1)] |= 0x80
+	return grupos[posicoes < tamanhos[:, None]].tobytes()
+
+
+def _varint(valor: int) -> bytes:
+	"""Codifica um inteiro não negativo como varint do protobuf."""
+	saida = bytearray()
+	while valor > 0x7F:
+		saida.append((valor & 0x7F) | 0x80)
+		valor >>= 7
+	saida.append(valor)
+	return bytes(saida)
+
+
+def _campo_bytes(numero: int, dados: bytes) -> bytes:
+	"""Codifica um campo delimitado por tamanho (mensagens, textos e listas compactadas)."""
+	return _varint(numero << 3 | 2) + _varint(len(dados)) + dados
+
+
+def _campo_varint(numero: int, valor: int) -> bytes:
+	"""Codifica um campo inteiro."""
+	return _varint(numero << 3) + _varint(valor)
+
+
+def _zigzag(valores: np.ndarray) -> np.ndarray:
+	"""Mapeia inteiros com sinal para não negativos (0, -1, 1, -2, ... → 0, 1, 2, 3, ...)."""
+	valores = np.asarray(valores, dtype=np.int64)
+	return (valores << 1) ^ (valores >> 63)
+
+
+def _comando(identificador: int, quantidade: int) -> int:
+	"""Inteiro de comando da geometria do MVT."""
+	return identificador | (quantidade << 3)
+
+
+def _comandos_parte(coordenadas: np.ndarray, cursor: np.ndarray, anel: bool) -> list[np.ndarray]:
+	"""
+	Codifica uma linha ou um anel, já em coordenadas inteiras do tile, a partir da posição do cursor.
+
+	Vértices repetidos (comuns após o arredondamento para a grade do tile) são removidos. Os anéis
+	são gravados sem o vértice de fechamento e, se o arredondamento os deixou sem área, descartados.
+	Retorna uma lista vazia quando a parte não tem vértices suficientes.
+	"""
+	mantidos = np.r_[True, (np.diff(coordenadas, axis=0) != 0).any(axis=1)]
+	coordenadas = coordenadas[mantidos]
+	if anel:
+		if len(coordenadas) > 1 and (coordenadas[0] == coordenadas[-1]).all():
+			coordenadas = coordenadas[:-1]
+		if len(coordenadas) < 3:
+			return []
+	elif len(coordenadas) < 2:
+		return []
+
+	deslocamentos = _zigzag(np.diff(np.vstack([cursor, coordenadas]), axis=0)).ravel()
+	comandos = [
+		np.array([_comando(COMANDO_MOVER, 1)]),
+		deslocamentos[:2],
+		np.array([_comando(COMANDO_LINHA, len(coordenadas) - 1)]),
+		deslocamentos[2:],
+	]
+	if anel:
+		comandos.append(np.array([_comando(COMANDO_FECHAR, 1)]))
+	cursor[:] = coordenadas[-1]
+	return comandos
+
+
+def _area_anel(coordenadas: np.ndarray) -> int:
+	"""Área com sinal (fórmula do agrimensor, dobrada) de um anel em coordenadas do tile, com o eixo y para baixo."""
+	x, y = coordenadas[:, 0], coordenadas[:, 1]
+	return int((x * np.roll(y, -1) - np.roll(x, -1) * y).sum())
+
+
+def _comandos_geometria(geometria: shapely.Geometry, tipo: int) -> Optional[np.ndarray]:
+	"""
+	Codifica uma geometria, em coordenadas inteiras do tile, como a sequência de comandos do MVT.
+
+	Apenas as partes do tipo da camada são mantidas (o recorte pode produzir pontos soltos). Nos
+	polígonos, o anel externo é orientado com área positiva e os internos com área negativa, como
+	exige a especificação.
+
+	Args:
+		geometria (shapely.Geometry): Geometria já transformada para a grade do tile.
+		tipo (int): `TIPO_LINHA` ou `TIPO_POLIGONO`.
+
+	Returns:
+		np.ndarray | None: Comandos e parâmetros, ou None se nada restar da geometria.
+	"""
+	cursor = np.zeros(2, dtype=np.int64)
+	comandos = []
+	for parte in shapely.get_parts(geometria):
+		if tipo == TIPO_LINHA and isinstance(parte, shapely.LineString):
+			comandos += _comandos_parte(shapely.get_coordinates(parte).astype(np.int64), cursor, anel=False)
+		elif tipo == TIPO_POLIGONO and isinstance(parte, shapely.Polygon):
+			for indice, anel in enumerate([parte.exterior, *parte.interiors]):
+				coordenadas = shapely.get_coordinates(anel).astype(np.int64)
+				area = _area_anel(coordenadas)
+				if area == 0:
+					if indice == 0:
+						break
+					continue
+				if (area > 0) != (indice == 0):
+					coordenadas = coordenadas[::-1]
+				comandos += _comandos_parte(coordenadas, cursor, anel=True)
+	return np.concatenate(comandos) if comandos else None
+
+
+def _valores_atributos(atributos: pd.DataFrame) -> list[dict]:
+	"""Converte os atributos em dicionários de tipos nativos, omitindo os valores ausentes."""
+	registros = []
+	for registro in atributos.to_dict("records"):
+		valores = {}
+		for chave, valor in registro.items():
+			if valor is None or (pd.api.types.is_scalar(valor) and not isinstance(valor, str) and pd.isna(valor)):
+				continue
+			if isinstance(valor, (bool, np.bool_)):
+				valores[str(chave)] = bool(valor)
+			elif isinstance(valor, (int, np.integer)):
+				valores[str(chave)] = int(valor)
+			elif isinstance(valor, (float, np.floating)):
+				valores[str(chave)] = float(valor)
+			else:
+				valores[str(chave)] = str(valor)
+		registros.append(valores)
+	return registros
+
+
+def _codificar_valor(valor: bool | int | float | str) -> bytes:
+	"""Codifica a mensagem Value do MVT."""
+	if isinstance(valor, bool):
+		return _campo_varint(7, int(valor))
+	if isinstance(valor, int):
+		return _campo_varint(6, int(_zigzag(np.array([valor]))[0]))
+	if isinstance(valor, float):
+		return _varint(3 << 3 | 1) + struct.pack("<d", valor)
+	return _campo_bytes(1, valor.encode())
+
+
+def _codificar_camada(nome: str, feicoes: list[tuple[int, np.ndarray, dict]], tipo: int, extensao: int) -> bytes:
+	"""
+	Codifica a mensagem Layer do MVT, com as tabelas de chaves e valores compartilhadas pelas feições.
+
+	Args:
+		nome (str): Nome da camada.
+		feicoes (list[tuple[int, np.ndarray, dict]]): Identificador, comandos da geometria e atributos de cada feição.
+		tipo (int): Tipo de geometria das feições.
+		extensao (int): Tamanho da grade do tile.
+
+	Returns:
+		bytes: Camada codificada.
+	"""
+	chaves: dict[str, int] = {}
+	valores: dict[tuple[type, bool | int | float | str], int] = {}
+	corpo = bytearray()
+	for identificador, comandos, atributos in feicoes:
+		etiquetas = []
+		for chave, valor in atributos.items():
+			etiquetas.append(chaves.setdefault(chave, len(chaves)))
+			etiquetas.append(valores.setdefault((type(valor), valor), len(valores)))
+		feicao = _campo_varint(1, identificador) + _campo_bytes(2, _varints(np.array(etiquetas))) + _campo_varint(3, tipo)
+		corpo += _campo_bytes(2, feicao + _campo_bytes(4, _varints(comandos)))
+
+	camada = _campo_varint(15, 2) + _campo_bytes(1, nome.encode()) + bytes(corpo)
+	camada += b"".join(_campo_bytes(3, chave.encode()) for chave in chaves)
+	camada += b"".join(_campo_bytes(4, _codificar_valor(valor)) for _, valor in valores)
+	return camada + _campo_varint(5, extensao)
+
+
+class ExportadorTilesVetoriais:
+	"""
+	Exporta as rotas classificadas pelo IQT e os bairros como uma pirâmide de Mapbox Vector Tiles (MVT).
+
+	Diferente dos mapas do `MapaIQT`, que embutem todas as geometrias num único HTML, os tiles são
+	arquivos pequenos por nível de zoom e posição, e o navegador baixa apenas os que estão na tela.
+	Em cada zoom, as geometrias são simplificadas com a tolerância de `tolerancia_para_zoom` (as
+	rotas pelo `RepositorioGeometrias`, que guarda as versões simplificadas; os bairros como
+	cobertura, mantendo as divisas) e recortadas pelos tiles com uma margem, para que as linhas não
+	apresentem falhas nas bordas.
+
+	A pirâmide pode ser gravada num diretório `{z}/{x}/{y}.pbf`, acompanhado de um visualizador HTML
+	com o MapLibre GL que funciona servindo o diretório com qualquer servidor estático (por exemplo,
+	`python -m http.server`), ou num arquivo MBTiles.
+
+	Attributes:
+		zoom_min (int): Menor nível de zoom gerado.
+		zoom_max (int): Maior nível de zoom gerado; acima dele, o visualizador amplia os tiles deste nível.
+		extensao (int): Tamanho da grade de coordenadas inteiras de cada tile.
+		margem (int): Margem, em unidades da grade, incluída no recorte de cada tile.
+		pixels_simplificacao (float): Desvio máximo da simplificação, em pixels do nível de zoom.
+	"""
+
+	def __init__(
+		self,
+		rotas: gpd.GeoDataFrame,
+		bairros: Optional[gpd.GeoDataFrame] = None,
+		geometrias: Optional[RepositorioGeometrias] = None,
+		zoom_min: int = 10,
+		zoom_max: int = 14,
+		extensao: int = 4096,
+		margem: int = 64,
+		pixels_simplificacao: float = 0.5,
+	):
+		"""
+		Inicializa o exportador.
+
+		Args:
+			rotas (gpd.GeoDataFrame): Rotas com 'id_linha' e 'iqt', no formato de `CalcularIndicadores.dados_completos`.
+				Cada rota recebe nos tiles os atributos 'id_linha', 'iqt', 'classe' e 'cor'.
+			bairros (gpd.GeoDataFrame | None): Bairros da cidade, com CRS definido. Todos os atributos são exportados.
+			geometrias (RepositorioGeometrias | None): Repositório das geometrias das linhas. Se None, é criado a partir de `rotas`.
+			zoom_min (int): Menor nível de zoom gerado.
+			zoom_max (int): Maior nível de zoom gerado.
+			extensao (int): Tamanho da grade de cada tile.
+			margem (int): Margem do recorte, em unidades da grade.
+			pixels_simplificacao (float): Desvio máximo da simplificação, em pixels.
+
+		Raises:
+			ValueError: Se os níveis de zoom forem inválidos ou faltarem as colunas 'id_linha' ou 'iqt'.
+		"""
+		if not 0 <= zoom_min <= zoom_max:
+			raise ValueError(f"níveis de zoom inválidos: {zoom_min} a {zoom_max}")
+		colunas_faltando = [coluna for coluna in ["id_linha", "iqt"] if coluna not in rotas.columns]
+		if colunas_faltando:
+			raise ValueError(f"as rotas estão faltando colunas: {colunas_faltando}")
+
+		self.zoom_min = zoom_min
+		self.zoom_max = zoom_max
+		self.extensao = extensao
+		self.margem = margem
+		self.pixels_simplificacao = pixels_simplificacao
+
+		iqts = rotas["iqt"].to_numpy(dtype=np.float64)
+		atributos_rotas = pd.DataFrame({
+			"id_linha": rotas["id_linha"].astype(str).to_numpy(),
+			"iqt": np.round(iqts, 2),
+			"classe": np.asarray(CLASSES_IQT, dtype=object)[ClassificarIndicadores().classificacao_iqt_indices(iqts)],
+			"cor": cores_iqt(iqts),
+		})
+		self._ids_rotas = atributos_rotas["id_linha"].to_numpy()
+		self._geometrias_rotas = geometrias if geometrias is not None else RepositorioGeometrias.de_geodataframe(rotas)
+		self._camadas = {"rotas": (TIPO_LINHA, _valores_atributos(atributos_rotas), self._simplificar_rotas)}
+
+		if bairros is not None:
+			bairros = bairros.reset_index(drop=True)
+			self._geometrias_bairros = RepositorioGeometrias(bairros.geometry)
+			atributos_bairros = pd.DataFrame(bairros.drop(columns=bairros.geometry.name))
+			self._camadas["bairros"] = (TIPO_POLIGONO, _valores_atributos(atributos_bairros), self._simplificar_bairros)
+
+	def _simplificar_rotas(self, tolerancia: float) -> np.ndarray:
+		"""Geometrias das rotas em EPSG:3857, simplificadas, na ordem dos atributos."""
+		return self._geometrias_rotas.simplificada(tolerancia, CRS_WEB_MERCATOR).reindex(self._ids_rotas).to_numpy()
+
+	def _simplificar_bairros(self, tolerancia: float) -> np.ndarray:
+		"""Geometrias dos bairros em EPSG:3857, simplificadas em conjunto."""
+		return self._geometrias_bairros.simplificada(tolerancia, CRS_WEB_MERCATOR, cobertura=True).to_numpy()
+
+	def _tiles_zoom(self, zoom: int) -> dict[tuple[int, int], dict[str, bytes]]:
+		"""Gera as camadas codificadas de todos os tiles não vazios de um nível de zoom."""
+		tamanho = 2 * ORIGEM_WEB_MERCATOR / 2**zoom
+		folga = tamanho * self.margem / self.extensao
+		escala = self.extensao / tamanho
+		tolerancia = tolerancia_para_zoom(zoom, self.pixels_simplificacao)
+
+		tiles: dict[tuple[int, int], dict[str, bytes]] = {}
+		for nome, (tipo, atributos, simplificar) in self._camadas.items():
+			geometrias = simplificar(tolerancia)
+			validas = np.flatnonzero(~(shapely.is_missing(geometrias) | shapely.is_empty(geometrias)))
+			if validas.size == 0:
+				continue
+			arvore = shapely.STRtree(geometrias[validas])
+
+			xmin, ymin, xmax, ymax = shapely.total_bounds(geometrias[validas])
+			colunas = np.arange(
+				max(0, math.floor((xmin + ORIGEM_WEB_MERCATOR - folga) / tamanho)),
+				min(2**zoom - 1, math.floor((xmax + ORIGEM_WEB_MERCATOR + folga) / tamanho)) + 1,
+			)
+			linhas = np.arange(
+				max(0, math.floor((ORIGEM_WEB_MERCATOR - ymax - folga) / tamanho)),
+				min(2**zoom - 1, math.floor((ORIGEM_WEB_MERCATOR - ymin + folga) / tamanho)) + 1,
+			)
+			tx, ty = (indices.ravel() for indices in np.meshgrid(colunas, linhas))
+			esquerda = tx * tamanho - ORIGEM_WEB_MERCATOR
+			topo = ORIGEM_WEB_MERCATOR - ty * tamanho
+			caixas = shapely.box(esquerda - folga, topo - tamanho - folga, esquerda + tamanho + folga, topo + folga)
+			indices_tiles, indices_geometrias = arvore.query(caixas, predicate="intersects")
+			ordem = np.argsort(indices_tiles, kind="stable")
+			indices_tiles, indices_geometrias = indices_tiles[ordem], indices_geometrias[ordem]
+			tiles_ocupados, inicios = np.unique(indices_tiles, return_index=True)
+
+			for indice_tile, grupo in zip(tiles_ocupados, np.split(indices_geometrias, inicios[1:]), strict=True):
+				selecionadas = validas[np.sort(grupo)]
+				recortadas = shapely.clip_by_rect(geometrias[selecionadas], *shapely.bounds(caixas[indice_tile]))
+				x0, y0 = esquerda[indice_tile], topo[indice_tile]
+				na_grade = shapely.transform(recortadas, lambda c, x0=x0, y0=y0: np.round(np.c_[(c[:, 0] - x0) * escala, (y0 - c[:, 1]) * escala]))
+
+				feicoes = []
+				for posicao, geometria in zip(selecionadas, na_grade, strict=True):
+					comandos = _comandos_geometria(geometria, tipo)
+					if comandos is not None:
+						feicoes.append((int(posicao) + 1, comandos, atributos[posicao]))
+				if feicoes:
+					chave = (int(tx[indice_tile]), int(ty[indice_tile]))
+					tiles.setdefault(chave, {})[nome] = _codificar_camada(nome, feicoes, tipo, self.extensao)
+		return tiles
+
+	def gerar_tiles(self) -> Iterator[tuple[int, int, int, bytes]]:
+		"""
+		Gera os tiles não vazios de todos os níveis de zoom.
+
+		Yields:
+			tuple[int, int, int, bytes]: Zoom, coluna, linha (esquema XYZ, com a linha 0 no norte) e o tile MVT sem compressão.
+		"""
+		for zoom in range(self.zoom_min, self.zoom_max + 1):
+			for (x, y), camadas in sorted(self._tiles_zoom(zoom).items()):
+				yield zoom, x, y, b"".join(_campo_bytes(3, camada) for camada in camadas.values())
+
+	def limites(self) -> list[float]:
+		"""Retorna os limites [oeste, sul, leste, norte], em graus, de todas as camadas exportadas."""
+		series = [self._geometrias_rotas.visao(4326).reindex(self._ids_rotas)]
+		if "bairros" in self._camadas:
+			series.append(self._geometrias_bairros.visao(4326))
+		return [float(valor) for valor in shapely.total_bounds(np.concatenate([serie.to_numpy() for serie in series]))]
+
+	def metadados(self) -> dict:
+		"""Retorna os metadados da pirâmide (zooms, limites e campos de cada camada), no formato do MBTiles."""
+		camadas = []
+		for nome, (_, atributos, _) in self._camadas.items():
+			campos = {}
+			for registro in atributos:
+				for chave, valor in registro.items():
+					campos.setdefault(chave, "String" if isinstance(valor, str) else "Boolean" if isinstance(valor, bool) else "Number")
+			camadas.append({"id": nome, "fields": campos, "minzoom": self.zoom_min, "maxzoom": self.zoom_max})
+
+		oeste, sul, leste, norte = self.limites()
+		return {
+			"name": "quali_bus",
+			"format": "pbf",
+			"minzoom": self.zoom_min,
+			"maxzoom": self.zoom_max,
+			"bounds": [oeste, sul, leste, norte],
+			"center": [(oeste + leste) / 2, (sul + norte) / 2, self.zoom_min],
+			"vector_layers": camadas,
+		}
+
+	def exportar_diretorio(self, diretorio: str | Path, visualizador: bool = True) -> Path:
+		"""
+		Grava a pirâmide em `{diretorio}/{z}/{x}/{y}.pbf`, com os metadados em 'metadata.json'.
+
+		Os tiles são gravados sem compressão, para que funcionem em servidores estáticos que não
+		informam a codificação gzip.
+
+		Args:
+			diretorio (str | Path): Diretório de destino.
+			visualizador (bool): Se True, grava também o visualizador 'index.html'.
+
+		Returns:
+			Path: Diretório de destino.
+		"""
+		diretorio = Path(diretorio)
+		quantidade = 0
+		for zoom, x, y, tile in self.gerar_tiles():
+			arquivo = diretorio / str(zoom) / str(x) / f"{y}.pbf"
+			arquivo.parent.mkdir(parents=True, exist_ok=True)
+			arquivo.write_bytes(tile)
+			quantidade += 1
+
+		diretorio.mkdir(parents=True, exist_ok=True)
+		(diretorio / "metadata.json").write_text(json.dumps(self.metadados(), ensure_ascii=False, indent=2), encoding="utf-8")
+		if visualizador:
+			self.gerar_visualizador(diretorio / "index.html")
+		print(f"{quantidade} tile(s) gravado(s) em {diretorio}.")
+		return diretorio
+
+	def exportar_mbtiles(self, caminho: str | Path) -> Path:
+		"""
+		Grava a pirâmide num arquivo MBTiles (SQLite), com os tiles comprimidos em gzip. Um arquivo existente é substituído.
+
+		Args:
+			caminho (str | Path): Caminho do arquivo.
+
+		Returns:
+			Path: Caminho do arquivo.
+		"""
+		caminho = Path(caminho)
+		caminho.unlink(missing_ok=True)
+		metadados = self.metadados()
+		conexao = sqlite3.connect(caminho)
+		try:
+			with conexao:
+				conexao.execute("CREATE TABLE metadata (name TEXT, value TEXT)")
+				conexao.execute("CREATE TABLE tiles (zoom_level INTEGER, tile_column INTEGER, tile_row INTEGER, tile_data BLOB)")
+				conexao.execute("CREATE UNIQUE INDEX tile_index ON tiles (zoom_level, tile_column, tile_row)")
+				conexao.executemany(
+					"INSERT INTO metadata VALUES (?, ?)",
+					[
+						("name", metadados["name"]),
+						("format", metadados["format"]),
+						("minzoom", str(metadados["minzoom"])),
+						("maxzoom", str(metadados["maxzoom"])),
+						("bounds", ",".join(map(str, metadados["bounds"]))),
+						("center", ",".join(map(str, metadados["center"]))),
+						("json", json.dumps({"vector_layers": metadados["vector_layers"]}, ensure_ascii=False)),
+					],
+				)
+				conexao.executemany(
+					"INSERT INTO tiles VALUES (?, ?, ?, ?)",
+					((zoom, x, 2**zoom - 1 - y, gzip.compress(tile)) for zoom, x, y, tile in self.gerar_tiles()),
+				)
+		finally:
+			conexao.close()
+		return caminho
+
+	def gerar_visualizador(self, caminho: str | Path, url_tiles: str = "{z}/{x}/{y}.pbf", titulo: str = "QualiBus - IQT") -> Path:
+		"""
+		Grava um visualizador HTML com o MapLibre GL para os tiles exportados em diretório.
+
+		Args:
+			caminho (str | Path): Caminho do arquivo HTML.
+			url_tiles (str): Modelo da URL dos tiles, relativo ao HTML.
+			titulo (str): Título da página.
+
+		Returns:
+			Path: Caminho do arquivo HTML.
+		"""
+		oeste, sul, leste, norte = self.limites()
+		paleta = dict(zip(CLASSES_IQT, cores_iqt(np.array([0.5, 1.5, 2.5, 3.5])), strict=True))
+		legenda = "<br>".join(f'<span style="background:{cor}"></span>{classe}' for classe, cor in reversed(paleta.items()))
+		html = MODELO_VISUALIZADOR.substitute(
+			titulo=titulo,
+			legenda=legenda,
+			url_tiles=url_tiles,
+			limites=json.dumps([[oeste, sul], [leste, norte]]),
+			zoom_min=self.zoom_min,
+			zoom_max=self.zoom_max,
+		)
+		caminho = Path(caminho)
+		caminho.write_text(html, encoding="utf-8")
+		return caminho
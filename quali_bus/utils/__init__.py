@@ -1,4 +1,7 @@
 from .associador import *
+from .cache import *
 from .config import *
 from .cores import *
+from .geometrias import *
 from .modelos import *
+from .tabelas import *
@@ -1,30 +1,211 @@
-from typing import Optional
+from pathlib import Path
+from typing import Callable, Iterator, Optional, TypeVar
 
 import geopandas as gpd
 import numpy as np
 import pandas as pd
-from shapely.geometry import LineString, Point
+import shapely
+from pyproj import Transformer
+from shapely import STRtree
+
+from .tabelas import ler_tabela_em_blocos
+
+T = TypeVar("T")
+
+FORMAS_GRADE = ("quadrada", "hexagonal")
+ESTATISTICAS_GRADE = ("distancia_media", "distancia_maxima", "num_residencias")
+
+
+def _indices_hexagonos(x: np.ndarray, y: np.ndarray, raio: float) -> tuple[np.ndarray, np.ndarray]:
+	"""
+	Calcula, de forma vetorizada, o hexágono (pontudo no topo) que contém cada ponto, em coordenadas axiais.
+
+	Args:
+		x (np.ndarray): Coordenadas x dos pontos.
+		y (np.ndarray): Coordenadas y dos pontos.
+		raio (float): Distância do centro aos vértices dos hexágonos.
+
+	Returns:
+		tuple[np.ndarray, np.ndarray]: Coordenadas axiais (q, r) do hexágono de cada ponto.
+	"""
+	q = (np.sqrt(3) / 3 * x - y / 3) / raio
+	r = (2 / 3 * y) / raio
+	s = -q - r
+	q_arredondado, r_arredondado, s_arredondado = np.round(q), np.round(r), np.round(s)
+	dq, dr, ds = np.abs(q_arredondado - q), np.abs(r_arredondado - r), np.abs(s_arredondado - s)
+
+	corrigir_q = (dq > dr) & (dq > ds)
+	corrigir_r = ~corrigir_q & (dr > ds)
+	q_arredondado = np.where(corrigir_q, -r_arredondado - s_arredondado, q_arredondado)
+	r_arredondado = np.where(corrigir_r, -q_arredondado - s_arredondado, r_arredondado)
+	return q_arredondado.astype(np.int64), r_arredondado.astype(np.int64)
+
+
+def _geometrias_celulas(colunas: np.ndarray, linhas: np.ndarray, resolucao: float, forma: str) -> np.ndarray:
+	"""Constrói os polígonos das células da grade a partir dos seus índices."""
+	if forma == "quadrada":
+		return shapely.box(colunas * resolucao, linhas * resolucao, (colunas + 1) * resolucao, (linhas + 1) * resolucao)
+
+	raio = resolucao / np.sqrt(3)
+	centro_x = raio * np.sqrt(3) * (colunas + linhas / 2)
+	centro_y = raio * 1.5 * linhas
+	angulos = np.radians(30 + 60 * np.arange(7))
+	vertices = np.stack([centro_x[:, None] + raio * np.cos(angulos), centro_y[:, None] + raio * np.sin(angulos)], axis=-1)
+	return shapely.polygons(vertices)
+
+
+class MatrizIncidencia:
+	"""
+	Matriz esparsa de incidência entre linhas de ônibus e pontos de ônibus.
+
+	A matriz é armazenada em formato de coordenadas (COO): cada par (`indices_linhas[k]`, `indices_pontos[k]`)
+	indica que o ponto de ônibus pertence à linha. Produtos matriz-vetor são resolvidos com `np.bincount`,
+	permitindo agregar valores por ponto de ônibus para todas as linhas de uma só vez.
+
+	Attributes:
+		ids_linhas (np.ndarray): Identificadores das linhas, na ordem das linhas da matriz.
+		indices_linhas (np.ndarray): Índice da linha de cada elemento não nulo.
+		indices_pontos (np.ndarray): Índice do ponto de ônibus de cada elemento não nulo.
+		num_pontos (int): Quantidade de pontos de ônibus (colunas da matriz).
+	"""
+
+	def __init__(self, ids_linhas: np.ndarray, indices_linhas: np.ndarray, indices_pontos: np.ndarray, num_pontos: int):
+		"""
+		Inicializa a matriz a partir dos pares (linha, ponto), descartando pares repetidos.
+
+		Args:
+			ids_linhas (np.ndarray): Identificadores únicos das linhas.
+			indices_linhas (np.ndarray): Índice em `ids_linhas` de cada par.
+			indices_pontos (np.ndarray): Índice do ponto de ônibus de cada par.
+			num_pontos (int): Quantidade total de pontos de ônibus.
+		"""
+		pares = np.unique(np.asarray(indices_linhas, dtype=np.int64) * num_pontos + np.asarray(indices_pontos, dtype=np.int64))
+
+		self.ids_linhas = ids_linhas
+		self.num_pontos = num_pontos
+		self.indices_linhas, self.indices_pontos = np.divmod(pares, max(num_pontos, 1))
+
+	@property
+	def num_linhas(self) -> int:
+		"""Quantidade de linhas de ônibus da matriz."""
+		return len(self.ids_linhas)
+
+	def produto(self, valores_pontos: np.ndarray) -> np.ndarray:
+		"""
+		Multiplica a matriz por um vetor de valores por ponto de ônibus.
+
+		Args:
+			valores_pontos (np.ndarray): Vetor com um valor por ponto de ônibus, ou matriz (pontos × k).
+
+		Returns:
+			np.ndarray: Soma dos valores dos pontos de cada linha, com formato (linhas,) ou (linhas × k).
+		"""
+		valores_pontos = np.asarray(valores_pontos, dtype=np.float64)
+		if valores_pontos.ndim == 1:
+			return np.bincount(self.indices_linhas, weights=valores_pontos[self.indices_pontos], minlength=self.num_linhas)
+
+		return np.column_stack([self.produto(coluna) for coluna in valores_pontos.T])
+
+	def para_dicionario(self) -> dict[str, set[int]]:
+		"""Converte a matriz no dicionário {id_linha: índices dos pontos de ônibus}."""
+		grupos = np.split(self.indices_pontos, np.searchsorted(self.indices_linhas, np.arange(1, self.num_linhas)))
+		return {nome_linha: set(pontos.tolist()) for nome_linha, pontos in zip(self.ids_linhas, grupos, strict=True)}
 
 
 class Associador:
 	MAX_DISTANCE = 1000  # metros - distância máxima aceitável
+	TOLERANCIA_LINHA = 50  # metros - distância máxima entre um ponto de ônibus e o traçado da linha
 	REQUIRED_COLUMNS = {"latitude", "longitude"}
+	BYTES_POR_RESIDENCIA = 512  # estimativa de memória por residência processada em um bloco
+	LIMITES_CURVA_COBERTURA = tuple(range(50, MAX_DISTANCE + 1, 50))  # metros - pontos padrão da curva de cobertura
 
-	def __init__(self, pontos_onibus: pd.DataFrame, linhas: gpd.GeoDataFrame, residencias: pd.DataFrame, init_crs: str | int, target_crs: str | int):
+	def __init__(
+		self, pontos_onibus: pd.DataFrame, linhas: gpd.GeoDataFrame, residencias: Optional[pd.DataFrame], init_crs: str | int, target_crs: str | int
+	):
 		"""
 		Inicializa a classe com os dados necessários.
 
 		Args:
 			pontos_onibus (pd.DataFrame): DataFrame com coordenadas dos pontos de ônibus
 			linhas (pd.DataFrame): DataFrame com as linhas de ônibus
-			residencias (pd.DataFrame): DataFrame com coordenadas das residências
+			residencias (pd.DataFrame | None): DataFrame com coordenadas das residências. Pode ser None quando as
+				residências forem lidas em blocos por `consolidar_associacoes_em_blocos`.
 			init_crs (str): CRS inicial dos dados geoespaciais
 			target_crs (str): CRS projetado dos dados geoespaciais
 		"""
+		self.init_crs = init_crs
+		self.target_crs = target_crs
+
+		self._cache: dict[tuple, object] = {}
+		self._acertos_cache = 0
+		self._falhas_cache = 0
+		self._arvore_pontos_onibus: Optional[STRtree] = None
+
 		self.gdf_residencias, self.gdf_pontos_onibus = self._criar_geodataframes(residencias, pontos_onibus, init_crs, target_crs)
 		self.linhas = linhas.copy()
 
-		self.coords_residencias, self.coords_pontos_onibus = self._extrair_coordenadas()
+	@property
+	def gdf_residencias(self) -> Optional[gpd.GeoDataFrame]:
+		"""GeoDataFrame das residências. Atribuir um novo valor invalida as associações em cache."""
+		return self._gdf_residencias
+
+	@gdf_residencias.setter
+	def gdf_residencias(self, gdf_residencias: Optional[gpd.GeoDataFrame]):
+		self._gdf_residencias = gdf_residencias
+		self.coords_residencias = self._coordenadas(gdf_residencias)
+		self._invalidar_cache("residencias_pontos", "geodataframe_distancia", "grade_distancias")
+
+	@property
+	def gdf_pontos_onibus(self) -> gpd.GeoDataFrame:
+		"""GeoDataFrame dos pontos de ônibus. Atribuir um novo valor invalida todas as associações em cache."""
+		return self._gdf_pontos_onibus
+
+	@gdf_pontos_onibus.setter
+	def gdf_pontos_onibus(self, gdf_pontos_onibus: gpd.GeoDataFrame):
+		self._gdf_pontos_onibus = gdf_pontos_onibus
+		self.coords_pontos_onibus = self._coordenadas(gdf_pontos_onibus)
+		self._arvore_pontos_onibus = None
+		self._invalidar_cache()
+
+	@property
+	def linhas(self) -> gpd.GeoDataFrame:
+		"""GeoDataFrame das linhas de ônibus. Atribuir um novo valor invalida a associação entre pontos e linhas."""
+		return self._linhas
+
+	@linhas.setter
+	def linhas(self, linhas: gpd.GeoDataFrame):
+		self._linhas = linhas
+		self._invalidar_cache("pontos_linhas")
+
+	@property
+	def estatisticas_cache(self) -> dict[str, int]:
+		"""Retorna a quantidade de acertos, falhas e itens armazenados no cache de associações."""
+		return {"acertos": self._acertos_cache, "falhas": self._falhas_cache, "itens": len(self._cache)}
+
+	def limpar_cache(self):
+		"""Descarta todas as associações em cache, por exemplo após alterar os dados in-place."""
+		self._invalidar_cache()
+
+	def _invalidar_cache(self, *etapas: str):
+		"""Remove do cache as entradas das etapas informadas, ou todas as entradas se nenhuma for informada."""
+		if not hasattr(self, "_cache"):
+			return
+		if not etapas:
+			self._cache.clear()
+			return
+		for chave in [chave for chave in self._cache if chave[0] in etapas]:
+			del self._cache[chave]
+
+	def _memorizar(self, chave: tuple, calcular: Callable[[], T]) -> T:
+		"""Retorna o valor em cache para a chave, calculando-o e armazenando-o na primeira chamada."""
+		if chave in self._cache:
+			self._acertos_cache += 1
+			return self._cache[chave]  # type: ignore
+
+		self._falhas_cache += 1
+		valor = calcular()
+		self._cache[chave] = valor
+		return valor
 
 	def _verificar_formato_coordenadas(self, df: pd.DataFrame) -> bool:
 		"""Verifica se as coordenadas estão no formato decimal padrão."""
@@ -39,100 +220,167 @@ class Associador:
 		Returns:
 			Tuple[np.ndarray, np.ndarray]: Arrays com coordenadas das residências e pontos de ônibus
 		"""
-		if isinstance(self.gdf_pontos_onibus, gpd.GeoDataFrame) and isinstance(self.gdf_residencias, gpd.GeoDataFrame):
-			coords_residencias = np.array([[geom.centroid.x, geom.centroid.y] for geom in self.gdf_residencias.geometry])
+		return self._coordenadas(self.gdf_residencias), self._coordenadas(self.gdf_pontos_onibus)
 
-			coords_pontos_onibus = np.array([[geom.centroid.x, geom.centroid.y] for geom in self.gdf_pontos_onibus.geometry])
+	def _coordenadas(self, gdf: Optional[gpd.GeoDataFrame]) -> Optional[np.ndarray]:
+		"""Extrai as coordenadas dos centróides de um GeoDataFrame como array NumPy."""
+		if not isinstance(gdf, gpd.GeoDataFrame):
+			return None
 
-			return coords_residencias, coords_pontos_onibus
-		return None, None
+		geometrias = np.asarray(gdf.geometry.values)
+		if not (shapely.get_type_id(geometrias) == shapely.GeometryType.POINT).all():
+			geometrias = shapely.centroid(geometrias)
+		return np.column_stack([shapely.get_x(geometrias), shapely.get_y(geometrias)])
 
-	def _criar_pontos(self, df: pd.DataFrame) -> gpd.GeoSeries:
-		"""Função responsável por criar a geometria dos dados de residencias e pontos de onibus."""
-		return gpd.GeoSeries([Point(xy) for xy in zip(df["longitude"], df["latitude"])])
+	def _criar_pontos(self, df: pd.DataFrame, init_crs: str | int, target_crs: str | int) -> gpd.GeoSeries:
+		"""
+		Função responsável por criar a geometria dos dados de residencias e pontos de onibus.
+
+		As coordenadas são projetadas em lote com o pyproj antes da criação dos pontos, de modo que as
+		geometrias são construídas uma única vez, já no CRS projetado.
+		"""
+		transformador = Transformer.from_crs(init_crs, target_crs, always_xy=True)
+		x, y = transformador.transform(df["longitude"].to_numpy(dtype=np.float64), df["latitude"].to_numpy(dtype=np.float64))
+		return gpd.GeoSeries(gpd.points_from_xy(x, y), crs=target_crs)
 
-	def _verificar_formato(self, residencias: pd.DataFrame, pontos_onibus: pd.DataFrame):
+	def _verificar_formato(self, residencias: Optional[pd.DataFrame], pontos_onibus: pd.DataFrame):
 		"""Função responsável por verificar o formato dos dados recebidos."""
-		if not self._verificar_formato_coordenadas(residencias):
+		if residencias is not None and not self._verificar_formato_coordenadas(residencias):
 			raise ValueError("Coordenadas dos pontos de residências estão em formato incorreto!")
 
 		if not self._verificar_formato_coordenadas(pontos_onibus):
 			raise ValueError("Coordenadas dos pontos de ônibus estão em formato incorreto!")
 
-	def _formatar_geodataframes(self, data: pd.DataFrame, geometry: gpd.GeoSeries, init_crs: str | int, target_crs: str | int):
-		gdf = gpd.GeoDataFrame(data=data, geometry=geometry, crs=init_crs).to_crs(target_crs)
+	def _formatar_geodataframes(self, data: pd.DataFrame, init_crs: str | int, target_crs: str | int):
+		gdf = gpd.GeoDataFrame(data=data, geometry=self._criar_pontos(data, init_crs, target_crs))
 		gdf.reset_index(inplace=True, names="indice")
 		return gdf
 
 	def _criar_geodataframes(
-		self, df_residencias: pd.DataFrame, df_pontos_onibus: pd.DataFrame, init_crs: str | int, target_crs: str | int
-	) -> tuple[gpd.GeoDataFrame, gpd.GeoDataFrame]:
+		self, df_residencias: Optional[pd.DataFrame], df_pontos_onibus: pd.DataFrame, init_crs: str | int, target_crs: str | int
+	) -> tuple[Optional[gpd.GeoDataFrame], gpd.GeoDataFrame]:
 		"""Converte DataFrames para GeoDataFrames."""
-		residencias = df_residencias.copy()
-
-		self._verificar_formato(residencias, df_pontos_onibus)
+		self._verificar_formato(df_residencias, df_pontos_onibus)
 
-		geometry_residencias = self._criar_pontos(residencias)
-		geometry_onibus = self._criar_pontos(df_pontos_onibus)
+		gdf_residencias = None
+		if df_residencias is not None:
+			gdf_residencias = self._formatar_geodataframes(df_residencias.copy(), init_crs, target_crs)
 
-		gdf_residencias = self._formatar_geodataframes(residencias, geometry_residencias, init_crs, target_crs)
-		gdf_pontos_onibus = self._formatar_geodataframes(df_pontos_onibus, geometry_onibus, init_crs, target_crs)
+		gdf_pontos_onibus = self._formatar_geodataframes(df_pontos_onibus, init_crs, target_crs)
 
 		return gdf_residencias, gdf_pontos_onibus
 
-	def _distancia_euclidiana(self, coord1: np.ndarray, coord2: np.ndarray, axis: int = 1) -> np.ndarray:
-		"""Calcula a distância euclidiana entre dois conjuntos de coordenadas."""
-		return np.sqrt(np.sum(np.square(coord1 - coord2), axis=axis))
+	def _indice_pontos_onibus(self) -> STRtree:
+		"""
+		Retorna o índice espacial (STRtree) dos pontos de ônibus, construindo-o na primeira chamada.
+
+		Returns:
+			STRtree: Árvore construída sobre `coords_pontos_onibus`, na mesma ordem dos índices dos pontos.
+		"""
+		if self._arvore_pontos_onibus is None:
+			self._arvore_pontos_onibus = STRtree(shapely.points(self.coords_pontos_onibus))
+		return self._arvore_pontos_onibus
+
+	def _geometrias_linhas(self) -> np.ndarray:
+		"""Retorna as geometrias das linhas de ônibus no mesmo CRS dos pontos de ônibus."""
+		geometrias = self.linhas["geometria_linha"]
+		if isinstance(geometrias, gpd.GeoSeries) and geometrias.crs is not None and geometrias.crs != self.gdf_pontos_onibus.crs:
+			geometrias = geometrias.to_crs(self.gdf_pontos_onibus.crs)
+		return np.asarray(geometrias, dtype=object)
+
+	def associar_ponto_a_linha(self, tolerancia: float = TOLERANCIA_LINHA) -> dict[str, set[int]]:
+		"""
+		Associa os pontos de ônibus às linhas de ônibus que passam por eles.
+
+		Um ponto é associado a uma linha quando a sua distância até algum segmento do traçado é menor ou
+		igual à tolerância. A consulta é feita em lote no índice espacial dos pontos de ônibus, de modo que
+		a memória utilizada não depende do número de vértices das linhas.
+
+		Args:
+			tolerancia (float): Distância máxima, em metros, entre o ponto de ônibus e o traçado da linha.
+
+		Returns:
+			dict[str, set[int]]: Dicionário com o id de cada linha e os índices dos pontos de ônibus associados.
+		"""
+		if self.linhas is None:
+			raise ValueError("Dados de linhas de ônibus não carregados")
+		if self.coords_pontos_onibus is None:
+			raise ValueError("Coordenadas dos pontos de ônibus não carregadas")
+
+		return self.matriz_incidencia(tolerancia).para_dicionario()
 
-	def _linestring_to_array(self, linestring: LineString):
-		"""Converte uma Linestring em um array numpy com formato [[[x1,y1]], [[x2,y2]], ...]."""
-		coords = list(linestring.coords)
-		array = np.array([[[x, y]] for x, y in coords])
+	def matriz_incidencia(self, tolerancia: float = TOLERANCIA_LINHA) -> MatrizIncidencia:
+		"""
+		Retorna a matriz esparsa de incidência entre linhas e pontos de ônibus.
+
+		A matriz fica em cache até que as linhas ou os pontos de ônibus sejam substituídos.
 
-		return array
+		Args:
+			tolerancia (float): Distância máxima, em metros, entre o ponto de ônibus e o traçado da linha.
 
-	def associar_ponto_a_linha(self):
-		"""Associa os pontos de ônibus as linhas de ônibus mais próximos."""
+		Returns:
+			MatrizIncidencia: Relação entre as linhas (na ordem de `linhas`) e os pontos de ônibus.
+		"""
 		if self.linhas is None:
 			raise ValueError("Dados de linhas de ônibus não carregados")
 		if self.coords_pontos_onibus is None:
 			raise ValueError("Coordenadas dos pontos de ônibus não carregadas")
 
-		relacionamento = {}
-		for _, linha in self.linhas.iterrows():
-			nome_linha: str = linha.id_linha
-			geometria_linha = linha.geometria_linha
+		return self._memorizar(("pontos_linhas", tolerancia), lambda: self._criar_matriz_incidencia(tolerancia))
+
+	def _criar_matriz_incidencia(self, tolerancia: float) -> MatrizIncidencia:
+		"""Consulta o índice espacial dos pontos de ônibus com as geometrias das linhas."""
+		codigos_linhas, ids_linhas = pd.factorize(self.linhas["id_linha"].to_numpy())
+		arvore = self._indice_pontos_onibus()
+		indices_geometrias, indices_pontos = arvore.query(self._geometrias_linhas(), predicate="dwithin", distance=tolerancia)
+
+		return MatrizIncidencia(np.asarray(ids_linhas), codigos_linhas[indices_geometrias], indices_pontos, len(self.coords_pontos_onibus))
+
+	def _ponto_mais_proximo(self, geometrias: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+		"""
+		Busca, em lote, o ponto de ônibus mais próximo de cada geometria.
 
-			pontos_linha = self._linestring_to_array(geometria_linha)
+		Args:
+			geometrias (np.ndarray): Array de geometrias shapely no CRS projetado.
 
-			distancia = self._distancia_euclidiana(pontos_linha, self.coords_pontos_onibus, axis=2)  # type: ignore
-			indices_associados = set(np.argmin(distancia, axis=1))
-			relacionamento[nome_linha] = indices_associados
-		return relacionamento
+		Returns:
+			tuple[np.ndarray, np.ndarray]: Índice do ponto de ônibus mais próximo e a respectiva distância.
+		"""
+		pontos_onibus = np.zeros(len(geometrias), dtype=np.int64)
+		distancias = np.zeros(len(geometrias), dtype=np.float64)
+
+		if len(geometrias):
+			arvore = self._indice_pontos_onibus()
+			(indices_geometrias, indices_pontos), distancias_minimas = arvore.query_nearest(geometrias, return_distance=True, all_matches=False)
+			pontos_onibus[indices_geometrias] = indices_pontos
+			distancias[indices_geometrias] = distancias_minimas
+
+		return pontos_onibus, distancias
 
 	def associar_residencias_a_pontos(self) -> pd.DataFrame:
-		"""Associa as residências aos pontos de ônibus mais próximos."""
+		"""
+		Associa as residências aos pontos de ônibus mais próximos.
+
+		A busca do vizinho mais próximo é feita em lote sobre o índice espacial dos pontos de ônibus,
+		evitando o cálculo da distância de cada residência para todos os pontos.
+		O resultado fica em cache até que as residências ou os pontos de ônibus sejam substituídos.
+
+		Returns:
+			pd.DataFrame: DataFrame com as colunas 'residencia', 'ponto_onibus' e 'distancia'.
+		"""
 		if self.coords_residencias is None:
 			raise ValueError("Coordenadas das residências não carregadas")
 
 		if self.coords_pontos_onibus is None:
 			raise ValueError("Coordenadas dos pontos de ônibus não carregadas")
 
-		num_residencias = len(self.coords_residencias)
-
-		residencias = np.arange(num_residencias).tolist()
-		pontos_onibus = []
-		distancias = []
+		return self._memorizar(("residencias_pontos",), self._associar_residencias_a_pontos).copy()
 
-		for _, residencia in enumerate(self.coords_residencias):
-			distancia_residencia = self._distancia_euclidiana(residencia.reshape(1, -1), self.coords_pontos_onibus)
-			idx_ponto_mais_proximo = np.argmin(distancia_residencia)
-			distancia_minima = distancia_residencia[idx_ponto_mais_proximo]
+	def _associar_residencias_a_pontos(self) -> pd.DataFrame:
+		"""Executa a busca do ponto de ônibus mais próximo para todas as residências."""
+		pontos_onibus, distancias = self._ponto_mais_proximo(np.asarray(self.gdf_residencias.geometry.values))
 
-			pontos_onibus.append(idx_ponto_mais_proximo)
-			distancias.append(distancia_minima)
-
-		return pd.DataFrame({"residencia": residencias, "ponto_onibus": pontos_onibus, "distancia": distancias})
+		return pd.DataFrame({"residencia": np.arange(len(pontos_onibus)), "ponto_onibus": pontos_onibus, "distancia": distancias})
 
 	def _calcular_proporcao_distancia(self, df: pd.DataFrame, limite=500):
 		total_residencias = len(df)
@@ -144,6 +392,12 @@ class Associador:
 		"""
 		Consolida todas as associações (linhas, pontos de ônibus e residências).
 
+		As associações das residências são reduzidas a acumuladores por ponto de ônibus e combinadas por linha
+		com produtos da matriz de incidência, sem percorrer as residências uma vez por linha.
+
+		Args:
+			limite_distancia (float): Distância máxima, em metros, para uma residência ser considerada atendida.
+
 		Returns:
 			list: Lista consolidada com linha, ponto de ônibus, residência e distância.
 		"""
@@ -152,38 +406,228 @@ class Associador:
 			if residencias_pontos.empty:
 				raise ValueError("Não foi possível obter associações entre residências e pontos de ônibus")
 
-			pontos_linhas = self.associar_ponto_a_linha()
+			incidencia = self.matriz_incidencia()
 
-			if not pontos_linhas:
+			if not incidencia.num_linhas:
 				raise ValueError("Não foi possível obter associações entre pontos de ônibus e linhas")
 
-			consolidado = {"id_linha": [], "distancia": [], "proporcao": [], "num_residencias": []}
+			acumuladores = self._acumular_por_ponto(
+				residencias_pontos["ponto_onibus"].to_numpy(), residencias_pontos["distancia"].to_numpy(), limite_distancia
+			)
+			return self._consolidar_acumuladores(incidencia, *acumuladores)
+		except Exception as e:
+			print(f"Erro ao consolidar as associações: {e}")
+			return pd.DataFrame()
+
+	def _acumular_por_ponto(
+		self, pontos_onibus: np.ndarray, distancias: np.ndarray, limite_distancia: float
+	) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+		"""
+		Reduz as associações de residências a acumuladores por ponto de ônibus.
 
-			for nome_linha, pontos_onibus_linha in pontos_linhas.items():
-				distancias_associadas = residencias_pontos[residencias_pontos["ponto_onibus"].isin(pontos_onibus_linha)]
+		Args:
+			pontos_onibus (np.ndarray): Índice do ponto de ônibus mais próximo de cada residência.
+			distancias (np.ndarray): Distância de cada residência ao seu ponto de ônibus.
+			limite_distancia (float): Distância máxima, em metros, para uma residência ser considerada atendida.
 
-				if distancias_associadas.empty:
-					consolidado["id_linha"].append(nome_linha)
-					consolidado["distancia"].append(float("nan"))
-					consolidado["proporcao"].append(0.0)
-					consolidado["num_residencias"].append(0)
-					continue
+		Returns:
+			tuple[np.ndarray, np.ndarray, np.ndarray]: Quantidade de residências, soma das distâncias e quantidade
+			de residências abaixo do limite, por ponto de ônibus.
+		"""
+		num_pontos = len(self.coords_pontos_onibus)
+		contagem = np.bincount(pontos_onibus, minlength=num_pontos)
+		soma_distancias = np.bincount(pontos_onibus, weights=distancias, minlength=num_pontos)
+		abaixo_limite = np.bincount(pontos_onibus[distancias < limite_distancia], minlength=num_pontos)
+		return contagem, soma_distancias, abaixo_limite
 
-				media_distancia = distancias_associadas["distancia"].mean()
+	def curva_cobertura(self, limites: Optional[list[float]] = None) -> pd.DataFrame:
+		"""
+		Calcula a proporção de residências atendidas por linha para vários limites de distância de uma só vez.
 
-				proporcao = (distancias_associadas["distancia"] < limite_distancia).mean()
+		Cada residência é posicionada, por busca binária, entre os limites ordenados. As contagens por faixa são
+		acumuladas por ponto de ônibus e combinadas por linha com a matriz de incidência, de modo que uma curva
+		com muitos limites custa praticamente o mesmo que `consolidar_associacoes` com um único limite.
 
-				consolidado["id_linha"].append(nome_linha)
-				consolidado["distancia"].append(media_distancia)
-				consolidado["proporcao"].append(proporcao)
-				consolidado["num_residencias"].append(len(distancias_associadas))
+		Args:
+			limites (list[float] | None): Limites de distância, em metros. Se None, usa `LIMITES_CURVA_COBERTURA`.
 
-			resultado = pd.DataFrame(consolidado)
-			resultado = resultado.sort_values(by="proporcao", ascending=False)
-			return resultado
-		except Exception as e:
-			print(f"Erro ao consolidar as associações: {e}")
-			return pd.DataFrame()
+		Returns:
+			pd.DataFrame: DataFrame em formato longo com as colunas 'id_linha', 'limite_distancia', 'proporcao'
+			e 'num_residencias', onde 'proporcao' é a fração de residências a menos de 'limite_distancia'.
+		"""
+		limites_ordenados = np.unique(np.asarray(limites if limites is not None else self.LIMITES_CURVA_COBERTURA, dtype=np.float64))
+		num_limites = len(limites_ordenados)
+
+		residencias_pontos = self.associar_residencias_a_pontos()
+		incidencia = self.matriz_incidencia()
+		pontos_onibus = residencias_pontos["ponto_onibus"].to_numpy()
+		faixas = np.searchsorted(limites_ordenados, residencias_pontos["distancia"].to_numpy(), side="right")
+
+		num_pontos = len(self.coords_pontos_onibus)
+		histograma = np.bincount(pontos_onibus * (num_limites + 1) + faixas, minlength=num_pontos * (num_limites + 1))
+		abaixo_limites = np.cumsum(histograma.reshape(num_pontos, num_limites + 1), axis=1)[:, :num_limites]
+
+		num_residencias = incidencia.produto(np.bincount(pontos_onibus, minlength=num_pontos))
+		abaixo_linhas = incidencia.produto(abaixo_limites)
+		proporcoes = np.divide(abaixo_linhas, num_residencias[:, None], out=np.zeros_like(abaixo_linhas), where=num_residencias[:, None] > 0)
+
+		return pd.DataFrame({
+			"id_linha": np.repeat(incidencia.ids_linhas, num_limites),
+			"limite_distancia": np.tile(limites_ordenados, incidencia.num_linhas),
+			"proporcao": proporcoes.ravel(),
+			"num_residencias": np.repeat(num_residencias.astype(np.int64), num_limites),
+		})
+
+	def _tamanho_bloco(self, limite_memoria_mb: float) -> int:
+		"""Converte o orçamento de memória em número de residências por bloco."""
+		return max(1, int(limite_memoria_mb * 1024**2 // self.BYTES_POR_RESIDENCIA))
+
+	def _ler_residencias_em_blocos(self, caminho: str | Path, tamanho_bloco: int) -> Iterator[pd.DataFrame]:
+		"""
+		Lê as coordenadas das residências de um arquivo CSV, Parquet ou Arrow em blocos.
+
+		Args:
+			caminho (str | Path): Caminho para o arquivo de residências.
+			tamanho_bloco (int): Quantidade máxima de residências por bloco.
+
+		Yields:
+			pd.DataFrame: Bloco com as colunas 'longitude' e 'latitude'.
+		"""
+		yield from ler_tabela_em_blocos(caminho, tamanho_bloco, colunas=["longitude", "latitude"])
+
+	def _consolidar_acumuladores(
+		self, incidencia: MatrizIncidencia, contagem: np.ndarray, soma_distancias: np.ndarray, abaixo_limite: np.ndarray
+	) -> pd.DataFrame:
+		"""
+		Combina os acumuladores por ponto de ônibus no resultado por linha de `consolidar_associacoes`.
+
+		Args:
+			incidencia (MatrizIncidencia): Matriz de incidência entre linhas e pontos de ônibus.
+			contagem (np.ndarray): Quantidade de residências associadas a cada ponto de ônibus.
+			soma_distancias (np.ndarray): Soma das distâncias das residências associadas a cada ponto.
+			abaixo_limite (np.ndarray): Quantidade de residências abaixo do limite de distância em cada ponto.
+
+		Returns:
+			pd.DataFrame: DataFrame com as colunas 'id_linha', 'distancia', 'proporcao' e 'num_residencias'.
+		"""
+		num_residencias = incidencia.produto(contagem)
+		soma_linhas = incidencia.produto(soma_distancias)
+		abaixo_linhas = incidencia.produto(abaixo_limite)
+
+		com_residencias = num_residencias > 0
+		divisor = np.where(com_residencias, num_residencias, 1)
+
+		resultado = pd.DataFrame({
+			"id_linha": incidencia.ids_linhas,
+			"distancia": np.where(com_residencias, soma_linhas / divisor, np.nan),
+			"proporcao": np.where(com_residencias, abaixo_linhas / divisor, 0.0),
+			"num_residencias": num_residencias.astype(np.int64),
+		})
+		resultado = resultado.sort_values(by="proporcao", ascending=False)
+		return resultado
+
+	def consolidar_associacoes_em_blocos(self, caminho_residencias: str | Path, limite_distancia=500, limite_memoria_mb: float = 256) -> pd.DataFrame:
+		"""
+		Consolida as associações lendo as residências de um arquivo em blocos, com memória limitada.
+
+		Cada bloco de residências é associado ao ponto de ônibus mais próximo e reduzido a acumuladores por
+		ponto (quantidade, soma das distâncias e quantidade abaixo do limite). Ao final, os acumuladores são
+		combinados por linha, produzindo o mesmo resultado de `consolidar_associacoes`.
+
+		Args:
+			caminho_residencias (str | Path): Caminho para o arquivo CSV ou Parquet com as colunas 'longitude' e 'latitude'.
+			limite_distancia (float): Distância máxima, em metros, para uma residência ser considerada atendida.
+			limite_memoria_mb (float): Orçamento aproximado de memória, em MB, para cada bloco de residências.
+
+		Returns:
+			pd.DataFrame: DataFrame com as colunas 'id_linha', 'distancia', 'proporcao' e 'num_residencias'.
+		"""
+		if self.coords_pontos_onibus is None:
+			raise ValueError("Coordenadas dos pontos de ônibus não carregadas")
+
+		incidencia = self.matriz_incidencia()
+		if not incidencia.num_linhas:
+			raise ValueError("Não foi possível obter associações entre pontos de ônibus e linhas")
+
+		num_pontos = len(self.coords_pontos_onibus)
+		contagem = np.zeros(num_pontos, dtype=np.int64)
+		soma_distancias = np.zeros(num_pontos, dtype=np.float64)
+		abaixo_limite = np.zeros(num_pontos, dtype=np.int64)
+
+		for bloco in self._ler_residencias_em_blocos(caminho_residencias, self._tamanho_bloco(limite_memoria_mb)):
+			if bloco.empty:
+				continue
+			if not self._verificar_formato_coordenadas(bloco):
+				raise ValueError("Coordenadas dos pontos de residências estão em formato incorreto!")
+
+			geometrias = self._criar_pontos(bloco, self.init_crs, self.target_crs)
+			pontos_onibus, distancias = self._ponto_mais_proximo(np.asarray(geometrias.values))
+
+			contagem_bloco, soma_bloco, abaixo_bloco = self._acumular_por_ponto(pontos_onibus, distancias, limite_distancia)
+			contagem += contagem_bloco
+			soma_distancias += soma_bloco
+			abaixo_limite += abaixo_bloco
+
+		return self._consolidar_acumuladores(incidencia, contagem, soma_distancias, abaixo_limite)
+
+	def agregar_distancias_em_grade(self, resolucao: float = 250, forma: str = "quadrada") -> gpd.GeoDataFrame:
+		"""
+		Agrega as distâncias das residências ao ponto de ônibus mais próximo numa grade regular.
+
+		Cada residência é atribuída à sua célula por aritmética sobre as coordenadas projetadas, e as
+		estatísticas de cada célula são obtidas com `np.bincount` e `np.maximum.reduceat`, sem percorrer
+		as residências. O resultado tem uma linha por célula ocupada, de modo que o seu tamanho depende
+		da área da cidade e da resolução, e não da quantidade de residências. Fica em cache até que as
+		residências ou os pontos de ônibus sejam substituídos.
+
+		Args:
+			resolucao (float): Largura das células, em unidades do CRS projetado (metros): o lado dos quadrados ou a
+				distância entre lados opostos dos hexágonos.
+			forma (str): 'quadrada' ou 'hexagonal'.
+
+		Returns:
+			gpd.GeoDataFrame: Uma linha por célula com as colunas 'num_residencias', 'distancia_media' e
+				'distancia_maxima' e a geometria da célula, no CRS projetado.
+
+		Raises:
+			ValueError: Se a forma for desconhecida ou a resolução não for positiva.
+		"""
+		if forma not in FORMAS_GRADE:
+			raise ValueError(f"forma de grade desconhecida: {forma}. Use uma de {FORMAS_GRADE}.")
+		if resolucao <= 0:
+			raise ValueError(f"a resolução da grade deve ser positiva: {resolucao}")
+
+		chave = ("grade_distancias", float(resolucao), forma)
+		return self._memorizar(chave, lambda: self._agregar_distancias_em_grade(resolucao, forma)).copy()
+
+	def _agregar_distancias_em_grade(self, resolucao: float, forma: str) -> gpd.GeoDataFrame:
+		"""Atribui cada residência a uma célula e calcula as estatísticas por célula."""
+		distancias = self.associar_residencias_a_pontos()["distancia"].to_numpy()
+		if not len(distancias):
+			return gpd.GeoDataFrame(columns=["num_residencias", "distancia_media", "distancia_maxima"], geometry=[], crs=self.gdf_residencias.crs)
+
+		x, y = self.coords_residencias[:, 0], self.coords_residencias[:, 1]
+		if forma == "quadrada":
+			colunas, linhas = np.floor(x / resolucao).astype(np.int64), np.floor(y / resolucao).astype(np.int64)
+		else:
+			colunas, linhas = _indices_hexagonos(x, y, resolucao / np.sqrt(3))
+
+		coluna_minima, linha_minima = colunas.min(), linhas.min()
+		num_linhas_grade = linhas.max() - linha_minima + 1
+		celulas, inversos = np.unique((colunas - coluna_minima) * num_linhas_grade + (linhas - linha_minima), return_inverse=True)
+
+		contagem = np.bincount(inversos)
+		soma = np.bincount(inversos, weights=distancias)
+		inicios = np.concatenate([[0], np.cumsum(contagem)[:-1]])
+		maxima = np.maximum.reduceat(distancias[np.argsort(inversos, kind="stable")], inicios)
+
+		colunas_celulas, linhas_celulas = np.divmod(celulas, num_linhas_grade)
+		geometrias = _geometrias_celulas(colunas_celulas + coluna_minima, linhas_celulas + linha_minima, resolucao, forma)
+		return gpd.GeoDataFrame(
+			{"num_residencias": contagem, "distancia_media": soma / contagem, "distancia_maxima": maxima},
+			geometry=geometrias,
+			crs=self.gdf_residencias.crs,
+		)
 
 	def get_geodataframe_com_distancia(self) -> gpd.GeoDataFrame:
 		"""
@@ -196,6 +640,10 @@ class Associador:
 			gpd.GeoDataFrame: GeoDataFrame contendo as colunas
 			'latitude', 'longitude', 'distancia_media'
 		"""
+		return self._memorizar(("geodataframe_distancia",), self._geodataframe_com_distancia).copy()
+
+	def _geodataframe_com_distancia(self) -> gpd.GeoDataFrame:
+		"""Junta as residências às distâncias até o ponto de ônibus mais próximo."""
 		df_associacao = self.associar_residencias_a_pontos()
 
 		gdf_resultado = self.gdf_residencias.reset_index().merge(df_associacao, left_index=True, right_on="residencia")
@@ -0,0 +1,166 @@
+import hashlib
+import os
+import pickle
+import tempfile
+from pathlib import Path
+from typing import Any, Callable, Optional, TypeVar
+
+T = TypeVar("T")
+
+
+class CacheEtapas:
+	"""
+	Cache em disco dos resultados das etapas do pipeline, endereçado pelo conteúdo das entradas.
+
+	Cada resultado é guardado num arquivo pickle cujo nome é o hash SHA-256 do nome da etapa,
+	do conteúdo dos arquivos de entrada e dos parâmetros. Qualquer alteração num arquivo ou
+	parâmetro gera uma nova chave; chaves antigas deixam de ser usadas e acabam removidas pela
+	política LRU (menos recentemente usados primeiro), que mantém o diretório dentro do limite
+	de tamanho.
+
+	Attributes:
+		diretorio (Path): Diretório onde os resultados são guardados.
+		limite_bytes (int): Tamanho máximo ocupado pelo cache.
+	"""
+
+	EXTENSAO = ".pkl"
+	TAMANHO_LEITURA = 1024**2
+
+	def __init__(self, diretorio: str | Path, limite_mb: float = 512):
+		"""
+		Inicializa o cache, criando o diretório se necessário.
+
+		Args:
+			diretorio (str | Path): Diretório onde os resultados são guardados.
+			limite_mb (float): Tamanho máximo do cache, em MB.
+		"""
+		self.diretorio = Path(diretorio)
+		self.diretorio.mkdir(parents=True, exist_ok=True)
+		self.limite_bytes = int(limite_mb * 1024**2)
+		self._hashes_arquivos: dict[tuple, str] = {}
+		self._acertos = 0
+		self._falhas = 0
+
+	@property
+	def estatisticas(self) -> dict[str, int]:
+		"""Retorna a quantidade de acertos e falhas desde a criação e o número de itens e bytes em disco."""
+		arquivos = self._arquivos()
+		return {
+			"acertos": self._acertos,
+			"falhas": self._falhas,
+			"itens": len(arquivos),
+			"bytes": sum(arquivo.stat().st_size for arquivo in arquivos),
+		}
+
+	def chave(self, etapa: str, *partes: Any) -> str:
+		"""
+		Calcula a chave de uma etapa a partir das suas entradas.
+
+		Args:
+			etapa (str): Nome da etapa.
+			*partes: Entradas da etapa. Objetos `Path` entram pelo conteúdo do arquivo; listas, tuplas e
+				dicionários são percorridos; os demais valores entram pela sua representação (`repr`).
+
+		Returns:
+			str: Hash SHA-256 hexadecimal.
+		"""
+		resumo = hashlib.sha256(etapa.encode())
+		for parte in partes:
+			self._atualizar_resumo(resumo, parte)
+		return resumo.hexdigest()
+
+	def obter_ou_calcular(self, etapa: str, chave: str, calcular: Callable[[], T], validar: Optional[Callable[[T], bool]] = None) -> T:
+		"""
+		Retorna o resultado guardado para a chave ou o calcula e guarda.
+
+		Args:
+			etapa (str): Nome da etapa, usado como prefixo do arquivo.
+			chave (str): Chave calculada por `chave`.
+			calcular (Callable[[], T]): Função que produz o resultado em caso de falha.
+			validar (Callable[[T], bool] | None): Se informada, o resultado só é guardado quando ela retornar True
+				(por exemplo, para não guardar etapas que falharam).
+
+		Returns:
+			T: Resultado da etapa.
+		"""
+		arquivo = self.diretorio / f"{etapa}-{chave}{self.EXTENSAO}"
+		if arquivo.exists():
+			try:
+				with open(arquivo, "rb") as f:
+					valor = pickle.load(f)
+				os.utime(arquivo)
+				self._acertos += 1
+				return valor
+			except Exception as error:
+				print(f"Erro ao ler o cache da etapa {etapa}, recalculando: ", error)
+				arquivo.unlink(missing_ok=True)
+
+		self._falhas += 1
+		valor = calcular()
+		if validar is None or validar(valor):
+			self._gravar(arquivo, valor)
+			self._remover_excedente(manter=arquivo)
+		return valor
+
+	def limpar(self):
+		"""Remove todos os resultados guardados."""
+		for arquivo in self._arquivos():
+			arquivo.unlink(missing_ok=True)
+
+	def _gravar(self, arquivo: Path, valor: Any):
+		"""Grava o resultado num arquivo temporário e o move para o destino, evitando arquivos parciais."""
+		descritor, temporario = tempfile.mkstemp(dir=self.diretorio, suffix=".tmp")
+		try:
+			with os.fdopen(descritor, "wb") as f:
+				pickle.dump(valor, f, protocol=pickle.HIGHEST_PROTOCOL)
+			os.replace(temporario, arquivo)
+		except Exception as error:
+			print(f"Erro ao gravar o cache em {arquivo}: ", error)
+			Path(temporario).unlink(missing_ok=True)
+
+	def _remover_excedente(self, manter: Optional[Path] = None):
+		"""Remove os resultados menos recentemente usados até que o cache caiba no limite de tamanho."""
+		arquivos = sorted(self._arquivos(), key=lambda arquivo: arquivo.stat().st_mtime_ns)
+		total = sum(arquivo.stat().st_size for arquivo in arquivos)
+		for arquivo in arquivos:
+			if total <= self.limite_bytes:
+				break
+			if arquivo == manter:
+				continue
+			total -= arquivo.stat().st_size
+			arquivo.unlink(missing_ok=True)
+
+	def _arquivos(self) -> list[Path]:
+		"""Lista os arquivos de resultados do cache."""
+		return list(self.diretorio.glob(f"*{self.EXTENSAO}"))
+
+	def _atualizar_resumo(self, resumo, parte: Any):
+		"""Acrescenta uma entrada ao hash, separando-a das demais para evitar ambiguidades."""
+		if isinstance(parte, Path):
+			resumo.update(b"arquivo:" + self._hash_arquivo(parte).encode())
+		elif isinstance(parte, (list, tuple)):
+			resumo.update(b"[")
+			for item in parte:
+				self._atualizar_resumo(resumo, item)
+			resumo.update(b"]")
+		elif isinstance(parte, dict):
+			resumo.update(b"{")
+			for nome in sorted(parte, key=repr):
+				self._atualizar_resumo(resumo, nome)
+				self._atualizar_resumo(resumo, parte[nome])
+			resumo.update(b"}")
+		else:
+			resumo.update(repr(parte).encode())
+		resumo.update(b"\x00")
+
+	def _hash_arquivo(self, caminho: Path) -> str:
+		"""Calcula o SHA-256 do conteúdo de um arquivo, reaproveitando o resultado enquanto tamanho e data não mudarem."""
+		info = caminho.stat()
+		identificador = (str(caminho.resolve()), info.st_size, info.st_mtime_ns)
+		if identificador not in self._hashes_arquivos:
+			resumo = hashlib.sha256()
+			with open(caminho, "rb") as f:
+				for bloco in iter(lambda: f.read(self.TAMANHO_LEITURA), b""):
+					resumo.update(bloco)
+			self._hashes_arquivos[identificador] = resumo.hexdigest()
+		return self._hashes_arquivos[identificador]
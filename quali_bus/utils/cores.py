@@ -1,5 +1,10 @@
 from random import randint
 
+import numpy as np
+
+# Limites inferiores das classes do IQT, da pior para a melhor classe; usados tanto nas cores quanto na classificação.
+FAIXAS_IQT = [1.0, 2.0, 3.0]
+
 
 class Cores:
 	"""
@@ -115,3 +120,28 @@ def cor_iqt(iqt: float) -> str:
 		return Cores.RED
 	else:
 		return Cores.PINK
+
+
+def cores_iqt(iqts: np.ndarray) -> np.ndarray:
+	"""
+	Determina, de forma vetorizada, a cor de cada valor de IQT.
+
+	Equivalente a aplicar `cor_iqt` a cada elemento, mas usando uma busca nas faixas
+	`FAIXAS_IQT` sobre o array inteiro. Valores ausentes recebem a cor de qualidade muito baixa.
+
+	Args:
+		iqts (np.ndarray): Valores do Índice de Qualidade do Transporte.
+
+	Returns:
+		np.ndarray: Array com o código hexadecimal da cor de cada valor.
+
+	Examples:
+		>>> cores_iqt(np.array([3.5, 2.5, 1.5, 0.5]))
+		array(['#2ca02c', '#1f77b4', '#d62728', '#e377c2'], dtype=object)
+	"""
+	paleta = np.array([Cores.PINK, Cores.RED, Cores.BLUE, Cores.GREEN], dtype=object)
+	valores = np.asarray(iqts, dtype=np.float64)
+
+	faixas = np.digitize(valores, FAIXAS_IQT)
+	faixas[np.isnan(valores)] = 0
+	return paleta[faixas]
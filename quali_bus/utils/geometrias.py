@@ -0,0 +1,167 @@
+from typing import Optional
+
+import geopandas as gpd
+import pandas as pd
+import shapely
+from pyproj import CRS
+
+CRS_METRICO = "EPSG:31983"
+CRS_WEB_MERCATOR = "EPSG:3857"
+RESOLUCAO_ZOOM_0 = 156543.03392804097  # metros (EPSG:3857) por pixel no zoom 0, com blocos de 256 pixels
+
+
+def tolerancia_para_zoom(zoom: float, pixels: float = 0.5) -> float:
+	"""
+	Calcula a tolerância de simplificação correspondente a uma fração de pixel num nível de zoom.
+
+	Em EPSG:3857 o tamanho do pixel no zoom `z` é `RESOLUCAO_ZOOM_0 / 2**z` em qualquer latitude,
+	de modo que simplificar nesse CRS com essa tolerância mantém o desvio abaixo de `pixels` na tela.
+
+	Args:
+		zoom (float): Nível de zoom do mapa (por exemplo, 12 para uma cidade inteira).
+		pixels (float): Desvio máximo admitido, em pixels.
+
+	Returns:
+		float: Tolerância em metros de EPSG:3857.
+	"""
+	return RESOLUCAO_ZOOM_0 / 2**zoom * pixels
+
+
+class RepositorioGeometrias:
+	"""
+	Repositório único das geometrias das linhas, com visões em outros CRS calculadas sob demanda.
+
+	A geometria projetada (CRS de trabalho) é a fonte da verdade. Cada reprojeção para outro CRS
+	(por exemplo, EPSG:4326 para os mapas ou EPSG:31983 para medir extensões) é feita uma única vez
+	e guardada, de modo que os componentes que compartilham o repositório (cálculo dos indicadores,
+	mapas, visualizações) não reprojetam os vértices das rotas a cada uso. O mesmo vale para as
+	versões simplificadas usadas nos mapas, guardadas por tolerância.
+
+	Attributes:
+		geometrias (gpd.GeoSeries): Geometrias no CRS de trabalho, indexadas por 'id_linha'.
+	"""
+
+	def __init__(self, geometrias: gpd.GeoSeries):
+		"""
+		Inicializa o repositório.
+
+		Args:
+			geometrias (gpd.GeoSeries): Geometrias das linhas, com CRS definido e indexadas por 'id_linha'.
+
+		Raises:
+			ValueError: Se as geometrias não tiverem CRS definido ou se houver identificadores de linha duplicados.
+		"""
+		if geometrias.crs is None:
+			raise ValueError("As geometrias não possuem CRS definido")
+		if not geometrias.index.is_unique:
+			duplicados = geometrias.index[geometrias.index.duplicated()].unique().tolist()
+			raise ValueError(f"Identificadores de linha duplicados: {duplicados}")
+		self.geometrias = geometrias
+		self._visoes: dict[CRS, gpd.GeoSeries] = {}
+		self._simplificadas: dict[tuple[float, CRS, bool], gpd.GeoSeries] = {}
+		self._comprimentos: Optional[pd.Series] = None
+
+	@classmethod
+	def de_geodataframe(cls, gdf: gpd.GeoDataFrame, coluna_id: str = "id_linha") -> "RepositorioGeometrias":
+		"""
+		Cria o repositório a partir da geometria ativa de um GeoDataFrame de linhas.
+
+		Args:
+			gdf (gpd.GeoDataFrame): GeoDataFrame das linhas.
+			coluna_id (str): Coluna com o identificador das linhas.
+
+		Returns:
+			RepositorioGeometrias: Repositório com as geometrias indexadas pelo identificador.
+		"""
+		geometrias = gdf.geometry.copy()
+		geometrias.index = pd.Index(gdf[coluna_id].astype(str).to_numpy(), name=coluna_id)
+		return cls(geometrias)
+
+	@property
+	def crs(self) -> CRS:
+		"""CRS de trabalho das geometrias."""
+		return self.geometrias.crs
+
+	def visao(self, crs: Optional[str | int | CRS] = None) -> gpd.GeoSeries:
+		"""
+		Retorna as geometrias num CRS, reprojetando-as apenas na primeira solicitação.
+
+		Args:
+			crs (str | int | CRS | None): CRS desejado. Se None, retorna as geometrias no CRS de trabalho.
+
+		Returns:
+			gpd.GeoSeries: Geometrias no CRS pedido, indexadas por 'id_linha'. Não devem ser modificadas,
+				pois são compartilhadas por todos os usuários do repositório.
+		"""
+		if crs is None:
+			return self.geometrias
+		crs = CRS.from_user_input(crs)
+		if crs == self.crs:
+			return self.geometrias
+		if crs not in self._visoes:
+			self._visoes[crs] = self.geometrias.to_crs(crs)
+		return self._visoes[crs]
+
+	def simplificada(self, tolerancia: float, crs: Optional[str | int | CRS] = None, cobertura: bool = False) -> gpd.GeoSeries:
+		"""
+		Retorna as geometrias simplificadas com a tolerância dada, calculando-as apenas na primeira solicitação.
+
+		A simplificação é feita em EPSG:3857, cuja unidade corresponde ao pixel dos mapas (ver
+		`tolerancia_para_zoom`), e o resultado é levado ao CRS pedido.
+
+		Args:
+			tolerancia (float): Tolerância em metros de EPSG:3857. Com 0, as geometrias não são simplificadas.
+			crs (str | int | CRS | None): CRS do resultado. Se None, usa o CRS de trabalho.
+			cobertura (bool): Se True, as geometrias são tratadas como uma cobertura de polígonos (por exemplo,
+				bairros) e simplificadas em conjunto com `shapely.coverage_simplify`, de modo que as divisas
+				compartilhadas continuam coincidentes, sem lacunas nem sobreposições. Caso contrário, cada
+				geometria é simplificada preservando a sua topologia.
+
+		Returns:
+			gpd.GeoSeries: Geometrias simplificadas, com o mesmo índice do repositório.
+		"""
+		if tolerancia <= 0:
+			return self.visao(crs)
+		crs = self.crs if crs is None else CRS.from_user_input(crs)
+		chave = (float(tolerancia), crs, cobertura)
+		if chave not in self._simplificadas:
+			base = self.visao(CRS_WEB_MERCATOR)
+			if cobertura:
+				geometrias = shapely.coverage_simplify(base.to_numpy(), tolerancia)
+			else:
+				geometrias = shapely.simplify(base.to_numpy(), tolerancia, preserve_topology=True)
+			self._simplificadas[chave] = gpd.GeoSeries(geometrias, index=base.index, crs=base.crs).to_crs(crs)
+		return self._simplificadas[chave]
+
+	def comprimento_km(self) -> pd.Series:
+		"""
+		Calcula, uma única vez, a extensão de cada linha em km, medida no CRS métrico `CRS_METRICO`.
+
+		Returns:
+			pd.Series: Extensão de cada linha, indexada por 'id_linha'.
+		"""
+		if self._comprimentos is None:
+			self._comprimentos = self.visao(CRS_METRICO).length / 1000
+		return self._comprimentos
+
+	def anexar(
+		self, df: pd.DataFrame, crs: Optional[str | int | CRS] = None, coluna: str = "geometria_linha", tolerancia: Optional[float] = None
+	) -> gpd.GeoDataFrame:
+		"""
+		Anexa a um DataFrame de atributos das linhas a geometria correspondente a cada 'id_linha', no CRS pedido.
+
+		Args:
+			df (pd.DataFrame): DataFrame com a coluna 'id_linha'. Uma coluna de geometria existente é substituída.
+			crs (str | int | CRS | None): CRS da geometria anexada. Se None, usa o CRS de trabalho.
+			coluna (str): Nome da coluna de geometria no resultado.
+			tolerancia (float | None): Se informada, anexa as geometrias simplificadas com essa tolerância (ver `simplificada`).
+
+		Returns:
+			gpd.GeoDataFrame: Cópia de `df` com a geometria ativa em `coluna`.
+		"""
+		visao = self.visao(crs) if tolerancia is None else self.simplificada(tolerancia, crs)
+		geometrias = visao.reindex(df["id_linha"].astype(str).to_numpy())
+
+		resultado = pd.DataFrame(df).copy()
+		resultado[coluna] = gpd.GeoSeries(geometrias.to_numpy(), index=df.index, crs=visao.crs)
+		return gpd.GeoDataFrame(resultado, geometry=coluna, crs=visao.crs)
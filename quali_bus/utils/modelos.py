@@ -1,6 +1,31 @@
 import geopandas as gpd
 import pandas as pd
 
+COLUNAS_DADOS_LINHAS = [
+	"id_linha",
+	"geometria_linha",
+	"indicador_via_pavimentada",
+	"tipo_integracao",
+	"indicador_treinamento_motorista",
+	"disponibilidade_informacao",
+	"valor_tarifa",
+]
+COLUNAS_FREQUENCIA = ["horario_inicio_jornada", "horario_fim_jornada", "data_jornada", "sentido_viagem", "id_linha", "quantidade_passageiros"]
+COLUNAS_PONTUALIDADE = [
+	"data_viagem",
+	"id_linha",
+	"sentido",
+	"descricao_trajeto",
+	"partida_planejada",
+	"partida_real",
+	"chegada_planejada",
+	"chegada_real",
+	"km_executado",
+]
+COLUNAS_CUMPRIMENTO = ["data_viagem", "id_linha", "sentido", "descricao_trajeto", "km_executado"]
+COLUNAS_RESIDENCIAS = ["id", "longitude", "latitude"]
+COLUNAS_PONTOS_ONIBUS = ["id", "longitude", "latitude"]
+
 
 def validar_gdf_city(df: pd.DataFrame) -> bool:
 	"""Valida um DataFrame contendo informações sobre áreas urbanas.
@@ -33,15 +58,7 @@ def validar_df_dados_linhas(df: pd.DataFrame) -> bool:
 	Raises:
 		ValueError: Se alguma coluna estiver faltando no DataFrame.
 	"""
-	required_columns = [
-		"id_linha",
-		"geometria_linha",
-		"indicador_via_pavimentada",
-		"tipo_integracao",
-		"indicador_treinamento_motorista",
-		"disponibilidade_informacao",
-		"valor_tarifa",
-	]
+	required_columns = COLUNAS_DADOS_LINHAS
 	missing_columns = [col for col in required_columns if col not in df.columns]
 	if missing_columns:
 		raise ValueError(f"df_dados_linhas está faltando colunas: {missing_columns}")
@@ -60,7 +77,7 @@ def validar_df_frequencia(df: pd.DataFrame) -> bool:
 	Raises:
 		ValueError: Se alguma coluna estiver faltando no DataFrame.
 	"""
-	required_columns = ["horario_inicio_jornada", "horario_fim_jornada", "data_jornada", "sentido_viagem", "id_linha", "quantidade_passageiros"]
+	required_columns = COLUNAS_FREQUENCIA
 	missing_columns = [col for col in required_columns if col not in df.columns]
 	if missing_columns:
 		raise ValueError(f"df_frequencia está faltando colunas: {missing_columns}")
@@ -79,17 +96,7 @@ def validar_df_pontualidade(df: pd.DataFrame) -> bool:
 	Raises:
 		ValueError: Se alguma coluna estiver faltando no DataFrame.
 	"""
-	required_columns = [
-		"data_viagem",
-		"id_linha",
-		"sentido",
-		"descricao_trajeto",
-		"partida_planejada",
-		"partida_real",
-		"chegada_planejada",
-		"chegada_real",
-		"km_executado",
-	]
+	required_columns = COLUNAS_PONTUALIDADE
 	missing_columns = [col for col in required_columns if col not in df.columns]
 	if missing_columns:
 		raise ValueError(f"df_pontualidade está faltando colunas: {missing_columns}")
@@ -108,7 +115,7 @@ def validar_df_cumprimento(df: pd.DataFrame) -> bool:
 	Raises:
 		ValueError: Se alguma coluna estiver faltando no DataFrame.
 	"""
-	required_columns = ["data_viagem", "id_linha", "sentido", "descricao_trajeto", "km_executado"]
+	required_columns = COLUNAS_CUMPRIMENTO
 	missing_columns = [col for col in required_columns if col not in df.columns]
 	if missing_columns:
 		raise ValueError(f"df_cumprimento está faltando colunas: {missing_columns}")
@@ -127,7 +134,7 @@ def validar_residencias(gdf: gpd.GeoDataFrame) -> bool:
 	Raises:
 		ValueError: Se alguma coluna estiver faltando no GeoDataFrame.
 	"""
-	required_columns = ["id", "longitude", "latitude"]
+	required_columns = COLUNAS_RESIDENCIAS
 	missing_columns = [col for col in required_columns if col not in gdf.columns]
 	if missing_columns:
 		raise ValueError(f"gdf_residências está faltando colunas: {missing_columns}")
@@ -146,7 +153,7 @@ def validar_pontos_onibus(gdf: gpd.GeoDataFrame) -> bool:
 	Raises:
 		ValueError: Se alguma coluna estiver faltando no GeoDataFrame.
 	"""
-	required_columns = ["id", "longitude", "latitude"]
+	required_columns = COLUNAS_PONTOS_ONIBUS
 	missing_columns = [col for col in required_columns if col not in gdf.columns]
 	if missing_columns:
 		raise ValueError(f"gdf_pontos_onibus está faltando colunas: {missing_columns}")
@@ -0,0 +1,130 @@
+import json
+from pathlib import Path
+from typing import Iterator, Optional
+
+import geopandas as gpd
+import pandas as pd
+
+EXTENSOES_PARQUET = {".parquet", ".pq", ".geoparquet"}
+EXTENSOES_ARROW = {".arrow", ".feather", ".ipc"}
+
+
+def _importar_pyarrow():
+	"""Importa o pyarrow sob demanda, já que ele é necessário apenas para os formatos colunares."""
+	try:
+		import pyarrow as pa
+	except ImportError:
+		raise ImportError("A leitura de arquivos Parquet/Arrow requer o pacote 'pyarrow'.")
+	return pa
+
+
+def formato_tabela(caminho: str | Path) -> str:
+	"""
+	Identifica o formato de um arquivo tabular pela extensão.
+
+	Args:
+		caminho (str | Path): Caminho do arquivo.
+
+	Returns:
+		str: 'parquet', 'arrow' ou 'csv' (padrão para qualquer outra extensão).
+	"""
+	extensao = Path(caminho).suffix.lower()
+	if extensao in EXTENSOES_PARQUET:
+		return "parquet"
+	if extensao in EXTENSOES_ARROW:
+		return "arrow"
+	return "csv"
+
+
+def _colunas_existentes(caminho: str | Path, formato: str, colunas: Optional[list[str]]) -> Optional[list[str]]:
+	"""Restringe as colunas pedidas às presentes no esquema do arquivo colunar; as ausentes são apontadas pela validação."""
+	if colunas is None:
+		return None
+	pa = _importar_pyarrow()
+	if formato == "parquet":
+		import pyarrow.parquet as pq
+
+		nomes = pq.read_schema(caminho).names
+	else:
+		nomes = pa.ipc.open_file(pa.memory_map(str(caminho))).schema.names
+	return [coluna for coluna in colunas if coluna in nomes]
+
+
+def _coluna_geometria_geoparquet(caminho: str | Path) -> Optional[str]:
+	"""Retorna a coluna de geometria principal declarada nos metadados GeoParquet, ou None se o arquivo não for GeoParquet."""
+	import pyarrow.parquet as pq
+
+	metadados = pq.read_schema(caminho).metadata or {}
+	if b"geo" not in metadados:
+		return None
+	return json.loads(metadados[b"geo"]).get("primary_column")
+
+
+def _filtro_colunas_csv(colunas: Optional[list[str]]):
+	"""Retorna o `usecols` do `pd.read_csv` que lê apenas as colunas pedidas que existirem no arquivo."""
+	if colunas is None:
+		return None
+	pedidas = set(colunas)
+	return lambda coluna: coluna in pedidas
+
+
+def ler_tabela(caminho: str | Path, colunas: Optional[list[str]] = None, **kwargs) -> pd.DataFrame:
+	"""
+	Lê um arquivo CSV, Parquet/GeoParquet ou Arrow IPC para um DataFrame.
+
+	Nos formatos colunares apenas as colunas pedidas são lidas e os tipos nativos são preservados
+	(datas e horários, categorias). Arquivos GeoParquet cuja geometria principal é lida resultam num
+	GeoDataFrame com o CRS do arquivo; nos demais casos, colunas de geometria chegam como WKB.
+
+	Args:
+		caminho (str | Path): Caminho do arquivo.
+		colunas (list[str] | None): Colunas a serem lidas, se existirem no arquivo. Se None, lê todas.
+		**kwargs: Argumentos adicionais repassados ao `pd.read_csv` (ignorados nos formatos colunares).
+
+	Returns:
+		pd.DataFrame: Dados lidos.
+	"""
+	formato = formato_tabela(caminho)
+	if formato != "csv":
+		_importar_pyarrow()
+	if formato == "parquet":
+		colunas = _colunas_existentes(caminho, formato, colunas)
+		coluna_geometria = _coluna_geometria_geoparquet(caminho)
+		if coluna_geometria is not None and (colunas is None or coluna_geometria in colunas):
+			return gpd.read_parquet(caminho, columns=colunas)
+		return pd.read_parquet(caminho, columns=colunas)
+	if formato == "arrow":
+		return pd.read_feather(caminho, columns=_colunas_existentes(caminho, formato, colunas))
+	return pd.read_csv(caminho, usecols=_filtro_colunas_csv(colunas), **kwargs)
+
+
+def ler_tabela_em_blocos(caminho: str | Path, tamanho_bloco: int, colunas: Optional[list[str]] = None, **kwargs) -> Iterator[pd.DataFrame]:
+	"""
+	Lê um arquivo CSV, Parquet/GeoParquet ou Arrow IPC em blocos de até `tamanho_bloco` linhas.
+
+	Args:
+		caminho (str | Path): Caminho do arquivo.
+		tamanho_bloco (int): Quantidade máxima de linhas por bloco.
+		colunas (list[str] | None): Colunas a serem lidas, se existirem no arquivo. Se None, lê todas.
+		**kwargs: Argumentos adicionais repassados ao `pd.read_csv` (ignorados nos formatos colunares).
+
+	Yields:
+		pd.DataFrame: Blocos do arquivo.
+	"""
+	formato = formato_tabela(caminho)
+	if formato != "csv":
+		pa = _importar_pyarrow()
+	if formato == "parquet":
+		import pyarrow.parquet as pq
+
+		colunas = _colunas_existentes(caminho, formato, colunas)
+		for lote in pq.ParquetFile(caminho).iter_batches(batch_size=tamanho_bloco, columns=colunas):
+			yield lote.to_pandas()
+	elif formato == "arrow":
+		tabela = pa.ipc.open_file(pa.memory_map(str(caminho))).read_all()
+		if colunas is not None:
+			tabela = tabela.select(_colunas_existentes(caminho, formato, colunas))
+		for lote in tabela.to_batches(max_chunksize=tamanho_bloco):
+			yield lote.to_pandas()
+	else:
+		yield from pd.read_csv(caminho, usecols=_filtro_colunas_csv(colunas), chunksize=tamanho_bloco, **kwargs)
@@ -98,3 +98,124 @@ def test_consolidar_associacoes(associador):
 	consolidado = associador.consolidar_associacoes()
 
 	assert not consolidado.empty
+
+
+@pytest.fixture
+def associador_projetado(sample_residencias, sample_pontos_onibus, sample_linhas):
+	"""Fixture que cria um Associador com os dados projetados, como no fluxo do QualiBus."""
+	linhas = sample_linhas.rename_geometry("geometria_linha").to_crs("EPSG:31983")
+	return Associador(sample_pontos_onibus, linhas, sample_residencias, "EPSG:4326", "EPSG:31983")
+
+
+def test_associar_residencias_a_pontos_indice_espacial(associador_projetado):
+	"""Testa se a busca pelo índice espacial coincide com a busca exaustiva."""
+	associacoes = associador_projetado.associar_residencias_a_pontos()
+
+	diferencas = associador_projetado.coords_residencias[:, None, :] - associador_projetado.coords_pontos_onibus[None, :, :]
+	distancias = np.sqrt(np.sum(np.square(diferencas), axis=2))
+
+	assert associacoes.columns.tolist() == ["residencia", "ponto_onibus", "distancia"]
+	assert associacoes["residencia"].tolist() == list(range(len(distancias)))
+	assert associacoes["ponto_onibus"].tolist() == np.argmin(distancias, axis=1).tolist()
+	assert np.allclose(associacoes["distancia"], distancias.min(axis=1))
+
+
+def test_associar_ponto_a_linha_por_segmento(associador_projetado):
+	"""Testa se pontos ao lado de um segmento longo são associados, mesmo longe dos vértices."""
+	x, y = associador_projetado.coords_pontos_onibus[0]
+	associador_projetado.linhas = gpd.GeoDataFrame(
+		{"id_linha": ["L003"]}, geometry=gpd.GeoSeries([LineString([(x - 1000, y + 10), (x + 1000, y + 10)])]), crs="EPSG:31983"
+	).rename_geometry("geometria_linha")
+
+	associacoes = associador_projetado.associar_ponto_a_linha(tolerancia=20)
+
+	assert associacoes == {"L003": {0}}
+
+
+def test_consolidar_associacoes_em_blocos(associador_projetado, sample_residencias, sample_pontos_onibus, tmp_path):
+	"""Testa se a consolidação em blocos produz o mesmo resultado da consolidação em memória."""
+	caminho = tmp_path / "residencias.csv"
+	sample_residencias.to_csv(caminho, index=False)
+	associador_em_blocos = Associador(sample_pontos_onibus, associador_projetado.linhas, None, "EPSG:4326", "EPSG:31983")
+
+	esperado = associador_projetado.consolidar_associacoes()
+	resultado = associador_em_blocos.consolidar_associacoes_em_blocos(caminho, limite_memoria_mb=0.001)
+
+	assert associador_em_blocos._tamanho_bloco(0.001) < len(sample_residencias)
+	pd.testing.assert_frame_equal(resultado.reset_index(drop=True), esperado.reset_index(drop=True), check_dtype=False)
+
+
+def test_cache_associacoes(associador_projetado, sample_linhas):
+	"""Testa se as associações são reaproveitadas e se o cache é invalidado ao trocar os dados."""
+	associador_projetado.consolidar_associacoes()
+	associador_projetado.get_geodataframe_com_distancia()
+	associador_projetado.associar_residencias_a_pontos()
+
+	estatisticas = associador_projetado.estatisticas_cache
+	assert estatisticas["falhas"] == 3
+	assert estatisticas["acertos"] == 2
+
+	associador_projetado.linhas = sample_linhas.rename_geometry("geometria_linha").to_crs("EPSG:31983")
+	associador_projetado.associar_residencias_a_pontos()
+	associador_projetado.associar_ponto_a_linha()
+
+	estatisticas = associador_projetado.estatisticas_cache
+	assert estatisticas["falhas"] == 4
+	assert estatisticas["acertos"] == 3
+
+
+def test_matriz_incidencia(associador_projetado):
+	"""Testa se a matriz de incidência agrega os valores dos pontos de cada linha."""
+	incidencia = associador_projetado.matriz_incidencia()
+	pontos_linhas = associador_projetado.associar_ponto_a_linha()
+	valores = np.array([1.0, 10.0])
+
+	assert incidencia.para_dicionario() == pontos_linhas
+	assert incidencia.produto(valores).tolist() == [valores[list(pontos)].sum() for pontos in pontos_linhas.values()]
+	assert incidencia.produto(np.column_stack([valores, valores])).shape == (incidencia.num_linhas, 2)
+
+
+def test_curva_cobertura(associador_projetado):
+	"""Testa se a curva de cobertura coincide com consolidar_associacoes para cada limite."""
+	limites = [20, 50, 500]
+	curva = associador_projetado.curva_cobertura(limites)
+
+	assert curva["limite_distancia"].unique().tolist() == limites
+	for limite in limites:
+		esperado = associador_projetado.consolidar_associacoes(limite_distancia=limite).set_index("id_linha")
+		resultado = curva[curva["limite_distancia"] == limite].set_index("id_linha")
+		assert np.allclose(resultado.loc[esperado.index, "proporcao"], esperado["proporcao"])
+		assert resultado.loc[esperado.index, "num_residencias"].tolist() == esperado["num_residencias"].tolist()
+
+
+def test_criar_pontos_projetados(associador_projetado, sample_residencias):
+	"""Testa se os pontos criados em lote coincidem com a reprojeção feita pelo geopandas."""
+	pontos = associador_projetado._criar_pontos(sample_residencias, "EPSG:4326", "EPSG:31983")
+	esperado = gpd.GeoSeries.from_xy(sample_residencias["longitude"], sample_residencias["latitude"], crs="EPSG:4326").to_crs("EPSG:31983")
+
+	assert pontos.crs == "EPSG:31983"
+	assert np.allclose(associador_projetado.coords_residencias, np.column_stack([esperado.x, esperado.y]))
+	assert np.allclose(np.column_stack([pontos.x, pontos.y]), np.column_stack([esperado.x, esperado.y]))
+
+
+@pytest.mark.parametrize("forma", ["quadrada", "hexagonal"])
+def test_agregar_distancias_em_grade(associador_projetado, forma):
+	"""Testa se cada residência cai na sua célula e se as estatísticas por célula coincidem com o agrupamento das associações."""
+	grade = associador_projetado.agregar_distancias_em_grade(resolucao=30, forma=forma)
+	distancias = associador_projetado.associar_residencias_a_pontos()["distancia"].to_numpy()
+
+	residencias = gpd.GeoDataFrame(
+		{"distancia": distancias}, geometry=gpd.points_from_xy(*associador_projetado.coords_residencias.T), crs="EPSG:31983"
+	)
+	celulas = gpd.sjoin(residencias, grade, predicate="within")
+	esperado = celulas.groupby("index_right")["distancia"].agg(["size", "mean", "max"])
+
+	assert len(celulas) == len(residencias)
+	assert grade["num_residencias"].sum() == len(residencias)
+	assert grade.loc[esperado.index, "num_residencias"].tolist() == esperado["size"].tolist()
+	assert np.allclose(grade.loc[esperado.index, "distancia_media"], esperado["mean"])
+	assert np.allclose(grade.loc[esperado.index, "distancia_maxima"], esperado["max"])
+	assert associador_projetado.agregar_distancias_em_grade(resolucao=30, forma=forma).equals(grade)
+
+	with pytest.raises(ValueError, match="forma"):
+		associador_projetado.agregar_distancias_em_grade(forma="triangular")
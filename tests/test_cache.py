@@ -0,0 +1,109 @@
+import os
+
+import geopandas as gpd
+import pandas as pd
+import pytest
+from shapely.geometry import box
+
+from quali_bus import QualiBus
+from quali_bus.utils.cache import CacheEtapas
+
+
+@pytest.fixture
+def cache(tmp_path):
+	"""
+	Fixture para criar um cache de etapas num diretório temporário.
+	"""
+	return CacheEtapas(tmp_path / "cache", limite_mb=1)
+
+
+def test_cache_etapas_chave_pelo_conteudo(cache, tmp_path):
+	"""
+	Testa se o resultado é reaproveitado enquanto o conteúdo e os parâmetros não mudam.
+	"""
+	arquivo = tmp_path / "linhas.csv"
+	arquivo.write_text("id_linha\n1\n")
+	chamadas = []
+
+	def calcular():
+		chamadas.append(1)
+		return {"valor": len(chamadas)}
+
+	chave = cache.chave("etapa", arquivo, "EPSG:31983")
+	assert cache.obter_ou_calcular("etapa", chave, calcular) == {"valor": 1}
+	assert cache.obter_ou_calcular("etapa", cache.chave("etapa", arquivo, "EPSG:31983"), calcular) == {"valor": 1}
+	assert cache.chave("etapa", arquivo, "EPSG:4326") != chave
+
+	arquivo.write_text("id_linha\n2\n")
+	nova_chave = cache.chave("etapa", arquivo, "EPSG:31983")
+	assert nova_chave != chave
+	assert cache.obter_ou_calcular("etapa", nova_chave, calcular) == {"valor": 2}
+	assert cache.estatisticas["acertos"] == 1
+	assert cache.estatisticas["falhas"] == 2
+
+	assert cache.obter_ou_calcular("falha", cache.chave("falha"), lambda: None, validar=lambda valor: valor is not None) is None
+	assert cache.estatisticas["itens"] == 2
+
+
+def test_cache_etapas_remove_menos_usados(cache):
+	"""
+	Testa se o limite de tamanho remove primeiro os resultados usados há mais tempo.
+	"""
+	bloco = b"x" * 400 * 1024
+	for indice, nome in enumerate(["a", "b"]):
+		cache.obter_ou_calcular(nome, cache.chave(nome), lambda: bloco)
+		os.utime(cache.diretorio / f"{nome}-{cache.chave(nome)}.pkl", ns=(indice * 10**9, indice * 10**9))
+
+	cache.obter_ou_calcular("a", cache.chave("a"), lambda: pytest.fail("deveria vir do cache"))
+	cache.obter_ou_calcular("c", cache.chave("c"), lambda: bloco)
+
+	restantes = sorted(arquivo.name.split("-")[0] for arquivo in cache.diretorio.glob("*.pkl"))
+	assert restantes == ["a", "c"]
+
+
+def test_etapa_sem_resultado_nao_e_guardada(tmp_path):
+	"""
+	Testa se uma etapa que não produziu algum dos seus atributos não é guardada nem mascarada no cache.
+	"""
+	limites = tmp_path / "limites.shp"
+	gpd.GeoDataFrame({"nome": ["cidade"]}, geometry=[box(0, 0, 1, 1)], crs=31983).to_file(limites)
+	qualibus = QualiBus(str(limites), diretorio_cache=tmp_path / "cache")
+
+	qualibus._executar_etapa("iqt", [], ["falha"], lambda: None, ["dados_completos"])
+	assert not hasattr(qualibus._indicadores, "dados_completos")
+	assert not list((tmp_path / "cache").glob("iqt-*"))
+
+	def executar():
+		qualibus._indicadores.dados_completos = pd.DataFrame({"id_linha": ["1"]})
+
+	qualibus._executar_etapa("iqt", [], ["sucesso"], executar, ["dados_completos"])
+	assert len(list((tmp_path / "cache").glob("iqt-*"))) == 1
+
+
+def test_chave_geoespacial_inclui_limite_distancia(tmp_path, monkeypatch):
+	"""
+	Testa se mudar o limite de distância invalida as associações guardadas no cache e é repassado à carga geoespacial.
+	"""
+	limites = tmp_path / "limites.shp"
+	gpd.GeoDataFrame({"nome": ["cidade"]}, geometry=[box(0, 0, 1, 1)], crs=31983).to_file(limites)
+	for nome in ("pontos.csv", "residencias.csv"):
+		(tmp_path / nome).write_text("latitude,longitude\n0,0\n")
+	qualibus = QualiBus(str(limites), diretorio_cache=tmp_path / "cache")
+	qualibus._operacional_ok = True
+	qualibus._chaves_etapas["operacional"] = "operacional"
+
+	limites_usados = []
+
+	def carregar(*args):
+		limites_usados.append(args[-1])
+		qualibus._indicadores.associador = "associador"
+		qualibus._indicadores.dados_geograficos = pd.DataFrame({"id_linha": ["1"]})
+
+	monkeypatch.setattr(qualibus, "_executar_carga_geoespacial", carregar)
+	chaves = []
+	for limite_distancia in (500, 300, 500):
+		qualibus.carregar_dados_geoespaciais(tmp_path / "pontos.csv", tmp_path / "residencias.csv", limite_distancia=limite_distancia)
+		chaves.append(qualibus._chaves_etapas["geoespacial"])
+
+	assert limites_usados == [500, 300]
+	assert chaves[0] != chaves[1] and chaves[0] == chaves[2]
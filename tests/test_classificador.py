@@ -1,6 +1,7 @@
+import numpy as np
 import pandas as pd
 import pytest
-from quali_bus.data_analysis.classificar_indicadores import ClassificarIndicadores
+from quali_bus.data_analysis.classificar_indicadores import CLASSES_IQT, TABELA_REGRAS, ClassificarIndicadores
 
 
 @pytest.fixture
@@ -128,3 +129,39 @@ def test_classificar_linhas(classificator):
 	assert len(classificacao) == 1
 	assert all(classificacao.iloc[0, 1:] == [3, 2, 3, 3, 3, 3, 3, 3, 3, 3])
 	assert classificacao.columns.tolist() == ["id_linha", "I1", "I2", "I3", "I4", "I5", "I6", "I7", "I8", "I9", "I10"]
+
+
+def test_tabela_regras_equivale_aos_metodos(classificator):
+	"""Testa se a tabela de regras vetorizada reproduz os métodos de pontuação escalares."""
+	proporcoes = np.round(np.arange(0, 1.2, 0.005), 3)
+	distancias = np.arange(0, 600, 10.0)
+	frequencias = np.arange(0, 40, 0.5)
+
+	casos = {
+		"I1": (proporcoes, classificator._porcentagem_vias_pavimentadas_pontuacao),
+		"I2": (distancias, classificator._distancia_pontos_pontuacao),
+		"I4": (proporcoes, classificator._pontualidade_pontuacao),
+		"I5": (frequencias, classificator._frequencia_atendimento_pontuacao),
+		"I6": (proporcoes, classificator._cumprimento_itinerarios_pontuacao),
+		"I7": (proporcoes, classificator._abrangencia_rede_pontuacao),
+		"I8": (proporcoes, classificator._treinamento_capacitacao_pontuacao),
+	}
+	for indicador, (valores, metodo) in casos.items():
+		pontuacoes = classificator._aplicar_regra(pd.Series(valores), TABELA_REGRAS[indicador])
+		assert pontuacoes.tolist() == [metodo(valor) for valor in valores], indicador
+
+	tarifas = pd.Series(["Não houve aumento da tarifa", "Aumento inferior ao índice", "Aumento equivalente ao índice", "Outro"])
+	assert classificator._aplicar_regra(tarifas, TABELA_REGRAS["I10"]).tolist() == [classificator._valor_tarifa_pontuacao(t) for t in tarifas]
+
+	informacoes = pd.Series([" Possuir informação em site desatualizado ", "Sem informações"])
+	assert classificator._aplicar_regra(informacoes, TABELA_REGRAS["I9"]).tolist() == [1, 0]
+
+
+def test_classificacao_iqt_indices(classificator):
+	"""Testa se a classificação vetorizada do IQT equivale à classificação valor a valor."""
+	iqts = np.array([[3.5, 3.0, 2.5], [1.5, 0.5, np.nan]])
+	indices = classificator.classificacao_iqt_indices(iqts)
+
+	assert indices.shape == iqts.shape
+	assert [CLASSES_IQT[i] for i in indices.ravel()[:5]] == [classificator.classificacao_iqt_pontuacao(v) for v in iqts.ravel()[:5]]
+	assert indices[1, 2] == 0
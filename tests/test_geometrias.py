@@ -0,0 +1,83 @@
+import geopandas as gpd
+import numpy as np
+import pandas as pd
+import pytest
+import shapely
+from shapely.geometry import LineString, Polygon
+
+from quali_bus.utils.geometrias import RepositorioGeometrias, tolerancia_para_zoom
+
+
+@pytest.fixture
+def linhas():
+	"""Duas linhas de cerca de 1 km em EPSG:31983."""
+	return gpd.GeoDataFrame(
+		{"id_linha": [10, 20], "nome": ["A", "B"]},
+		geometry=[LineString([(600000, 8150000), (601000, 8150000)]), LineString([(600000, 8151000), (600000, 8152000)])],
+		crs=31983,
+	)
+
+
+def test_repositorio_geometrias_reaproveita_visoes(linhas):
+	"""Testa se cada CRS é reprojetado uma única vez e se o CRS de trabalho não é reprojetado."""
+	repositorio = RepositorioGeometrias.de_geodataframe(linhas)
+
+	assert repositorio.visao() is repositorio.geometrias
+	assert repositorio.visao("EPSG:31983") is repositorio.geometrias
+
+	wgs84 = repositorio.visao(4326)
+	assert wgs84.crs.to_epsg() == 4326
+	assert repositorio.visao("EPSG:4326") is wgs84
+	assert wgs84.index.tolist() == ["10", "20"]
+
+	assert repositorio.comprimento_km().tolist() == pytest.approx([1.0, 1.0])
+
+
+def test_repositorio_geometrias_anexar(linhas):
+	"""Testa se a geometria é anexada pelo id_linha, na ordem do DataFrame e no CRS pedido."""
+	repositorio = RepositorioGeometrias.de_geodataframe(linhas)
+	atributos = pd.DataFrame({"id_linha": ["20", "10"], "iqt": [2.5, 1.5]})
+
+	resultado = repositorio.anexar(atributos, 4326)
+
+	assert isinstance(resultado, gpd.GeoDataFrame)
+	assert resultado.geometry.name == "geometria_linha"
+	assert resultado.crs.to_epsg() == 4326
+	assert resultado.geometry.iloc[0].equals(repositorio.visao(4326).loc["20"])
+	assert resultado["iqt"].tolist() == [2.5, 1.5]
+
+	with pytest.raises(ValueError, match="CRS"):
+		RepositorioGeometrias(gpd.GeoSeries([LineString([(0, 0), (1, 1)])]))
+
+
+def test_repositorio_geometrias_rejeita_ids_duplicados(linhas):
+	"""Testa se o repositório recusa linhas com o mesmo id_linha, informando os identificadores repetidos."""
+	with pytest.raises(ValueError, match=r"duplicados: \['10'\]"):
+		RepositorioGeometrias.de_geodataframe(linhas.assign(id_linha=[10, 10]))
+
+
+def test_tolerancia_para_zoom():
+	"""Testa se a tolerância corresponde à fração de pixel e cai pela metade a cada nível de zoom."""
+	assert tolerancia_para_zoom(0, pixels=1) == pytest.approx(156543.034, rel=1e-6)
+	assert tolerancia_para_zoom(13) == pytest.approx(tolerancia_para_zoom(12) / 2)
+
+
+def test_repositorio_geometrias_simplificada_preserva_divisas():
+	"""Testa se os bairros vizinhos são simplificados em conjunto, sem lacunas nem sobreposições, e se o resultado é reaproveitado."""
+	x = np.linspace(600000, 602000, 201)
+	divisa = list(zip(x, 8150000 + 5 * np.sin(x / 20), strict=True))
+	bairros = gpd.GeoSeries(
+		[Polygon([(600000, 8149000), *divisa, (602000, 8149000)]), Polygon([(600000, 8151000), *divisa, (602000, 8151000)])],
+		index=["sul", "norte"],
+		crs=31983,
+	)
+	repositorio = RepositorioGeometrias(bairros)
+
+	simplificados = repositorio.simplificada(tolerancia_para_zoom(12), cobertura=True)
+
+	assert repositorio.simplificada(tolerancia_para_zoom(12), cobertura=True) is simplificados
+	assert simplificados.crs == bairros.crs
+	assert shapely.get_num_coordinates(simplificados.to_numpy()).sum() < shapely.get_num_coordinates(bairros.to_numpy()).sum() / 4
+	assert shapely.coverage_is_valid(simplificados.to_numpy())
+	assert simplificados.union_all().area == pytest.approx(bairros.union_all().area, rel=1e-6)
+	assert repositorio.simplificada(0) is repositorio.geometrias
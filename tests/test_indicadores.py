@@ -1,6 +1,25 @@
+import datetime
+
+import geopandas as gpd
+import numpy as np
 import pandas as pd
 import pytest
+import shapely
 from quali_bus.data_analysis.calcular_indicadores import CalcularIndicadores
+from quali_bus.data_analysis.agregacao import (
+	acumular_em_blocos,
+	acumular_frequencia,
+	acumular_frequencia_diaria,
+	acumular_viagens_diarias,
+	finalizar_frequencia,
+	unir_acumuladores,
+)
+from quali_bus.data_analysis.estado_operacional import EstadoOperacional
+from quali_bus.utils.config import config
+from quali_bus.utils.cores import cor_iqt, cores_iqt
+from quali_bus.utils.modelos import COLUNAS_FREQUENCIA
+from quali_bus.utils.tabelas import ler_tabela, ler_tabela_em_blocos
+from shapely.geometry import LineString
 
 
 @pytest.fixture
@@ -155,3 +174,326 @@ def test_carregar_dados(calculator, sample_lines, sample_frequencia_atendimento_
 	assert not calculator.frequencia.empty, "Dados de frequência não carregados"
 	assert not calculator.pontualidade.empty, "Dados de pontualidade não carregados"
 	assert not calculator.cumprimento.empty, "Dados de cumprimento não carregados"
+
+
+def test_converter_geometry_para_linestring_em_lote(calculator):
+	"""
+	Testa a conversão em lote de WKT 3D para LineString 2D e o erro por linha para geometrias inválidas.
+	"""
+	df = pd.DataFrame({
+		"id_linha": ["1501", "4601", "4602"],
+		"geometria_linha": ["LINESTRING Z (-43.88 -16.70 10, -43.87 -16.69 12)", LineString([(-43.88, -16.70), (-43.86, -16.68)]), None],
+	})
+
+	gdf = calculator._converter_geometry_para_linestring(df, "EPSG:4326", "EPSG:4326")
+
+	assert not gdf.geometry.has_z.any(), "As geometrias devem ser 2D"
+	assert gdf.geometry.geom_type.eq("LineString").all(), "Todas as geometrias devem ser LineStrings"
+	assert gdf.geometry.iloc[2].is_empty, "Valores ausentes devem virar LineStrings vazias"
+
+	df_invalido = pd.DataFrame({"id_linha": ["1501", "4601"], "geometria_linha": ["LINESTRING (0 0, 1 1)", "POINT (0 0)"]})
+	with pytest.raises(ValueError, match="4601"):
+		calculator._converter_geometry_para_linestring(df_invalido, "EPSG:4326", "EPSG:4326")
+
+
+def test_calcular_iqt_matriz(calculator):
+	"""
+	Testa se o cálculo matricial do IQT coincide com o cálculo por linha, inclusive com vários esquemas de pesos.
+	"""
+	pontuacoes = np.array([[3, 2, 3, 3, 3, 3, 3, 3, 3, 3], [0, 1, 0, 2, 1, 0, 3, 1, 0, 2]])
+	prioridades = np.column_stack([config.PRIORIDADE, np.full(10, 0.1)])
+
+	iqt = calculator.calcular_iqt_matriz(pontuacoes)
+	iqt_esquemas = calculator.calcular_iqt_matriz(pontuacoes, prioridades)
+
+	assert np.allclose(iqt, [calculator.calcular_iqt(linha) for linha in pontuacoes])
+	assert iqt_esquemas.shape == (2, 2)
+	assert np.allclose(iqt_esquemas[:, 0], iqt)
+
+
+def test_cores_iqt():
+	"""
+	Testa se a cor vetorizada do IQT coincide com `cor_iqt` elemento a elemento.
+	"""
+	valores = np.array([3.5, 3.0, 2.5, 2.0, 1.5, 1.0, 0.5, np.nan])
+
+	assert cores_iqt(valores).tolist() == [cor_iqt(valor) for valor in valores]
+
+
+def test_carregar_viagens_passagem_unica(calculator):
+	"""
+	Testa se `carregar_viagens` calcula pontualidade e km executado numa única agregação.
+	"""
+	df_viagens = pd.DataFrame({
+		"data_viagem": ["01/01/2024"] * 5,
+		"id_linha": [1, 1, 1, 2, 3],
+		"sentido": ["IDA", "VOLTA", "IDA", "IDA", "IDA"],
+		"descricao_trajeto": ["Rota Principal"] * 5,
+		"chegada_planejada": ["05:34:26", "-", "06:00:00", "-", "07:00:00"],
+		"partida_planejada": ["-", "-", "05:40:00", "-", "06:30:00"],
+		"chegada_real": ["05:52:00", "-", "-", "-", "07:02:00"],
+		"partida_real": ["-", "-", "05:41:00", "-", "06:31:00"],
+		"km_executado": [18, 17, "-", 10, None],
+	})
+
+	pontualidade, cumprimento = calculator.carregar_viagens(df_viagens)
+
+	assert pontualidade["id_linha"].tolist() == ["1", "2", "3"]
+	assert pontualidade["pontualidade"].tolist() == pytest.approx([2 / 3, 0.0, 1.0])
+	assert cumprimento["id_linha"].tolist() == ["1", "2"]
+	assert cumprimento["km_executado"].tolist() == pytest.approx([17.5, 10.0])
+	assert cumprimento.equals(calculator.cumprimento_itinerario(df_viagens))
+
+
+def test_carregar_dados_em_blocos_equivale_ao_carregamento_completo(calculator, sample_lines):
+	"""
+	Testa se a leitura em blocos produz os mesmos indicadores que o carregamento do registro inteiro.
+	"""
+	df_frequencia = pd.DataFrame({
+		"horario_inicio_jornada": ["08:00:00", "09:10:30", "10:00:00", "11:00:00", "12:00:59"],
+		"horario_fim_jornada": ["08:45:10", "09:50:00", "10:20:00", "11:59:59", "12:30:00"],
+		"data_jornada": ["01/01/2024"] * 5,
+		"sentido_viagem": ["IDA"] * 5,
+		"id_linha": [1, 2, 1, 2, 1],
+		"quantidade_passageiros": [10] * 5,
+	})
+	df_viagens = pd.DataFrame({
+		"data_viagem": ["01/01/2024"] * 5,
+		"id_linha": [1, 2, 1, 2, 1],
+		"sentido": ["IDA"] * 5,
+		"descricao_trajeto": ["Rota Principal"] * 5,
+		"partida_planejada": ["05:00:00", "-", "06:00:00", "-", "07:00:00"],
+		"partida_real": ["05:01:00", "-", "-", "-", "07:02:00"],
+		"chegada_planejada": ["05:30:00", "-", "06:30:00", "-", "07:30:00"],
+		"chegada_real": ["05:31:00", "-", "-", "06:40:00", "-"],
+		"km_executado": [18, "-", 17.5, 10, None],
+	})
+
+	calculator.carregar_dados(sample_lines, df_frequencia, df_viagens, "EPSG:4326", "EPSG:31983")
+	esperado = (calculator.frequencia, calculator.pontualidade, calculator.cumprimento)
+
+	calculator.carregar_dados_em_blocos(
+		sample_lines,
+		(df_frequencia.iloc[i : i + 2] for i in range(0, 5, 2)),
+		(df_viagens.iloc[i : i + 2] for i in range(0, 5, 2)),
+		"EPSG:4326",
+		"EPSG:31983",
+	)
+
+	pd.testing.assert_frame_equal(calculator.frequencia, esperado[0])
+	pd.testing.assert_frame_equal(calculator.pontualidade, esperado[1])
+	pd.testing.assert_frame_equal(calculator.cumprimento, esperado[2])
+	assert calculator.frequencia["frequencia_atendimento_pontuacao"].tolist() == pytest.approx([(45 + 20 + 29) / 3, (39 + 59) / 2])
+
+
+def test_acumular_frequencia_rejeita_jornada_sem_horario(calculator):
+	"""
+	Testa se uma jornada sem horário é recusada, em vez de virar uma duração inválida na média da linha.
+	"""
+	df_frequencia = pd.DataFrame({
+		"horario_inicio_jornada": ["08:00:00", None],
+		"horario_fim_jornada": ["08:45:00", "09:30:00"],
+		"id_linha": [1501, 4601],
+	})
+
+	with pytest.raises(ValueError, match=r"sem horário.*\['4601'\]"):
+		acumular_frequencia(df_frequencia)
+	assert calculator.carregar_frequencia_atendimento_pontuacao(df_frequencia).empty
+
+
+def test_acumular_em_blocos_com_tipos_de_id_linha_diferentes(tmp_path):
+	"""
+	Testa se blocos do CSV em que 'id_linha' é lido com tipos diferentes (número ou texto) são combinados na mesma linha.
+	"""
+	caminho = tmp_path / "frequencia.csv"
+	pd.DataFrame({
+		"id_linha": ["1501", "A1", "1501"],
+		"horario_inicio_jornada": ["08:00:00", "09:00:00", "10:00:00"],
+		"horario_fim_jornada": ["08:50:00", "09:20:00", "10:30:00"],
+	}).to_csv(caminho, index=False)
+
+	frequencia = finalizar_frequencia(acumular_em_blocos(ler_tabela_em_blocos(caminho, 2), acumular_frequencia))
+
+	assert frequencia["id_linha"].tolist() == ["1501", "A1"]
+	assert frequencia["frequencia_atendimento_pontuacao"].tolist() == pytest.approx([40.0, 20.0])
+
+
+def test_estado_operacional_janela_movel(calculator, tmp_path):
+	"""
+	Testa se o estado diário persistido reproduz os indicadores da janela e descarta os dias expirados.
+	"""
+	df_frequencia = pd.DataFrame({
+		"horario_inicio_jornada": ["08:00:00", "09:00:00", "10:00:00", "11:00:00"],
+		"horario_fim_jornada": ["08:40:00", "09:50:00", "10:20:00", "11:30:30"],
+		"data_jornada": ["01/01/2024", "02/01/2024", "03/01/2024", "03/01/2024"],
+		"sentido_viagem": ["IDA"] * 4,
+		"id_linha": [1, 1, 1, 2],
+		"quantidade_passageiros": [10] * 4,
+	})
+	df_viagens = pd.DataFrame({
+		"data_viagem": ["01/01/2024", "02/01/2024", "03/01/2024", "03/01/2024"],
+		"id_linha": [1, 1, 2, 2],
+		"sentido": ["IDA"] * 4,
+		"descricao_trajeto": ["Rota Principal"] * 4,
+		"partida_planejada": ["05:00:00", "-", "06:00:00", "-"],
+		"partida_real": ["05:01:00", "-", "-", "-"],
+		"chegada_planejada": ["05:30:00", "-", "06:30:00", "-"],
+		"chegada_real": ["05:31:00", "-", "-", "-"],
+		"km_executado": [18, 16, 9, 11],
+	})
+	caminho = tmp_path / "estado.csv"
+
+	for data in ["01/01/2024", "02/01/2024", "03/01/2024"]:
+		estado = EstadoOperacional.carregar(caminho, janela_dias=2)
+		estado.adicionar_dia(df_frequencia[df_frequencia["data_jornada"] == data], df_viagens[df_viagens["data_viagem"] == data])
+		estado.salvar(caminho)
+
+	estado = EstadoOperacional.carregar(caminho, janela_dias=2)
+	assert estado.dias == [pd.Timestamp("2024-01-02"), pd.Timestamp("2024-01-03")]
+
+	janela = slice(1, None)
+	esperado = (calculator.frequencia_atendimento_pontuacao(df_frequencia.iloc[janela]), *calculator.carregar_viagens(df_viagens.iloc[janela]))
+	for obtido, referencia in zip(estado.indicadores(), esperado, strict=True):
+		pd.testing.assert_frame_equal(obtido, referencia)
+
+
+def test_calcular_painel_iqt(calculator):
+	"""
+	Testa o painel de IQT por linha e período: um período por mês e, com um único período, o mesmo IQT do fluxo completo.
+	"""
+	df_linhas = pd.DataFrame({
+		"id_linha": [1, 2],
+		"geometria_linha": ["LINESTRING (-43.88 -16.70, -43.80 -16.70)", "LINESTRING (-43.88 -16.69, -43.87 -16.69)"],
+		"indicador_via_pavimentada": [1.0, 0.5],
+		"tipo_integracao": ["Integração tarifária temporal", "Integração parcial"],
+		"indicador_treinamento_motorista": [1.0, 0.5],
+		"disponibilidade_informacao": ["Sistema online", "Sistema básico"],
+		"valor_tarifa": ["Não houve aumento da tarifa", "Aumento inferior ao índice"],
+	})
+	df_frequencia = pd.DataFrame({
+		"horario_inicio_jornada": ["08:00:00", "09:00:00", "10:00:00", "11:00:00"],
+		"horario_fim_jornada": ["08:10:00", "09:40:00", "10:20:00", "11:30:00"],
+		"data_jornada": ["05/01/2024", "05/02/2024", "05/01/2024", "05/02/2024"],
+		"sentido_viagem": ["IDA"] * 4,
+		"id_linha": [1, 1, 2, 2],
+		"quantidade_passageiros": [10] * 4,
+	})
+	df_viagens = pd.DataFrame({
+		"data_viagem": ["05/01/2024", "05/02/2024", "05/01/2024", "05/02/2024"],
+		"id_linha": [1, 1, 2, 2],
+		"sentido": ["IDA"] * 4,
+		"descricao_trajeto": ["Rota Principal"] * 4,
+		"partida_planejada": ["05:00:00", "-", "06:00:00", "06:00:00"],
+		"partida_real": ["05:01:00", "-", "-", "-"],
+		"chegada_planejada": ["05:30:00", "-", "06:30:00", "06:30:00"],
+		"chegada_real": ["05:31:00", "-", "-", "-"],
+		"km_executado": [8.5, 8.0, 1.0, 1.1],
+	})
+	calculator.carregar_dados(df_linhas, df_frequencia, df_viagens, "EPSG:4326", "EPSG:31983")
+	calculator.dados_geograficos = pd.DataFrame({"id_linha": ["1", "2"], "distancia": [150.0, 80.0], "proporcao": [0.9, 1.0]})
+	calculator.classificar_linha()
+	calculator.processar_iqt()
+
+	acumuladores = unir_acumuladores(acumular_frequencia_diaria(df_frequencia), acumular_viagens_diarias(df_viagens))
+	painel = calculator.calcular_painel_iqt(acumuladores, "M")
+	painel_anual = calculator.calcular_painel_iqt(acumuladores, "Y")
+
+	assert painel[["id_linha", "periodo"]].astype(str).values.tolist() == [["1", "2024-01"], ["1", "2024-02"], ["2", "2024-01"], ["2", "2024-02"]]
+	assert painel.loc[0, "I4"] == 1.0 and painel.loc[1, "I4"] == 0.0
+	assert painel_anual["iqt"].tolist() == pytest.approx(calculator.matriz["iqt"].tolist())
+
+
+def test_carregar_dados_colunares(calculator, tmp_path):
+	"""
+	Testa a leitura de Parquet/Arrow com tipos nativos (WKB, horários, categorias) e apenas as colunas necessárias.
+	"""
+	pytest.importorskip("pyarrow")
+	df_linhas = pd.DataFrame({
+		"id_linha": ["1"],
+		"geometria_linha": [shapely.to_wkb(LineString([(-43.88, -16.70), (-43.80, -16.70)]))],
+		"indicador_via_pavimentada": [1.0],
+		"tipo_integracao": ["Integração parcial"],
+		"indicador_treinamento_motorista": [1.0],
+		"disponibilidade_informacao": ["Sistema online"],
+		"valor_tarifa": ["Não houve aumento da tarifa"],
+	})
+	df_frequencia = pd.DataFrame({
+		"horario_inicio_jornada": [datetime.time(8, 0), datetime.time(9, 0)],
+		"horario_fim_jornada": [datetime.time(8, 30), datetime.time(9, 50, 30)],
+		"data_jornada": [datetime.date(2024, 1, 5)] * 2,
+		"sentido_viagem": pd.Categorical(["IDA", "VOLTA"]),
+		"id_linha": pd.Categorical(["1", "1"], categories=["1", "2"]),
+		"quantidade_passageiros": [10, 12],
+		"coluna_nao_usada": ["x", "y"],
+	})
+	df_linhas.to_parquet(tmp_path / "linhas.parquet")
+	df_frequencia.to_parquet(tmp_path / "frequencia.parquet")
+	df_frequencia.to_feather(tmp_path / "frequencia.arrow")
+
+	dados_linhas = calculator.carregar_dados_linha(ler_tabela(tmp_path / "linhas.parquet"), "EPSG:4326", "EPSG:31983")
+	frequencia_parquet = ler_tabela(tmp_path / "frequencia.parquet", COLUNAS_FREQUENCIA)
+	blocos_arrow = ler_tabela_em_blocos(tmp_path / "frequencia.arrow", 1, COLUNAS_FREQUENCIA)
+
+	assert dados_linhas.geometry.geom_type.tolist() == ["LineString"]
+	assert "coluna_nao_usada" not in frequencia_parquet.columns
+	assert isinstance(frequencia_parquet["id_linha"].dtype, pd.CategoricalDtype)
+
+	frequencia = calculator.frequencia_atendimento_pontuacao(frequencia_parquet)
+	assert frequencia["id_linha"].tolist() == ["1"]
+	assert frequencia["frequencia_atendimento_pontuacao"].tolist() == [40.0]
+	pd.testing.assert_frame_equal(finalizar_frequencia(acumular_em_blocos(blocos_arrow, acumular_frequencia)), frequencia)
+
+
+def test_merge_dados_informa_linhas_descartadas(calculator, capsys):
+	"""
+	Testa se a junção alinha as tabelas por id_linha, mantém a geometria e informa as linhas descartadas.
+	"""
+	df_linhas = pd.DataFrame({
+		"id_linha": [1, 2, 3],
+		"geometria_linha": [
+			"LINESTRING (-43.88 -16.70, -43.87 -16.70)",
+			"LINESTRING (-43.88 -16.69, -43.87 -16.69)",
+			"LINESTRING (-43.88 -16.68, -43.87 -16.68)",
+		],
+		"indicador_via_pavimentada": [1.0, 0.5, 0.9],
+		"tipo_integracao": ["Integração parcial"] * 3,
+		"indicador_treinamento_motorista": [1.0, 0.5, 0.9],
+		"disponibilidade_informacao": ["Sistema básico"] * 3,
+		"valor_tarifa": ["Não houve aumento da tarifa"] * 3,
+	})
+	calculator.dados_linhas = calculator.carregar_dados_linha(df_linhas, "EPSG:4326", "EPSG:31983")
+	calculator.cumprimento = pd.DataFrame({"id_linha": ["3", "2", "1"], "km_executado": [3.0, 2.0, 1.0]})
+	calculator.frequencia = pd.DataFrame({"id_linha": ["1", "3"], "frequencia_atendimento_pontuacao": [10.0, 30.0]})
+	calculator.pontualidade = pd.DataFrame({"id_linha": ["1", "2", "3", "4"], "pontualidade": [0.9, 0.8, 0.7, 0.6]})
+	calculator.dados_geograficos = pd.DataFrame({"id_linha": ["3", "1", "2"], "distancia": [300.0, 100.0, 200.0], "proporcao": [1.0] * 3})
+
+	calculator.merge_dados()
+	dados = calculator.dados_completos
+
+	assert dados["id_linha"].tolist() == ["1", "3"]
+	assert dados["km_executado"].tolist() == [1.0, 3.0]
+	assert dados["distancia"].tolist() == [100.0, 300.0]
+	assert dados.geometry.name == "geometria_linha" and dados.crs == calculator.dados_linhas.crs
+	assert dados.geometry.iloc[1].equals(calculator.dados_linhas.geometry.iloc[2])
+	assert dados["cumprimento_itinerario"].tolist() == pytest.approx((dados["km_executado"] / dados["distancia_km"]).tolist())
+	assert calculator.linhas_descartadas == {"frequencia": ["2"]}
+	assert "descartada" in capsys.readouterr().out
+
+
+def test_merge_dados_rejeita_linhas_duplicadas(calculator):
+	"""
+	Testa se a junção recusa linhas com o mesmo id_linha, informando os identificadores repetidos, em vez de falhar em silêncio.
+	"""
+	calculator.dados_linhas = gpd.GeoDataFrame(
+		{"id_linha": [1, 1, 3]},
+		geometry=[LineString([(600000, 8150000 + deslocamento), (601000, 8150000 + deslocamento)]) for deslocamento in range(3)],
+		crs=31983,
+	)
+	calculator.cumprimento = pd.DataFrame({"id_linha": ["1", "3"], "km_executado": [1.0, 3.0]})
+	calculator.frequencia = pd.DataFrame({"id_linha": ["1", "3"], "frequencia_atendimento_pontuacao": [10.0, 30.0]})
+	calculator.pontualidade = pd.DataFrame({"id_linha": ["1", "3"], "pontualidade": [0.9, 0.7]})
+	calculator.dados_geograficos = pd.DataFrame({"id_linha": ["1", "3"], "distancia": [100.0, 300.0], "proporcao": [1.0] * 2})
+
+	with pytest.raises(ValueError, match=r"duplicados: \['1'\]"):
+		calculator.merge_dados()
+	assert not hasattr(calculator, "dados_completos")
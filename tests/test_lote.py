@@ -0,0 +1,87 @@
+import geopandas as gpd
+import numpy as np
+import pandas as pd
+import pytest
+from shapely.geometry import LineString, box
+
+from quali_bus import ProcessadorLote
+
+
+@pytest.fixture
+def cidade(tmp_path):
+	"""Cria os arquivos de uma cidade pequena, com duas linhas, e retorna a entrada do manifesto."""
+	bairros = gpd.GeoDataFrame({"name": ["Centro"]}, geometry=[box(-43.90, -16.72, -43.86, -16.68)], crs=4326).to_crs(31983)
+	bairros.to_file(tmp_path / "bairros.shp")
+
+	linhas = pd.DataFrame({
+		"id_linha": [1, 2],
+		"geometria_linha": [LineString([(-43.89, -16.70), (-43.87, -16.70)]).wkt, LineString([(-43.88, -16.71), (-43.88, -16.69)]).wkt],
+		"indicador_via_pavimentada": [0.9, 0.5],
+		"tipo_integracao": ["Sem integração", "Sem integração"],
+		"indicador_treinamento_motorista": [1.0, 0.5],
+		"disponibilidade_informacao": ["Possuir informação em site desatualizado ", "Possuir informação em site desatualizado "],
+		"valor_tarifa": ["Não houve aumento da tarifa", "Aumento inferior ao índice"],
+	})
+	linhas.to_csv(tmp_path / "linhas.csv", index=False)
+
+	pd.DataFrame({
+		"horario_inicio_jornada": ["08:00:00", "09:00:00", "08:00:00"],
+		"horario_fim_jornada": ["08:20:00", "09:40:00", "08:30:00"],
+		"data_jornada": ["01/02/2024"] * 3,
+		"sentido_viagem": ["IDA"] * 3,
+		"id_linha": [1, 1, 2],
+		"quantidade_passageiros": [10, 20, 30],
+	}).to_csv(tmp_path / "frequencia.csv", index=False)
+
+	pd.DataFrame({
+		"data_viagem": ["01/02/2024"] * 3,
+		"id_linha": [1, 1, 2],
+		"sentido": ["ida"] * 3,
+		"descricao_trajeto": ["Rota"] * 3,
+		"partida_planejada": ["08:00:00", "-", "08:00:00"],
+		"partida_real": ["08:02:00", "-", "08:05:00"],
+		"chegada_planejada": ["08:20:00", "-", "08:30:00"],
+		"chegada_real": ["08:21:00", "-", "08:33:00"],
+		"km_executado": [2.1, 2.0, 2.2],
+	}).to_csv(tmp_path / "pontualidade.csv", index=False)
+
+	longitudes = np.linspace(-43.89, -43.87, 5)
+	pd.DataFrame({"id": range(5), "longitude": longitudes, "latitude": -16.70}).to_csv(tmp_path / "pontos.csv", index=False)
+	pd.DataFrame({"id": range(5), "longitude": longitudes, "latitude": -16.701}).to_csv(tmp_path / "residencias.csv", index=False)
+
+	return {
+		"cidade": "teste",
+		"shapefile_path": str(tmp_path / "bairros.shp"),
+		"linhas_path": str(tmp_path / "linhas.csv"),
+		"frequencia_path": str(tmp_path / "frequencia.csv"),
+		"pontualidade_path": str(tmp_path / "pontualidade.csv"),
+		"pontos_path": str(tmp_path / "pontos.csv"),
+		"residencias_path": str(tmp_path / "residencias.csv"),
+	}
+
+
+@pytest.mark.parametrize("max_processos", [1, 2])
+def test_processador_lote_isola_falhas(cidade, tmp_path, max_processos):
+	"""Testa se o lote consolida as cidades processadas e registra as que falharam sem interromper as demais."""
+	quebrada = {**cidade, "cidade": "quebrada", "pontos_path": str(tmp_path / "nao_existe.csv")}
+	caminho_matriz = tmp_path / f"matriz_{max_processos}.csv"
+
+	matriz, relatorio = ProcessadorLote(pd.DataFrame([cidade, quebrada]), max_processos=max_processos).executar(caminho_matriz)
+
+	assert relatorio["cidade"].tolist() == ["teste", "quebrada"]
+	assert relatorio["status"].tolist() == ["ok", "erro"]
+	assert relatorio.loc[1, "erro"].startswith("geoespacial: FileNotFoundError")
+	assert matriz.columns[0] == "cidade"
+	assert set(matriz["cidade"]) == {"teste"}
+	assert sorted(matriz["id_linha"].astype(str)) == ["1", "2"]
+	assert caminho_matriz.exists()
+
+
+def test_processador_lote_valida_manifesto(cidade):
+	"""Testa se o manifesto vazio, com cidades repetidas ou com colunas faltando é rejeitado."""
+	with pytest.raises(ValueError, match="repetidas"):
+		ProcessadorLote(pd.DataFrame([cidade, cidade]))
+	with pytest.raises(ValueError, match="faltando"):
+		ProcessadorLote(pd.DataFrame([cidade]).drop(columns=["pontos_path"]))
+	with pytest.raises(ValueError, match="nenhuma cidade"):
+		ProcessadorLote(pd.DataFrame(columns=list(cidade)))
@@ -1,8 +1,11 @@
 import folium
 import geopandas as gpd
+import numpy as np
+import pandas as pd
 import pytest
 from quali_bus.map_tools import MapaIQT
-from shapely.geometry import Polygon
+from quali_bus.utils.associador import Associador
+from shapely.geometry import LineString, Polygon
 
 
 @pytest.fixture
@@ -32,3 +35,72 @@ def dados_mapa():
 def test_iniciar_mapa(dados_mapa):
 	mapa = MapaIQT(dados_mapa)
 	assert isinstance(mapa.map, folium.Map)
+
+
+@pytest.fixture
+def rotas():
+	"""Três rotas em EPSG:4326, duas com IQT na mesma classe."""
+	return gpd.GeoDataFrame(
+		{"id_linha": ["1", "2", "3"], "iqt": [3.2, 3.5, 1.2], "pontualidade": [0.912345, 0.8, 0.7]},
+		geometry=[
+			LineString([(-43.8461, -16.7506), (-43.8455, -16.7510), (-43.8450, -16.7512)]),
+			LineString([(-43.8461, -16.7500), (-43.8450, -16.7500)]),
+			LineString([(-43.8461, -16.7490), (-43.8450, -16.7490)]),
+		],
+		crs="EPSG:4326",
+	).rename_geometry("geometria_linha")
+
+
+def test_classificar_rota_grupo_geojson(dados_mapa, rotas):
+	"""Testa se cada classe de IQT vira uma única camada GeoJSON, com as propriedades das rotas para o popup."""
+	mapa = MapaIQT(dados_mapa).classificar_rota_grupo(rotas, modo="geojson")
+
+	camadas = [filho for filho in mapa._children.values() if isinstance(filho, folium.FeatureGroup)]
+	assert [camada.layer_name for camada in camadas] == ["Excelente", "Suficiente"]
+	geojsons = [filho for camada in camadas for filho in camada._children.values()]
+	assert all(isinstance(filho, folium.GeoJson) for filho in geojsons)
+	assert [len(filho.data["features"]) for filho in geojsons] == [2, 1]
+	assert geojsons[0].data["features"][0]["properties"]["pontualidade"] == 0.91
+
+	html = mapa.get_root().render()
+	assert "L.polyline" not in html
+	assert html.count("L.geoJson(") == 3
+
+	padrao = MapaIQT(dados_mapa).classificar_rota_grupo(rotas).get_root().render()
+	assert padrao.count("L.polyline(") == 3
+
+	with pytest.raises(ValueError, match="modo"):
+		MapaIQT(dados_mapa).classificar_rota_grupo(rotas, modo="svg")
+
+
+def test_gerar_mapa_de_calor_grade(dados_mapa, rotas):
+	"""Testa se o modo em grade desenha apenas as células, em vez de um ponto por residência."""
+	longitudes = np.linspace(-43.8461, -43.8426, 200)
+	residencias = pd.DataFrame({"longitude": longitudes, "latitude": -16.7510})
+	pontos = pd.DataFrame({"longitude": [-43.8461, -43.8430], "latitude": [-16.7506, -16.7506]})
+	associador = Associador(pontos, rotas.to_crs("EPSG:31983"), residencias, "EPSG:4326", "EPSG:31983")
+
+	mapa = MapaIQT(dados_mapa).gerar_mapa_de_calor(associador, modo="hexagonal", resolucao=100)
+
+	camadas = [filho for filho in mapa._children.values() if isinstance(filho, folium.GeoJson) and filho.layer_name != "Bairros"]
+	assert len(camadas) == 1
+	propriedades = [celula["properties"] for celula in camadas[0].data["features"]]
+	assert 1 < len(propriedades) < len(residencias)
+	assert sum(celula["num_residencias"] for celula in propriedades) == len(residencias)
+	assert "HeatMap" not in mapa.get_root().render()
+
+
+def test_mapas_criados_sob_demanda(dados_mapa, rotas):
+	"""Testa se nenhum mapa é criado na inicialização e se cada geração retorna um mapa novo, com a camada de bairros reaproveitada."""
+	mapa_iqt = MapaIQT(dados_mapa)
+	assert mapa_iqt._mapa is None and mapa_iqt._mapa_de_calor is None and mapa_iqt._camada_bairros is None
+
+	primeiro = mapa_iqt.classificar_rota_grupo(rotas, modo="geojson")
+	segundo = mapa_iqt.classificar_rota_grupo(rotas, modo="geojson")
+
+	assert primeiro is not segundo
+	assert mapa_iqt.mapa is segundo
+	assert primeiro.get_root().render().count("L.geoJson(") == segundo.get_root().render().count("L.geoJson(") == 3
+	bairros = [filho for mapa in (primeiro, segundo) for filho in mapa._children.values() if getattr(filho, "layer_name", None) == "Bairros"]
+	assert len(bairros) == 2 and bairros[0].data is bairros[1].data
+	assert mapa_iqt._mapa_de_calor is None
@@ -0,0 +1,61 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from quali_bus import AnaliseSensibilidade, CalcularIndicadores
+from quali_bus.utils.config import config
+
+
+@pytest.fixture
+def classificacao():
+	"""Pontuações I1 a I10 de três linhas: uma sempre excelente, uma sempre insuficiente e uma na fronteira entre classes."""
+	pontuacoes = np.array([[3] * 10, [0] * 10, [3, 0, 0, 3, 3, 0, 3, 3, 0, 3]])
+	df = pd.DataFrame(pontuacoes, columns=config.NOMECLATURA)
+	df.insert(0, "id_linha", ["A", "B", "C"])
+	return df
+
+
+@pytest.mark.parametrize("distribuicao", ["dirichlet", "lognormal"])
+def test_analise_sensibilidade(classificacao, distribuicao):
+	"""Testa os pesos sorteados e os resultados por linha da simulação em blocos."""
+	analise = AnaliseSensibilidade(classificacao, distribuicao=distribuicao, semente=0)
+
+	pesos = analise.amostrar_pesos(50)
+	assert pesos.shape == (10, 50)
+	assert np.allclose(pesos.sum(axis=0), np.sum(config.PRIORIDADE))
+	assert (pesos > 0).all()
+
+	resultado = analise.executar(n_amostras=1_001, tamanho_bloco=300)
+
+	iqt_base = CalcularIndicadores().calcular_iqt_matriz(classificacao[config.NOMECLATURA].to_numpy())
+	assert np.allclose(resultado["iqt_base"], iqt_base)
+	assert resultado["id_linha"].tolist() == ["A", "B", "C"]
+	assert (resultado["iqt_q05"] <= resultado["iqt_q50"]).all() and (resultado["iqt_q50"] <= resultado["iqt_q95"]).all()
+
+	probabilidades = resultado[["prob_Insuficiente", "prob_Suficiente", "prob_Bom", "prob_Excelente"]]
+	assert np.allclose(probabilidades.sum(axis=1), 1.0)
+	assert resultado.loc[1, "prob_mudanca_classe"] == 0.0
+	assert resultado.loc[1, "posicao_melhor"] == resultado.loc[1, "posicao_pior"] == 3
+
+
+def test_analise_sensibilidade_quantis_por_histograma(classificacao):
+	"""Testa se os quantis estimados pelo histograma de cada linha se aproximam dos quantis exatos das amostras guardadas."""
+	estimado = AnaliseSensibilidade(classificacao, semente=7).executar(n_amostras=3_000, tamanho_bloco=700)
+	exato = AnaliseSensibilidade(classificacao, semente=7).executar(n_amostras=3_000, tamanho_bloco=700, guardar_amostras=True)
+
+	quantis = ["iqt_q05", "iqt_q50", "iqt_q95"]
+	amplitude = (exato["iqt_q95"] - exato["iqt_q05"]).to_numpy()[:, None]
+	assert np.all(np.abs(estimado[quantis] - exato[quantis]).to_numpy() <= 0.01 * amplitude + 1e-12)
+	assert (estimado.loc[1, quantis] == 0.0).all()
+	outras = [coluna for coluna in exato.columns if coluna not in quantis]
+	pd.testing.assert_frame_equal(estimado[outras], exato[outras])
+
+
+def test_analise_sensibilidade_reprodutivel(classificacao):
+	"""Testa se a mesma semente produz o mesmo resultado, independentemente do tamanho do bloco."""
+	primeiro = AnaliseSensibilidade(classificacao, semente=42).executar(n_amostras=500, tamanho_bloco=500)
+	segundo = AnaliseSensibilidade(classificacao, semente=42).executar(n_amostras=500, tamanho_bloco=500)
+	pd.testing.assert_frame_equal(primeiro, segundo)
+
+	with pytest.raises(ValueError, match="desconhecida"):
+		AnaliseSensibilidade(classificacao, distribuicao="uniforme")
@@ -0,0 +1,61 @@
+import gzip
+import json
+import sqlite3
+
+import geopandas as gpd
+import numpy as np
+import pandas as pd
+import pytest
+from shapely.geometry import LineString, Polygon, box
+
+from quali_bus import ExportadorTilesVetoriais
+from quali_bus.map_tools.tiles_vetoriais import TIPO_LINHA, TIPO_POLIGONO, _comandos_geometria, _varints
+
+
+@pytest.fixture
+def exportador():
+	"""Exportador com duas rotas e dois bairros em EPSG:31983."""
+	rotas = gpd.GeoDataFrame(
+		{"id_linha": ["101", "102"], "iqt": [2.4, 0.8]},
+		geometry=[LineString([(600000, 8150000), (603000, 8150500)]), LineString([(601000, 8149000), (601500, 8152000)])],
+		crs=31983,
+	)
+	bairros = gpd.GeoDataFrame(
+		{"nome": ["Centro", "Vila"]}, geometry=[box(599000, 8148000, 601500, 8153000), box(601500, 8148000, 604000, 8153000)], crs=31983
+	)
+	return ExportadorTilesVetoriais(rotas, bairros, zoom_min=11, zoom_max=13)
+
+
+def test_codificacao_geometria_segue_especificacao():
+	"""Testa a codificação dos comandos com os exemplos da especificação MVT 2.1."""
+	assert _varints(np.array([1, 300])) == b"\x01\xac\x02"
+	linha = _comandos_geometria(LineString([(2, 2), (2, 10), (10, 10)]), TIPO_LINHA)
+	assert linha.tolist() == [9, 4, 4, 18, 0, 16, 16, 0]
+	poligono = _comandos_geometria(Polygon([(3, 6), (8, 12), (20, 34)]), TIPO_POLIGONO)
+	assert poligono.tolist() == [9, 6, 12, 18, 10, 12, 24, 44, 15]
+	invertido = _comandos_geometria(Polygon([(3, 6), (20, 34), (8, 12)]), TIPO_POLIGONO)
+	assert invertido.tolist() == poligono.tolist()
+
+
+def test_exportador_tiles_vetoriais_diretorio_e_mbtiles(exportador, tmp_path):
+	"""Testa se a mesma pirâmide é gravada em diretório, com visualizador, e em MBTiles, com as linhas no esquema TMS."""
+	tiles = list(exportador.gerar_tiles())
+	assert {zoom for zoom, *_ in tiles} == {11, 12, 13}
+	assert all(b"bairros" in tile for *_, tile in tiles)
+	assert any(b"rotas" in tile for *_, tile in tiles)
+
+	diretorio = exportador.exportar_diretorio(tmp_path / "tiles")
+	zoom, x, y, tile = tiles[-1]
+	assert (diretorio / str(zoom) / str(x) / f"{y}.pbf").read_bytes() == tile
+	assert "{z}/{x}/{y}.pbf" in (diretorio / "index.html").read_text(encoding="utf-8")
+	metadados = json.loads((diretorio / "metadata.json").read_text(encoding="utf-8"))
+	assert [camada["id"] for camada in metadados["vector_layers"]] == ["rotas", "bairros"]
+	assert metadados["vector_layers"][0]["fields"] == {"id_linha": "String", "iqt": "Number", "classe": "String", "cor": "String"}
+
+	with sqlite3.connect(exportador.exportar_mbtiles(tmp_path / "iqt.mbtiles")) as conexao:
+		linhas = pd.read_sql("SELECT * FROM tiles", conexao)
+		formato = conexao.execute("SELECT value FROM metadata WHERE name = 'format'").fetchone()[0]
+	assert formato == "pbf"
+	assert len(linhas) == len(tiles)
+	gravado = linhas[(linhas.zoom_level == zoom) & (linhas.tile_column == x) & (linhas.tile_row == 2**zoom - 1 - y)]
+	assert gzip.decompress(gravado.tile_data.iloc[0]) == tile